@@ -0,0 +1,48 @@
+"""Wall-clock startup of the command-line tool against the GUI's imports.
+
+Each command runs in a fresh interpreter, like a cron job or render-farm
+hook would. Run from the project root:
+    python benchmarks/bench_cli_startup.py
+"""
+import os
+import sys
+import time
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 10
+
+
+def time_command(args):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as repo_path:
+        source = os.path.join(repo_path, "design.png")
+        with open(source, "wb") as f:
+            f.write(os.urandom(64 * 1024))
+        subprocess.run([sys.executable, "cli.py", "--repo", repo_path, "commit", source, "-m", "first"],
+                       cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+
+        print(f"{'command':<36} {'median':>10}")
+        for label, args in [
+            ("python -c pass", ["-c", "pass"]),
+            ("cli.py log", ["cli.py", "--repo", repo_path, "log"]),
+            ("cli.py search first", ["cli.py", "--repo", repo_path, "search", "first"]),
+            ("cli.py commit --if-changed", ["cli.py", "--repo", repo_path, "commit", source, "--if-changed"]),
+            ("import main (GUI modules)", ["-c", "import main"]),
+        ]:
+            print(f"{label:<36} {time_command(args):>8.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
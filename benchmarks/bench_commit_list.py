@@ -0,0 +1,80 @@
+"""Benchmark for loading and updating the commit list model.
+
+Compares the id->row map in CommitListModel against the row-by-row scan the
+list used before. Run from the project root:
+    python benchmarks/bench_commit_list.py
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ui.widgets.commit_list_model import CommitListModel
+
+SIZES = [1000, 10000]
+UPDATES = 5000
+
+
+class ScanningModel(CommitListModel):
+    """The model with the linear row lookup it had before the id map"""
+
+    def row_for_id(self, commit_id):
+        for row, commit in enumerate(self.commits):
+            if commit['id'] == commit_id:
+                return row
+        return None
+
+    def add_commit(self, commit):
+        if self.row_for_id(commit['id']) is not None:
+            return
+        super().add_commit(commit)
+
+
+def make_commits(count):
+    return [{
+        "id": i,
+        "timestamp": "2024-01-01 12:00:00",
+        "message": f"Auto-commit {i}",
+        "note": "",
+        "color": None,
+        "thumbnail": None
+    } for i in range(count)]
+
+
+def time_load(model, commits):
+    """Add commits one at a time, the way the list grows during a session"""
+    start = time.perf_counter()
+    for commit in commits:
+        model.add_commit(commit)
+    return (time.perf_counter() - start) * 1000
+
+
+def time_updates(model, ids):
+    start = time.perf_counter()
+    for commit_id in ids:
+        model.update_commit(commit_id, color="#ffcdd2")
+    return (time.perf_counter() - start) / len(ids) * 1e6
+
+
+def main():
+    print(f"{'commits':>8} {'load (ms)':>10} {'scan load (ms)':>15} "
+          f"{'update (us)':>12} {'scan update (us)':>17}")
+    for size in SIZES:
+        commits = make_commits(size)
+        ids = [random.randrange(size) for _ in range(UPDATES)]
+
+        model = CommitListModel()
+        load = time_load(model, commits)
+        update = time_updates(model, ids)
+
+        scanning = ScanningModel()
+        scan_load = time_load(scanning, commits)
+        scan_update = time_updates(scanning, ids[:500])
+
+        print(f"{size:>8} {load:>10.1f} {scan_load:>15.1f} {update:>12.2f} {scan_update:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Microbenchmark for FileManager commit lookups at growing history sizes.
+
+Run from the project root:
+    python benchmarks/bench_commit_lookup.py
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.file_manager import FileManager
+
+SIZES = [1000, 10000, 100000]
+LOOKUPS = 20000
+
+
+def make_saves(count):
+    return [{
+        "id": i,
+        "timestamp": "2024-01-01 12:00:00",
+        "message": f"Auto-commit {i}",
+        "branch": "main",
+        "filename": "design.psd",
+        "object": f"{i:064x}",
+        "storage": "whole",
+        "thumbnail": None,
+        "note": "",
+        "color": None
+    } for i in range(count)]
+
+
+def linear_lookup(saves, save_id):
+    """The scan every getter used before the id index existed"""
+    for save in saves:
+        if save["id"] == save_id:
+            return save
+    return None
+
+
+def time_per_call(func, ids):
+    start = time.perf_counter()
+    for save_id in ids:
+        func(save_id)
+    return (time.perf_counter() - start) / len(ids) * 1e6
+
+
+def main():
+    with tempfile.TemporaryDirectory() as repo_path:
+        fm = FileManager(repo_path)
+        # Keep disk writes out of the measurement; only the lookups are timed
+        fm.store.update_save = lambda save: None
+        fm.store.commit = lambda: None
+
+        print(f"{'commits':>8} {'get_commit_message':>20} {'get_version_path':>18} "
+              f"{'update_commit':>15} {'linear scan':>13}   (microseconds per call)")
+        for size in SIZES:
+            fm.metadata["saves"] = make_saves(size)
+            fm._build_indexes()
+            ids = [random.randrange(size) for _ in range(LOOKUPS)]
+
+            message = time_per_call(fm.get_commit_message, ids)
+            path = time_per_call(fm.get_version_path, ids)
+            update = time_per_call(lambda save_id: fm.update_commit(save_id, color="#ffcdd2"), ids)
+            linear = time_per_call(lambda save_id: linear_lookup(fm.metadata["saves"], save_id), ids[:200])
+
+            print(f"{size:>8} {message:>20.2f} {path:>18.2f} {update:>15.2f} {linear:>13.2f}")
+        fm.close()
+
+
+if __name__ == "__main__":
+    main()
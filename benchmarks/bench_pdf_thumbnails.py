@@ -0,0 +1,67 @@
+"""PDF thumbnail time: rendering at 2x and shrinking vs. rendering at the target size.
+
+Builds documents of vector-heavy pages with PyMuPDF and times thumbnails of
+every page both ways. Run from the project root:
+    python benchmarks/bench_pdf_thumbnails.py
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.formats import handler_for, fit_image
+from core.thumbnails import THUMBNAIL_SIZE
+
+# (page width, page height in points, pages)
+DOCUMENTS = [(595, 842, 20), (1684, 2384, 10), (3370, 4768, 5)]
+SHAPES_PER_PAGE = 400
+
+
+def build_pdf(path, width, height, pages):
+    import fitz
+    document = fitz.open()
+    for number in range(pages):
+        page = document.new_page(width=width, height=height)
+        for i in range(SHAPES_PER_PAGE):
+            x = (i * 37 + number * 11) % width
+            y = (i * 53) % height
+            page.draw_circle((x, y), 5 + i % 40, color=(0, 0, 0), fill=((i % 7) / 7, (i % 5) / 5, (i % 3) / 3))
+        page.insert_text((36, 72), f"Page {number + 1}", fontsize=48)
+    document.save(path)
+    document.close()
+
+
+def render_large(handler, path, pages):
+    """The old approach: every page at 2x its size, then shrunk"""
+    document = handler._open(path)
+    try:
+        for page in range(pages):
+            fit_image(handler._render(document[page], 2), THUMBNAIL_SIZE)
+    finally:
+        document.close()
+
+
+def render_targeted(handler, path, pages):
+    for _ in handler.render_pages(path, THUMBNAIL_SIZE, range(pages)):
+        pass
+
+
+def main():
+    handler = handler_for(".pdf")
+    with tempfile.TemporaryDirectory() as tmp:
+        for width, height, pages in DOCUMENTS:
+            path = os.path.join(tmp, f"{width}x{height}.pdf")
+            build_pdf(path, width, height, pages)
+            timings = []
+            for render in (render_large, render_targeted):
+                start = time.perf_counter()
+                render(handler, path, pages)
+                timings.append((time.perf_counter() - start) / pages * 1000)
+            print(f"{width}x{height}pt, {pages} pages: 2x then shrink {timings[0]:7.1f}ms/page, "
+                  f"at target size {timings[1]:6.1f}ms/page")
+
+
+if __name__ == "__main__":
+    main()
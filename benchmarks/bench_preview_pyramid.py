@@ -0,0 +1,60 @@
+"""Time to show a version in the preview panel: original file vs. pyramid level vs. cache.
+
+Commits large PNGs, renders their preview pyramids, then times showing each
+version in a preview widget three ways: decoding the original file (the old
+behaviour), loading the pyramid level that fits, and a repeat visit served
+from the pixmap cache. Run from the project root:
+    python benchmarks/bench_preview_pyramid.py
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SIZES = [(3000, 2000), (6000, 4000), (10000, 7000)]
+PREVIEW_SIZE = (900, 700)
+RUNS = 3
+
+
+def main():
+    if "DISPLAY" not in os.environ and sys.platform.startswith("linux"):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PIL import Image
+    from PySide2.QtWidgets import QApplication
+    from core.file_manager import FileManager
+    from ui.widgets.preview import PreviewWidget
+    app = QApplication([])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fm = FileManager(os.path.join(tmp, "repo"))
+        preview = PreviewWidget(cache_budget=256 * 1024 * 1024)
+        preview.resize(*PREVIEW_SIZE)
+        for width, height in SIZES:
+            source = os.path.join(tmp, f"{width}x{height}.png")
+            Image.effect_noise((width, height), 40).convert("RGB").save(source)
+            save_id = fm.save(source, "benchmark")
+            fm.render_pending_thumbnails()
+            original = fm.get_version_path(save_id)
+            level = fm.preview_path(save_id, preview.preview_side())
+
+            timings = {}
+            for label, path in (("original", original), ("pyramid", level)):
+                start = time.perf_counter()
+                for _ in range(RUNS):
+                    preview.cache.clear()
+                    preview.set_preview(path)
+                timings[label] = (time.perf_counter() - start) / RUNS * 1000
+            start = time.perf_counter()
+            for _ in range(RUNS):
+                preview.set_preview(level)
+            timings["cached"] = (time.perf_counter() - start) / RUNS * 1000
+            print(f"{width}x{height}: original {timings['original']:7.1f}ms, "
+                  f"pyramid level {timings['pyramid']:6.1f}ms, cached {timings['cached']:5.2f}ms")
+        fm.close()
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
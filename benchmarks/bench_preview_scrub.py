@@ -0,0 +1,75 @@
+"""Time per step when scrubbing through history, with and without prefetching.
+
+Commits 200 versions of a large image, renders their preview pyramids, then
+steps through the commit list one version every STEP_MS and times how long
+each selection blocks the GUI thread. Steps over one frame (16ms) are decode
+stalls. Run from the project root:
+    python benchmarks/bench_preview_scrub.py
+"""
+import os
+import sys
+import time
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+VERSIONS = 200
+IMAGE_SIZE = (2600, 2000)
+STEP_MS = 40
+FRAME_MS = 16
+RADII = [0, 8]
+
+
+def scrub(app, window, step_ms):
+    commit_list = window.left_panel.commit_list
+    timings = []
+    for commit_id in commit_list.commit_ids():
+        start = time.perf_counter()
+        commit_list.set_current_commit(commit_id)
+        timings.append((time.perf_counter() - start) * 1000)
+        # Let the event loop run, as it would between key repeats
+        end = time.perf_counter() + step_ms / 1000
+        while time.perf_counter() < end:
+            app.processEvents()
+            time.sleep(0.002)
+    return timings
+
+
+def main():
+    if "DISPLAY" not in os.environ and sys.platform.startswith("linux"):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PIL import Image, ImageDraw
+    from PySide2.QtWidgets import QApplication
+    from main import FileManager, FileManagerUI
+    app = QApplication([])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fm = FileManager(os.path.join(tmp, "repo"))
+        source = os.path.join(tmp, "artwork.png")
+        for i in range(VERSIONS):
+            image = Image.effect_noise(IMAGE_SIZE, 30 + i % 50).convert("RGB")
+            ImageDraw.Draw(image).rectangle((i * 10, 100, i * 10 + 300, 600), fill="red")
+            image.save(source, compress_level=1)
+            fm.save(source, f"Version {i}")
+        fm.render_pending_thumbnails()
+
+        for radius in RADII:
+            fm.config["preview_prefetch"] = radius
+            window = FileManagerUI(fm)
+            window.resize(1300, 1000)
+            window.show()
+            app.processEvents()
+            timings = sorted(scrub(app, window, STEP_MS))
+            stalls = sum(1 for timing in timings if timing > FRAME_MS)
+            print(f"prefetch radius {radius}: median {statistics.median(timings):5.1f}ms, "
+                  f"p95 {timings[int(len(timings) * 0.95)]:5.1f}ms, max {timings[-1]:5.1f}ms, "
+                  f"{stalls} of {len(timings)} steps over {FRAME_MS}ms")
+            window.prefetcher.shutdown()
+            window.thumbnail_service.shutdown()
+            window.hide()
+        fm.close()
+
+
+if __name__ == "__main__":
+    main()
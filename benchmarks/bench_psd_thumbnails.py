@@ -0,0 +1,131 @@
+"""PSD thumbnail time and peak memory: stored previews vs. compositing layers.
+
+Builds layered PSDs of several sizes with psd_tools, plus copies with an
+embedded JPEG thumbnail and copies whose version info says no flattened image
+was saved (as Photoshop does without "Maximize Compatibility"). Each
+thumbnail is rendered in a fresh interpreter, so the reported peak memory
+(growth of the resident set high-water mark over the imports, read from
+/proc, so Linux only) belongs to that render alone. Run from the project root:
+    python benchmarks/bench_psd_thumbnails.py
+"""
+import io
+import os
+import sys
+import json
+import struct
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.psd_preview import HEADER_SIZE, THUMBNAIL_RESOURCE, VERSION_INFO_RESOURCE
+
+# (width, height, layers)
+CORPUS = [(1500, 1000, 4), (3000, 2000, 12), (4000, 3000, 16)]
+EMBEDDED_THUMBNAIL_SIZE = 160
+
+RENDER = """
+import sys, time, json
+import PIL.Image, psd_tools
+from core.formats import handler_for
+from core.thumbnails import THUMBNAIL_SIZE
+
+def peak_kb():
+    # Unlike ru_maxrss, VmHWM starts over at exec instead of carrying the parent's peak
+    with open("/proc/self/status") as f:
+        return int(f.read().split("VmHWM:")[1].split()[0])
+
+before = peak_kb()
+start = time.perf_counter()
+handler_for(".psd").thumbnail(sys.argv[1], THUMBNAIL_SIZE, full_quality=sys.argv[2] == "1")
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "peak_kb": peak_kb() - before}))
+"""
+
+
+def build_psd(path, width, height, layers):
+    from PIL import Image
+    from psd_tools import PSDImage
+    from psd_tools.api.layers import PixelLayer
+    psd = PSDImage.new("RGB", (width, height))
+    background = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    psd.append(PixelLayer.frompil(background, psd, "Background"))
+    for i in range(1, layers):
+        # Overlapping half-canvas layers in different colours
+        layer = Image.new("RGB", (width // 2, height // 2), ((i * 67) % 256, (i * 131) % 256, (i * 29) % 256))
+        psd.append(PixelLayer.frompil(layer, psd, f"Layer {i}",
+                                      top=(i * 97) % (height // 2), left=(i * 151) % (width // 2)))
+    psd.save(path)
+
+
+def _resources_section(data):
+    """Offset and length of the image resources section's contents"""
+    (color_mode_length,) = struct.unpack_from(">I", data, HEADER_SIZE)
+    offset = HEADER_SIZE + 4 + color_mode_length
+    (length,) = struct.unpack_from(">I", data, offset)
+    return offset + 4, length
+
+
+def with_embedded_thumbnail(data):
+    """A copy of a PSD with a JPEG thumbnail resource added"""
+    from psd_tools import PSDImage
+    image = PSDImage.open(io.BytesIO(data)).topil().convert("RGB")
+    image.thumbnail((EMBEDDED_THUMBNAIL_SIZE, EMBEDDED_THUMBNAIL_SIZE))
+    jpeg = io.BytesIO()
+    image.save(jpeg, "JPEG")
+    jpeg = jpeg.getvalue()
+    row_bytes = (image.width * 24 + 31) // 32 * 4
+    payload = struct.pack(">6I2H", 1, image.width, image.height, row_bytes,
+                          row_bytes * image.height, len(jpeg), 24, 1) + jpeg
+    block = b"8BIM" + struct.pack(">H", THUMBNAIL_RESOURCE) + b"\0\0" + struct.pack(">I", len(payload)) + payload
+    if len(payload) % 2:
+        block += b"\0"
+    start, length = _resources_section(data)
+    end = start + length
+    return data[:start - 4] + struct.pack(">I", length + len(block)) + data[start:end] + block + data[end:]
+
+
+def without_merged_image(data):
+    """A copy of a PSD whose version info says no flattened image was saved"""
+    start, length = _resources_section(data)
+    marker = b"8BIM" + struct.pack(">H", VERSION_INFO_RESOURCE)
+    offset = data.index(marker, start, start + length)
+    # Empty name (2 bytes) and size (4 bytes), then the version and the flag
+    flag = offset + len(marker) + 2 + 4 + 4
+    return data[:flag] + b"\0" + data[flag + 1:]
+
+
+def render(path, full_quality):
+    output = subprocess.run([sys.executable, "-c", RENDER, path, "1" if full_quality else "0"],
+                            cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'file':<46}{'preview':>10}{'composite':>11}{'preview mem':>13}{'composite mem':>15}")
+        for width, height, layers in CORPUS:
+            base = os.path.join(tmp, f"{width}x{height}_{layers}.psd")
+            build_psd(base, width, height, layers)
+            with open(base, "rb") as f:
+                data = f.read()
+            variants = {
+                "merged": data,
+                "merged + thumbnail": with_embedded_thumbnail(data),
+                "no merged": without_merged_image(data),
+                "no merged + thumbnail": without_merged_image(with_embedded_thumbnail(data)),
+            }
+            for variant, content in variants.items():
+                path = os.path.join(tmp, "variant.psd")
+                with open(path, "wb") as f:
+                    f.write(content)
+                fast = render(path, False)
+                full = render(path, True)
+                label = f"{width}x{height}, {layers} layers, {variant}"
+                print(f"{label:<46}{fast['seconds'] * 1000:8.0f}ms{full['seconds'] * 1000:9.0f}ms"
+                      f"{fast['peak_kb'] / 1024:11.0f}MB{full['peak_kb'] / 1024:13.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark for commit search through the inverted index.
+
+Compares SearchIndex prefix queries against the substring scan over every
+message and note that the search box used before. Run from the project root:
+    python benchmarks/bench_search.py
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.search_index import SearchIndex
+
+SIZES = [1000, 10000, 100000]
+QUERIES = ["logo", "lay", "final header", "2024-03", "v12"]
+WORDS = ["logo", "layout", "header", "footer", "final", "draft", "color", "fix",
+         "banner", "review", "client", "approved", "typography", "spacing"]
+
+
+def make_saves(count):
+    saves = []
+    for i in range(count):
+        words = random.sample(WORDS, 3)
+        saves.append({
+            "id": i,
+            "message": f"Auto-commit: {words[0]}_v{i % 50}.psd modified at 2024-{i % 12 + 1:02d}-01 12:00:00",
+            "note": " ".join(words[1:]) if i % 5 == 0 else ""
+        })
+    return saves
+
+
+def scan(saves, query):
+    """The substring scan every search used before the index existed"""
+    words = query.lower().split()
+    return [save["id"] for save in saves
+            if any(word in save["message"].lower() or word in save["note"].lower() for word in words)]
+
+
+def time_ms(func, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    print(f"{'commits':>8} {'build (ms)':>11} {'query (ms)':>11} {'scan (ms)':>10}   (query and scan averaged over {len(QUERIES)} queries)")
+    for size in SIZES:
+        saves = make_saves(size)
+        index = SearchIndex()
+        build = time_ms(lambda: index.build(saves), repeat=1)
+        index.search("warmup")
+        query = sum(time_ms(lambda: index.search(q)) for q in QUERIES) / len(QUERIES)
+        linear = sum(time_ms(lambda: scan(saves, q), repeat=1) for q in QUERIES) / len(QUERIES)
+        print(f"{size:>8} {build:>11.1f} {query:>11.2f} {linear:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Cold-launch time of the GUI, up to the first shown window.
+
+Each run starts a fresh interpreter that imports main, opens an empty
+repository, shows the window and processes one round of events. It also
+lists which format libraries were loaded by then. With the lazy format
+registry psd_tools and PyMuPDF should not be; Qt itself pulls in numpy. Run from the project root:
+    python benchmarks/bench_startup.py
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+FORMAT_LIBRARIES = ["PIL.Image", "psd_tools", "fitz", "pymupdf", "numpy"]
+
+LAUNCH = """
+import sys, time, json
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from PySide2.QtWidgets import QApplication
+app = QApplication([])
+fm = main.FileManager(sys.argv[1])
+window = main.FileManagerUI(fm)
+window.show()
+app.processEvents()
+shown = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "window": shown - start,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+window.close()
+fm.close()
+""" % FORMAT_LIBRARIES
+
+
+def launch(repo_path):
+    env = dict(os.environ)
+    if "DISPLAY" not in env and sys.platform.startswith("linux"):
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", LAUNCH, repo_path], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    total = time.perf_counter() - start
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process"] = total
+    return result
+
+
+def main():
+    with tempfile.TemporaryDirectory() as repo_path:
+        launch(repo_path)  # warm the OS file cache so runs are comparable
+        runs = [launch(repo_path) for _ in range(RUNS)]
+
+    def median_ms(key):
+        return statistics.median(run[key] for run in runs) * 1000
+
+    print(f"import main:           {median_ms('import'):7.0f}ms")
+    print(f"window shown:          {median_ms('window'):7.0f}ms")
+    print(f"whole process:         {median_ms('process'):7.0f}ms")
+    print(f"format libraries loaded at first window: {', '.join(runs[-1]['loaded']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Microbenchmark for the polling watcher backend's CPU cost.
+
+Builds trees of watched files spread over directories of 100, then times
+full polling passes (CPU time of this thread, so disk waits do not count).
+Run from the project root:
+    python benchmarks/bench_watch_polling.py
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.poll_watcher import PollingWatcher
+
+SIZES = [1000, 10000, 50000]
+FILES_PER_DIR = 100
+PASSES = 5
+EXTENSIONS = [".psd", ".png"]
+
+
+def build_tree(root, count):
+    for i in range(count):
+        directory = os.path.join(root, f"dir{i // FILES_PER_DIR:04d}")
+        if i % FILES_PER_DIR == 0:
+            os.makedirs(directory)
+        with open(os.path.join(directory, f"file{i:06d}.psd"), "wb") as f:
+            f.write(b"x")
+        # Files the watcher has to list but not track
+        if i % 10 == 0:
+            open(os.path.join(directory, f"notes{i:06d}.txt"), "wb").close()
+
+
+def full_pass(watcher):
+    changed = []
+    while True:
+        found, delay = watcher.step()
+        changed.extend(found)
+        if delay:
+            return changed
+
+
+def main():
+    print(f"{'files':>8} {'baseline scan':>14} {'quiet pass':>11} {'per 10k files':>14} "
+          f"{'next wait':>10} {'changes found':>14}")
+    for size in SIZES:
+        with tempfile.TemporaryDirectory() as root:
+            build_tree(root, size)
+            watcher = PollingWatcher(EXTENSIONS)
+
+            start = time.thread_time()
+            watcher.add_tree(root)
+            # The first steps list the new tree
+            full_pass(watcher)
+            baseline = time.thread_time() - start
+
+            costs = []
+            for _ in range(PASSES):
+                start = time.thread_time()
+                full_pass(watcher)
+                costs.append(time.thread_time() - start)
+            quiet = min(costs)
+            wait = watcher._next_interval()
+
+            # Touch a few files and make sure exactly those are reported
+            touched = [os.path.join(root, f"dir{i // FILES_PER_DIR:04d}", f"file{i:06d}.psd")
+                       for i in range(0, size, size // 5)]
+            for path in touched:
+                with open(path, "ab") as f:
+                    f.write(b"y")
+            changed = full_pass(watcher)
+            assert sorted(changed) == sorted(touched), (len(changed), len(touched))
+
+            print(f"{size:>8} {baseline * 1000:>12.1f}ms {quiet * 1000:>9.1f}ms "
+                  f"{quiet / size * 10000 * 1000:>12.1f}ms {wait:>9.1f}s {len(changed):>14}")
+
+
+if __name__ == "__main__":
+    main()
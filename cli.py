@@ -0,0 +1,153 @@
+"""Command-line access to a Snapshot repository, without Qt or a display.
+
+    python cli.py commit design.psd -m "New header"
+    python cli.py log -n 20
+    python cli.py export 42 ~/Desktop/
+    python cli.py search header --from 2024-01-01 --type .psd
+    python cli.py gc --dry-run
+
+Every command takes --repo to use a repository other than the GUI's default.
+"""
+import os
+import sys
+import argparse
+from datetime import date, datetime
+from core.file_manager import FileManager, DEFAULT_REPO_PATH, GC_GRACE_PERIOD
+
+
+def cmd_commit(fm, args):
+    exit_code = 0
+    for file_path in args.files:
+        try:
+            fm.check_source(file_path)
+            message = args.message or f"Commit: {os.path.basename(file_path)} at {datetime.now():%Y-%m-%d %H:%M:%S}"
+            if args.if_changed:
+                version = fm.store_version_if_changed(file_path, fm.latest_source_version(file_path))
+                if version is None:
+                    print(f"{file_path}: unchanged, skipped")
+                    continue
+            else:
+                version = fm.store_version(file_path)
+            save = fm.record_save(fm.reserve_save_id(), version, message, args.branch)
+            print(f"{file_path}: committed as {save['id']}")
+        except (OSError, ValueError) as e:
+            print(f"{file_path}: {e}", file=sys.stderr)
+            exit_code = 1
+    if args.thumbnails:
+        fm.render_pending_thumbnails()
+    return exit_code
+
+
+def cmd_log(fm, args):
+    history = fm.get_commit_history(args.branch)
+    if args.limit:
+        history = history[-args.limit:]
+    for save in reversed(history):
+        print(f"{save['id']:>6}  {save['timestamp']}  {fm.get_version_filename(save['id'])}  {save['message']}")
+        if args.notes and save.get("note"):
+            for line in save["note"].splitlines():
+                print(f"{'':>8}{line}")
+    return 0
+
+
+def cmd_export(fm, args):
+    filename = fm.get_version_filename(args.id)
+    if filename is None:
+        print(f"Commit {args.id} not found", file=sys.stderr)
+        return 1
+    dest_path = args.dest
+    if os.path.isdir(dest_path):
+        dest_path = os.path.join(dest_path, filename)
+    try:
+        fm.export_version(args.id, dest_path)
+    except OSError as e:
+        print(f"Failed to export commit {args.id}: {e}", file=sys.stderr)
+        return 1
+    print(dest_path)
+    return 0
+
+
+def cmd_search(fm, args):
+    if args.regex or args.date_from or args.date_to or args.type:
+        from core.query_engine import CommitQuery
+        file_type = args.type
+        if file_type and not file_type.startswith("."):
+            file_type = "." + file_type
+        query = CommitQuery(args.query, use_regex=args.regex, date_from=args.date_from,
+                            date_to=args.date_to, file_type=file_type)
+        if query.invalid:
+            print(f"Invalid regular expression: {args.query}", file=sys.stderr)
+            return 1
+        matches = fm.query_commits(query)
+    else:
+        matches = fm.search_commits(args.query, match_all=not args.any)
+    for save_id in matches:
+        save = fm.get_commit(save_id)
+        print(f"{save_id:>6}  {save['timestamp']}  {fm.get_version_filename(save_id)}  {save['message']}")
+    return 0 if matches else 1
+
+
+def cmd_gc(fm, args):
+    stats = fm.gc(dry_run=args.dry_run, grace_period=args.grace)
+    verb = "Would remove" if args.dry_run else "Removed"
+    print(f"{verb} {stats['objects']} objects, {stats['manifests']} manifests and "
+          f"{stats['temp_files']} temp files ({stats['bytes'] / (1024 * 1024):.1f} MB)")
+    if stats["refs_fixed"]:
+        print(f"{'Would fix' if args.dry_run else 'Fixed'} {stats['refs_fixed']} reference counts")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="snapshot", description="Snapshot version history from the command line")
+    parser.add_argument("--repo", default=DEFAULT_REPO_PATH, help=f"repository path (default {DEFAULT_REPO_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commit = commands.add_parser("commit", help="commit one or more files")
+    commit.add_argument("files", nargs="+")
+    commit.add_argument("-m", "--message")
+    commit.add_argument("--branch", default="main")
+    commit.add_argument("--if-changed", action="store_true",
+                        help="skip files whose content matches their latest commit")
+    commit.add_argument("--thumbnails", action="store_true",
+                        help="render thumbnails now instead of leaving them for the GUI")
+    commit.set_defaults(func=cmd_commit)
+
+    log = commands.add_parser("log", help="list commits, newest first")
+    log.add_argument("-n", "--limit", type=int, default=0)
+    log.add_argument("--branch", default="main")
+    log.add_argument("--notes", action="store_true", help="show notes under each commit")
+    log.set_defaults(func=cmd_log)
+
+    export = commands.add_parser("export", help="write a version to a file or directory")
+    export.add_argument("id", type=int)
+    export.add_argument("dest")
+    export.set_defaults(func=cmd_export)
+
+    search = commands.add_parser("search", help="find commits by message or note")
+    search.add_argument("query", nargs="?", default="")
+    search.add_argument("--any", action="store_true", help="match any word instead of all")
+    search.add_argument("--regex", action="store_true", help="treat the query as a regular expression")
+    search.add_argument("--from", dest="date_from", type=date.fromisoformat, metavar="YYYY-MM-DD")
+    search.add_argument("--to", dest="date_to", type=date.fromisoformat, metavar="YYYY-MM-DD")
+    search.add_argument("--type", help="file extension, e.g. .psd")
+    search.set_defaults(func=cmd_search)
+
+    gc = commands.add_parser("gc", help="remove stored content no commit uses")
+    gc.add_argument("--dry-run", action="store_true")
+    gc.add_argument("--grace", type=float, default=GC_GRACE_PERIOD,
+                    help=f"keep files written in the last N seconds (default {GC_GRACE_PERIOD})")
+    gc.set_defaults(func=cmd_gc)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    fm = FileManager(args.repo)
+    try:
+        return args.func(fm, args)
+    finally:
+        fm.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+from .object_store import ObjectStore, hash_file
@@ -0,0 +1,99 @@
+import io
+import hashlib
+
+MIN_CHUNK_SIZE = 128 * 1024
+AVG_CHUNK_SIZE = 512 * 1024
+MAX_CHUNK_SIZE = 2 * 1024 * 1024
+WINDOW_SIZE = 64
+READ_SIZE = 8 * 1024 * 1024
+
+_gear_table = None
+
+
+def _get_gear_table():
+    """Fixed per-byte table so chunk boundaries are identical across runs and machines.
+
+    Sums wrap modulo 2**32, which leaves the masked low bits exact. Built on
+    first use so reading chunked versions does not need numpy.
+    """
+    global _gear_table
+    if _gear_table is None:
+        import numpy as np
+        _gear_table = np.array(
+            [int.from_bytes(hashlib.sha256(bytes([i])).digest()[:4], "little") for i in range(256)],
+            dtype=np.uint32
+        )
+    return _gear_table
+
+
+def _find_cut(buf, start, end, min_size, avg_size, max_size):
+    """Return the end offset of the chunk starting at start"""
+    import numpy as np
+    gear_table = _get_gear_table()
+    region_end = min(end, start + max_size)
+    mask = np.uint32(avg_size - 1)
+
+    # Scan in avg_size steps since most chunks end well before max_size
+    cut = start + min_size
+    while cut < region_end:
+        scan_end = min(region_end, cut + avg_size)
+        offset = cut - WINDOW_SIZE - 1
+        data = np.frombuffer(buf, dtype=np.uint8, count=scan_end - offset, offset=offset)
+        sums = np.cumsum(gear_table.take(data), dtype=np.uint32)
+
+        # hashes[j] is the sum over the window that ends just before offset cut + j
+        hashes = sums[WINDOW_SIZE:] - sums[:-WINDOW_SIZE]
+        candidates = np.flatnonzero((hashes & mask) == 0)
+        if len(candidates):
+            return cut + int(candidates[0])
+        cut = scan_end + 1
+    return region_end
+
+
+def iter_chunks(f, min_size=MIN_CHUNK_SIZE, avg_size=AVG_CHUNK_SIZE, max_size=MAX_CHUNK_SIZE):
+    """Split a binary stream into content-defined chunks"""
+    buf = b""
+    while True:
+        block = f.read(READ_SIZE)
+        buf = buf + block if buf else block
+        start = 0
+        # Only cut once a full max-size region is buffered, or at end of file
+        while len(buf) - start >= max_size or (not block and start < len(buf)):
+            cut = _find_cut(buf, start, len(buf), min_size, avg_size, max_size)
+            yield buf[start:cut]
+            start = cut
+        buf = buf[start:]
+        if not block:
+            break
+
+
+class ChunkedReader(io.RawIOBase):
+    """Read a chunked version back as one continuous stream"""
+
+    def __init__(self, object_store, chunks):
+        super().__init__()
+        self.object_store = object_store
+        self.pending = iter(chunks)
+        self.current = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while True:
+            if self.current is None:
+                next_chunk = next(self.pending, None)
+                if next_chunk is None:
+                    return 0
+                self.current = self.object_store.open(next_chunk[0])
+            count = self.current.readinto(b)
+            if count:
+                return count
+            self.current.close()
+            self.current = None
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+            self.current = None
+        super().close()
@@ -0,0 +1,89 @@
+import os
+import time
+
+DEFAULT_STABLE_WINDOW = 1.0
+DEFAULT_MIN_INTERVAL = 5.0
+# A file that stays missing this long (e.g. deleted rather than replaced) is dropped
+MISSING_TIMEOUT = 60.0
+
+
+class CommitScheduler:
+    """Decides when a changed file is safe to commit.
+
+    Change events only mark a file as pending; nothing is dropped while a
+    commit is in flight. poll() releases a pending file once its size and
+    mtime have stayed the same for stable_window seconds, so a save that is
+    still being written is never snapshotted. Bursts of events collapse into
+    one commit per file, and a file is committed at most once per
+    min_interval seconds. The scheduler never touches Qt; the caller drives
+    poll() from a timer. Files are stat'ed through the `stat` callable, so a
+    watcher backend can supply its own (and keep its cache current).
+    """
+
+    def __init__(self, stable_window=DEFAULT_STABLE_WINDOW, min_interval=DEFAULT_MIN_INTERVAL,
+                 clock=time.monotonic, stat=None):
+        self.stable_window = stable_window
+        self.min_interval = min_interval
+        self.clock = clock
+        self.stat = stat or self._stat
+        self.pending = {}  # path -> {"stat": (size, mtime_ns) or None, "stable_since": t, "missing_since": t}
+        self.last_commit = {}  # path -> time its last commit was released
+
+    def notify(self, path):
+        """Record a change event for path"""
+        now = self.clock()
+        entry = self.pending.get(path)
+        if entry is None:
+            self.pending[path] = {"stat": self.stat(path), "stable_since": now, "missing_since": None}
+        else:
+            # Any new event restarts the stability window
+            entry["stable_since"] = now
+
+    def has_pending(self):
+        return bool(self.pending)
+
+    def poll(self):
+        """Return the pending files that are ready to commit now"""
+        now = self.clock()
+        ready = []
+        for path, entry in list(self.pending.items()):
+            stat = self.stat(path)
+            if stat is None:
+                # Editors often replace a file by renaming a temp sibling over it
+                if entry["missing_since"] is None:
+                    entry["missing_since"] = now
+                elif now - entry["missing_since"] > MISSING_TIMEOUT:
+                    del self.pending[path]
+                entry["stat"] = None
+                entry["stable_since"] = now
+                continue
+            entry["missing_since"] = None
+            if stat != entry["stat"]:
+                entry["stat"] = stat
+                entry["stable_since"] = now
+                continue
+            if now - entry["stable_since"] < self.stable_window:
+                continue
+            if now - self.last_commit.get(path, float("-inf")) < self.min_interval:
+                continue
+            del self.pending[path]
+            self.last_commit[path] = now
+            ready.append(path)
+        return ready
+
+    def forget(self, path):
+        """Stop tracking a file, e.g. when it is no longer watched"""
+        self.pending.pop(path, None)
+        self.last_commit.pop(path, None)
+
+    def clear(self):
+        self.pending.clear()
+        self.last_commit.clear()
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
@@ -0,0 +1,881 @@
+import os
+import json
+import shutil
+import bisect
+from datetime import datetime
+from .object_store import ObjectStore, hash_file, source_fingerprint, is_compressible, SAMPLE_SIZE
+from .chunking import iter_chunks, MAX_CHUNK_SIZE
+from .metadata_store import open_metadata_store
+from .versions import load_manifest, open_stored, stored_path
+from .thumbnail_queue import ThumbnailQueue
+from .search_index import SearchIndex
+from .query_engine import CommitQueryIndex
+from .formats import supported_formats
+
+# Image libraries (PIL, numpy, psd_tools, fitz) are imported inside the methods
+# that decode images, so reading and writing history stays fast to start and
+# needs neither Qt nor a display.
+
+DEFAULT_REPO_PATH = os.path.expanduser("~/design_file_manager")
+# gc leaves files younger than this alone; a commit in progress may not have recorded them yet
+GC_GRACE_PERIOD = 3600
+
+DEFAULT_CONFIG = {
+    # "whole" stores each version as one object, "chunked" splits large
+    # files into content-defined chunks so unchanged regions are shared
+    "storage_mode": "whole",
+    # None, "zlib" or "lzma"; already-compressed formats are always stored as-is
+    "compression": None,
+    "compression_level": 6,
+    # "sqlite" keeps one row per commit; "json" rewrites metadata.json on each change
+    "metadata_backend": "sqlite",
+    # Seconds a watched file's size and mtime must stay unchanged before it is
+    # auto-committed, and the minimum seconds between auto-commits of one file
+    "auto_commit_stable_window": 1.0,
+    "auto_commit_min_interval": 5.0,
+    # "native" uses OS change notifications, "polling" re-reads directory
+    # listings (for network shares and very large trees)
+    "watch_backend": "native",
+    "watch_poll_min_interval": 1.0,
+    "watch_poll_max_interval": 30.0,
+    # True composites every PSD layer for thumbnails and comparisons instead of
+    # using the flattened image Photoshop stores
+    "psd_composite": False,
+    # Memory the preview panel may use for recently shown images
+    "preview_cache_mb": 256,
+    # Versions on each side of the selected one whose previews are decoded
+    # ahead of time, and the most memory those may take
+    "preview_prefetch": 8,
+    "preview_prefetch_mb": 64
+}
+
+class FileManager:
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self.thumbnails_dir = os.path.join(repo_path, "thumbnails")
+        self.diffs_dir = os.path.join(repo_path, "diffs")
+        self.pages_dir = os.path.join(repo_path, "pages")
+        if not os.path.exists(repo_path):
+            os.makedirs(repo_path)
+        if not os.path.exists(self.thumbnails_dir):
+            os.makedirs(self.thumbnails_dir)
+        self.objects = ObjectStore(os.path.join(repo_path, "objects"))
+        self.manifests = ObjectStore(os.path.join(repo_path, "manifests"))
+        self.config_file = os.path.join(repo_path, "config.json")
+        self.config = self.load_config()
+        self.store = open_metadata_store(repo_path, self.config["metadata_backend"])
+        self.metadata = self.store.load()
+        self._build_indexes()
+        self._load_search_index()
+        self._similarity_index = None
+        self._page_counts = {}
+        self.thumbnail_queue = ThumbnailQueue(os.path.join(repo_path, "thumbnail_jobs.json"))
+        self.supported_formats = supported_formats()
+
+    def load_config(self):
+        config = dict(DEFAULT_CONFIG)
+        if os.path.exists(self.config_file):
+            with open(self.config_file, "r") as f:
+                config.update(json.load(f))
+        return config
+
+    def save_config(self):
+        with open(self.config_file, "w") as f:
+            json.dump(self.config, f, indent=4)
+
+    def set_thumbnail(self, save_id, thumbnail_path, image_hash=None):
+        """Attach a finished thumbnail and its perceptual hash to a commit and drop the queued job"""
+        self.thumbnail_queue.remove([save_id])
+        save = self._saves_by_id.get(save_id)
+        if not save:
+            # The commit was deleted while its thumbnail was rendering
+            for path in self._preview_paths(save_id):
+                if os.path.exists(path):
+                    os.remove(path)
+            shutil.rmtree(os.path.join(self.pages_dir, str(save_id)), ignore_errors=True)
+            return
+        save["thumbnail"] = thumbnail_path
+        if image_hash:
+            if self._similarity_index is not None:
+                if save.get("phash"):
+                    self._similarity_index.remove(save["phash"], save_id)
+                self._similarity_index.add(image_hash, save_id)
+            save["phash"] = image_hash
+        self.store.update_save(save)
+        self.store.commit()
+
+    def preview_path(self, save_id, side):
+        """The stored preview level to show a version side pixels across.
+
+        That is the smallest level at least side pixels across, or the
+        largest level when none is. None when the version has no preview
+        pyramid yet, e.g. when it was rendered before pyramids existed.
+        """
+        from .thumbnails import PREVIEW_LEVELS
+        paths = self._preview_paths(save_id)
+        if not os.path.exists(paths[-1]):
+            return None
+        for level, path in zip(PREVIEW_LEVELS, paths):
+            if level >= side and os.path.exists(path):
+                return path
+        return paths[-1]
+
+    def queue_preview(self, save_id):
+        """Queue a thumbnail and preview pyramid for a version that has none.
+
+        Returns the new job, or None if the version is unknown or already queued.
+        """
+        save = self._saves_by_id.get(save_id)
+        if not save or self.thumbnail_queue.get(save_id):
+            return None
+        return self.thumbnail_queue.add(save)
+
+    def _preview_paths(self, save_id):
+        """Every level of a version's preview pyramid, smallest first"""
+        from .thumbnails import PREVIEW_LEVELS, preview_level_path
+        return [preview_level_path(self.repo_path, save_id, level) for level in PREVIEW_LEVELS]
+
+    def find_similar(self, save_id, max_distance=12, limit=20):
+        """Rank other commits by how closely their image matches this one.
+
+        Returns (distance, save_id) pairs, closest first.
+        """
+        save = self._saves_by_id.get(save_id)
+        if not save:
+            return []
+        image_hash = save.get("phash") or self._hash_thumbnail(save)
+        if not image_hash:
+            return []
+        matches = self._find_similar_hash(image_hash, max_distance, limit + 1)
+        return [(distance, other) for distance, other in matches if other != save_id][:limit]
+
+    def find_similar_to_file(self, image_path, max_distance=12, limit=20):
+        """Rank commits by how closely they match an image file, e.g. a screenshot"""
+        from PIL import Image
+        from .image_hash import phash
+        with Image.open(image_path) as image:
+            image_hash = phash(image)
+        return self._find_similar_hash(image_hash, max_distance, limit)
+
+    def _find_similar_hash(self, image_hash, max_distance, limit):
+        if self._similarity_index is None:
+            from .image_hash import MultiIndexHash
+            # Built on first use, then kept in step by set_thumbnail and deletes
+            self._similarity_index = MultiIndexHash()
+            for save in self.metadata["saves"]:
+                if save.get("phash"):
+                    self._similarity_index.add(save["phash"], save["id"])
+        return self._similarity_index.search(image_hash, max_distance)[:limit]
+
+    def _hash_thumbnail(self, save):
+        """Hash a commit rendered before hashes were recorded, from its thumbnail"""
+        thumbnail_path = save.get("thumbnail")
+        if not thumbnail_path or not os.path.exists(thumbnail_path):
+            return None
+        from PIL import Image
+        from .image_hash import phash
+        with Image.open(thumbnail_path) as image:
+            save["phash"] = phash(image)
+        self.store.update_save(save)
+        self.store.commit()
+        if self._similarity_index is not None:
+            self._similarity_index.add(save["phash"], save["id"])
+        return save["phash"]
+
+    def render_pending_thumbnails(self):
+        """Render queued thumbnails in this process, for use without the GUI"""
+        from .thumbnails import render_version_thumbnail
+        for job in self.thumbnail_queue.pending():
+            try:
+                thumbnail_path, image_hash = render_version_thumbnail(
+                    self.repo_path, job, self.config["psd_composite"])
+            except Exception as e:
+                print(f"Failed to generate thumbnail: {e}")
+                thumbnail_path, image_hash = None, None
+            self.set_thumbnail(job["id"], thumbnail_path, image_hash)
+
+    def check_source(self, file_path):
+        """Raise if a file cannot be committed"""
+        # Validate file format
+        if not any(file_path.lower().endswith(fmt) for fmt in self.supported_formats):
+            raise ValueError(f"Unsupported file format. Please use one of: {', '.join(self.supported_formats)}")
+            
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Source file not found: {file_path}")
+
+    def save(self, file_path, message, branch="main"):
+        self.check_source(file_path)
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        save_id = self.reserve_save_id()
+
+        # Store the content once; identical saves share the same object
+        try:
+            version = self.store_version(file_path)
+        except Exception as e:
+            raise IOError(f"Failed to copy file: {str(e)}")
+
+        self.record_save(save_id, version, message, branch, timestamp)
+        return save_id
+
+    # A commit runs in stages: reserve_save_id and record_save touch metadata and
+    # must stay on the thread that owns the store; store_version only writes
+    # files and may run on worker threads. Thumbnails are queued by record_save
+    # and rendered separately (see core.thumbnail_service).
+
+    def reserve_save_id(self):
+        """Allocate the id for a commit that is about to be made.
+
+        Ids come from the store, not this process's copy of the metadata,
+        since the command line may commit while the GUI has the repo open.
+        """
+        save_id = self.store.reserve_id()
+        self.metadata["next_id"] = save_id + 1
+        return save_id
+
+    def store_version(self, file_path, digest=None, fingerprint=None):
+        """Hash and store a file's content, returning what record_save needs"""
+        if fingerprint is None:
+            fingerprint = source_fingerprint(file_path)
+        if digest is None:
+            digest = hash_file(file_path)
+        return {
+            "file_path": file_path,
+            "filename": os.path.basename(file_path),
+            "digest": digest,
+            "storage": self._store_content(file_path, digest),
+            "fingerprint": fingerprint
+        }
+
+    def store_version_if_changed(self, file_path, baseline):
+        """Store a file unless it still matches baseline, the latest save of it.
+
+        Returns None when the content is unchanged. Size, mtime and a hash of the
+        file's ends rule most cases in or out before reading the whole file, and
+        the full hash is reused for storing.
+        """
+        fingerprint = source_fingerprint(file_path)
+        digest = None
+        if baseline and baseline.get("fingerprint"):
+            previous = baseline["fingerprint"]
+            if fingerprint["size"] == previous["size"]:
+                if fingerprint["mtime_ns"] == previous["mtime_ns"]:
+                    return None
+                if fingerprint["partial_hash"] == previous["partial_hash"]:
+                    digest = hash_file(file_path)
+                    if digest == baseline["object"]:
+                        return None
+        return self.store_version(file_path, digest, fingerprint)
+
+    def latest_source_version(self, file_path):
+        """The most recent save committed from a source file, or None"""
+        save_id = self._latest_by_source.get(os.path.abspath(file_path))
+        return self._saves_by_id.get(save_id) if save_id is not None else None
+
+    def record_save(self, save_id, version, message, branch="main", timestamp=None, thumbnail_path=None):
+        """Add the metadata record for stored content and return it"""
+        # Held until the record is committed, so another process cannot
+        # remove the content between taking the reference and recording it
+        self.store.begin()
+        try:
+            storage = self._ref_content(version)
+        except Exception:
+            self.store.rollback()
+            raise
+
+        # Create save data
+        save_data = {
+            "id": save_id,
+            "timestamp": timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "message": message,
+            "branch": branch,
+            "filename": version["filename"],
+            "object": version["digest"],
+            "storage": storage,
+            "thumbnail": thumbnail_path,
+            "note": "",
+            "color": None,
+            "source": os.path.abspath(version["file_path"]),
+            "fingerprint": version.get("fingerprint")
+        }
+        
+        try:
+            self.store.add_save(save_data)
+        except Exception:
+            self.store.rollback()
+            raise
+
+        # Update metadata
+        self.metadata["saves"].append(save_data)
+        self._index_save(save_data)
+        
+        self.query_index.add(save_data)
+        self.search_index.add(save_data)
+        self._bump_search_revision()
+        self.store.commit()
+        if not thumbnail_path:
+            self.thumbnail_queue.add(save_data)
+        return save_data
+
+    def get_commit_history(self, branch="main"):
+        """Get commit history for a branch"""
+        return [self._saves_by_id[save_id] for save_id in self._branch_ids.get(branch, ())]
+
+    def get_commit(self, save_id):
+        """Get the metadata record of a specific save"""
+        return self._saves_by_id.get(save_id)
+
+    def get_version_path(self, save_id):
+        """Get the file path for a specific version, or None if it is not stored as a plain file"""
+        save = self._saves_by_id.get(save_id)
+        return stored_path(self.objects, save) if save else None
+
+    def get_version_filename(self, save_id):
+        """Get the original file name of a specific version"""
+        save = self._saves_by_id.get(save_id)
+        return self._record_filename(save) if save else None
+
+    def open_version(self, save_id):
+        """Open the content of a specific version for binary reading"""
+        save = self._saves_by_id.get(save_id)
+        if not save:
+            raise FileNotFoundError(f"Version {save_id} not found")
+        return open_stored(self.objects, self.manifests, save)
+
+    def export_version(self, save_id, dest_path):
+        """Write the content of a specific version to dest_path"""
+        with self.open_version(save_id) as src, open(dest_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+
+    def previous_version(self, save_id):
+        """The newest save before save_id from the same source file, or None"""
+        save = self._saves_by_id.get(save_id)
+        if not save:
+            return None
+        ids = self._ids_by_source.get(self._source_key(save), [])
+        i = bisect.bisect_left(ids, save_id)
+        return self._saves_by_id[ids[i - 1]] if i else None
+
+    def diff_versions(self, old_id, new_id):
+        """Compare two versions pixel by pixel and return a PixelDiff.
+
+        Versions never change, so each pair is computed once and cached under
+        diffs/. Canvases larger than MAX_DIFF_SIDE are compared at a reduced
+        scale to bound memory. The result's sizes are given as (old, new).
+        """
+        from .pixel_diff import PixelDiff, diff_decoded
+        from .thumbnails import decode_version
+        # The cache holds each pair once, compared oldest id first
+        ids = sorted((old_id, new_id))
+        cache_path = self._diff_cache_path(old_id, new_id)
+        result = None
+        if os.path.exists(cache_path):
+            try:
+                result = PixelDiff.load(cache_path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring unreadable diff cache {cache_path}: {e}")
+
+        if result is None:
+            saves = [self._saves_by_id.get(save_id) for save_id in ids]
+            for save_id, save in zip(ids, saves):
+                if save is None:
+                    raise FileNotFoundError(f"Version {save_id} not found")
+            result = diff_decoded([
+                lambda save=save: decode_version(self.objects, self.manifests, save, self.config["psd_composite"])
+                for save in saves
+            ])
+
+            os.makedirs(self.diffs_dir, exist_ok=True)
+            temp_path = cache_path + ".tmp"
+            result.save(temp_path)
+            os.replace(temp_path, cache_path)
+        return result if ids[0] == old_id else result.swapped()
+
+    def _diff_cache_path(self, old_id, new_id):
+        # The comparison is symmetric, so both orders share one file
+        first, second = sorted((old_id, new_id))
+        return os.path.join(self.diffs_dir, f"diff_{first}_{second}.npz")
+
+    def _diff_cache_removals(self, save_ids):
+        """Removals for cached diffs that involve any of the given commits"""
+        if not os.path.isdir(self.diffs_dir):
+            return []
+        removals = []
+        for name in os.listdir(self.diffs_dir):
+            parts = os.path.splitext(name)[0].split("_")
+            if len(parts) == 3 and (parts[1] in save_ids or parts[2] in save_ids):
+                removals.append((os.remove, os.path.join(self.diffs_dir, name)))
+        return removals
+
+    def page_count(self, save_id):
+        """Number of pages in a version (frames, for animated images)"""
+        if save_id not in self._page_counts:
+            from .formats import handler_for
+            from .thumbnails import version_source
+            save = self._saves_by_id.get(save_id)
+            if save is None:
+                raise FileNotFoundError(f"Version {save_id} not found")
+            handler = handler_for(self._record_filename(save))
+            if handler is None:
+                return 1
+            self._page_counts[save_id] = handler.page_count(version_source(self.objects, self.manifests, save))
+        return self._page_counts[save_id]
+
+    def page_thumbnail(self, save_id, page):
+        """Path of a page's thumbnail, or None if it has not been rendered yet"""
+        from .thumbnails import page_path, THUMBNAIL_SIZE
+        if page == 0:
+            save = self._saves_by_id.get(save_id)
+            path = save.get("thumbnail") if save else None
+        else:
+            path = page_path(self.repo_path, save_id, page, THUMBNAIL_SIZE)
+        return path if path and os.path.exists(path) else None
+
+    def cached_page(self, save_id, page, size):
+        """Path of a page already rendered at size, or None"""
+        from .thumbnails import page_path
+        path = page_path(self.repo_path, save_id, page, size)
+        return path if os.path.exists(path) else None
+
+    def render_page(self, save_id, page, size):
+        """Render one page of a version to fit within size and return the image path.
+
+        Versions never change, so each (version, page, size) is rendered once
+        and cached under pages/.
+        """
+        from .thumbnails import render_pages, version_source
+        path = self.cached_page(save_id, page, size)
+        if path:
+            return path
+        save = self._saves_by_id.get(save_id)
+        if save is None:
+            raise FileNotFoundError(f"Version {save_id} not found")
+        ext = os.path.splitext(self._record_filename(save))[1].lower()
+        source = version_source(self.objects, self.manifests, save)
+        return render_pages(self.repo_path, save_id, source, ext, [page], size)[0]
+
+    def _build_indexes(self):
+        """Index commits by id and by branch so lookups stay constant-time"""
+        self._saves_by_id = {}
+        # Dicts keep insertion order, so each branch lists its ids oldest first
+        self._branch_ids = {"main": {}}
+        self._latest_by_source = {}  # absolute source path -> id of its newest save
+        self._ids_by_source = {}  # source path, or file name without one -> sorted ids of its saves
+        self.query_index = CommitQueryIndex()
+        for save in self.metadata["saves"]:
+            self._index_save(save)
+            self.query_index.add(save)
+
+    def _index_save(self, save):
+        self._saves_by_id[save["id"]] = save
+        self._branch_ids.setdefault(save["branch"], {})[save["id"]] = None
+        if save.get("source"):
+            latest = self._latest_by_source.get(save["source"])
+            if latest is None or save["id"] > latest:
+                self._latest_by_source[save["source"]] = save["id"]
+        bisect.insort(self._ids_by_source.setdefault(self._source_key(save), []), save["id"])
+
+    def _unindex_save(self, save):
+        self._saves_by_id.pop(save["id"], None)
+        self._branch_ids.get(save["branch"], {}).pop(save["id"], None)
+        ids = self._ids_by_source.get(self._source_key(save), [])
+        i = bisect.bisect_left(ids, save["id"])
+        if i < len(ids) and ids[i] == save["id"]:
+            del ids[i]
+        if save.get("source") and self._latest_by_source.get(save["source"]) == save["id"]:
+            del self._latest_by_source[save["source"]]
+
+    def _reindex_sources(self, sources):
+        """Point each source back at its newest remaining save after deletes"""
+        for save in self.metadata["saves"]:
+            if save.get("source") in sources:
+                latest = self._latest_by_source.get(save["source"])
+                if latest is None or save["id"] > latest:
+                    self._latest_by_source[save["source"]] = save["id"]
+
+    @staticmethod
+    def _record_filename(save):
+        return save.get("filename") or os.path.basename(save.get("file", ""))
+
+    @classmethod
+    def _source_key(cls, save):
+        return save.get("source") or cls._record_filename(save)
+
+    def _store_content(self, file_path, digest):
+        """Store file content unless already present; return the storage layout.
+
+        Only writes to the object stores, never to metadata, so it is safe to
+        run off the GUI thread. References are taken later by _ref_content.
+        """
+        if self.manifests.has(digest):
+            return "chunked"
+
+        compression = self._compression_for(file_path)
+        level = self.config["compression_level"]
+
+        if (self.config["storage_mode"] == "chunked"
+                and not self.objects.has(digest)
+                and os.path.getsize(file_path) > MAX_CHUNK_SIZE):
+            chunks = []
+            with open(file_path, "rb") as f:
+                for chunk in iter_chunks(f):
+                    chunk_digest = self.objects.add_bytes(chunk, compression=compression, level=level)
+                    chunks.append([chunk_digest, len(chunk)])
+            manifest = {"size": sum(size for _, size in chunks), "chunks": chunks}
+            self.manifests.add_bytes(json.dumps(manifest).encode("utf-8"), digest)
+            return "chunked"
+
+        self.objects.add_file(file_path, digest, compression, level)
+        return "whole"
+
+    def _ref_content(self, version):
+        """Take references on stored content and return its storage layout.
+
+        A delete that ran while the content was being stored may have removed
+        objects it found unreferenced; in that case the content is stored again.
+        Runs under the store's write lock, so what it finds cannot change
+        until the commit is recorded.
+        """
+        digest = version["digest"]
+        if version["storage"] == "chunked":
+            if self.store.ref_count("manifests", digest):
+                self._change_ref("manifests", digest, 1)
+                return "chunked"
+            if self.manifests.has(digest):
+                chunks = load_manifest(self.manifests, digest)["chunks"]
+                if all(self.objects.has(chunk_digest) for chunk_digest, _ in chunks):
+                    self._change_ref("manifests", digest, 1)
+                    for chunk_digest, _ in chunks:
+                        self._change_ref("objects", chunk_digest, 1)
+                    return "chunked"
+        elif self.objects.has(digest):
+            self._change_ref("objects", digest, 1)
+            return "whole"
+
+        if hash_file(version["file_path"]) != digest:
+            raise IOError(f"Source file changed while it was being committed: {version['file_path']}")
+        if version["storage"] == "chunked":
+            # The manifest may point at chunks that are gone; rebuild it
+            self.manifests.remove(digest)
+        version = dict(version, storage=self._store_content(version["file_path"], digest))
+        return self._ref_content(version)
+
+    def _compression_for(self, file_path):
+        """Pick the configured codec unless the file is already compressed"""
+        compression = self.config["compression"]
+        if not compression:
+            return None
+        with open(file_path, "rb") as f:
+            sample = f.read(SAMPLE_SIZE)
+        return compression if is_compressible(sample) else None
+
+    def _change_ref(self, kind, digest, delta):
+        """Adjust the reference count of an object or manifest and return it.
+
+        The count is changed in the store, where other processes see it, and
+        the store's answer is what counts.
+        """
+        refs = self.store.change_ref(kind, digest, delta)
+        self._cache_ref(kind, digest, refs)
+        return refs
+
+    def _cache_ref(self, kind, digest, refs):
+        if refs > 0:
+            self.metadata[kind][digest] = refs
+        else:
+            self.metadata[kind].pop(digest, None)
+
+    def _release_content(self, save, unused):
+        """Drop one reference to a version's content, noting (kind, digest) of
+        content that is left unreferenced"""
+        digest = save["object"]
+        if save.get("storage") != "chunked":
+            self._release_object(digest, unused)
+            return
+
+        if self._change_ref("manifests", digest, -1) > 0:
+            return
+        if self.manifests.has(digest):
+            for chunk_digest, _ in load_manifest(self.manifests, digest)["chunks"]:
+                self._release_object(chunk_digest, unused)
+            unused.append(("manifests", digest))
+
+    def _release_object(self, digest, unused):
+        """Drop one reference to an object, noting it when unreferenced"""
+        if self._change_ref("objects", digest, -1) <= 0:
+            unused.append(("objects", digest))
+
+    def _content_removals(self, unused):
+        """Removals for the noted content that is still unreferenced.
+
+        Call under the store's write lock: another process may have committed
+        the same content since it was released, and must not lose it.
+        """
+        stores = {"objects": self.objects, "manifests": self.manifests}
+        return [(stores[kind].remove, digest) for kind, digest in dict.fromkeys(unused)
+                if self.store.ref_count(kind, digest) <= 0]
+
+    def delete_commit(self, save_id):
+        """Delete a commit and its associated files"""
+        return self.delete_commits([save_id]) == 1
+
+    def delete_commits(self, save_ids, progress=None):
+        """Delete several commits with a single metadata write.
+
+        progress, if given, is called as progress(done, total) while files are removed.
+        Returns the number of commits deleted.
+        """
+        commits = [self._saves_by_id[save_id] for save_id in dict.fromkeys(save_ids)
+                   if save_id in self._saves_by_id]
+        if not commits:
+            return 0
+
+        removals = []
+        unused = []
+        deleted = {commit["id"] for commit in commits}
+        # Reference counts are cached as they change, and the JSON store writes
+        # the saves list itself; both are kept to undo a failed delete
+        cached_refs = {kind: dict(self.metadata[kind]) for kind in ("objects", "manifests")}
+        saves = self.metadata["saves"]
+        try:
+            for commit in commits:
+                if commit.get("object"):
+                    # Only remove the content once no other commit uses it
+                    self._release_content(commit, unused)
+                else:
+                    # Older repos keep each version in its own directory
+                    removals.append((shutil.rmtree, os.path.dirname(commit["file"])))
+                if commit.get("thumbnail"):
+                    removals.append((os.remove, commit["thumbnail"]))
+                removals.extend((os.remove, path) for path in self._preview_paths(commit["id"])[1:])
+            self.metadata["saves"] = [save for save in saves if save["id"] not in deleted]
+            self.store.delete_saves(deleted)
+            revision = self.store.increment("search_revision")
+            self.store.commit()
+        except Exception as e:
+            self.store.rollback()
+            self.metadata.update(cached_refs, saves=saves)
+            print(f"Error deleting commits: {e}")
+            return 0
+
+        # The in-memory state only changes once the store has the delete
+        for commit in commits:
+            self._unindex_save(commit)
+        self._reindex_sources({commit["source"] for commit in commits if commit.get("source")})
+        self.query_index.remove_many(commits)
+        if self._similarity_index is not None:
+            for commit in commits:
+                if commit.get("phash"):
+                    self._similarity_index.remove(commit["phash"], commit["id"])
+        for save_id in deleted:
+            self.search_index.remove(save_id)
+        self._note_search_revision(revision)
+        self.thumbnail_queue.remove(deleted)
+        removals.extend(self._diff_cache_removals({str(save_id) for save_id in deleted}))
+        for save_id in deleted:
+            self._page_counts.pop(save_id, None)
+            removals.append((shutil.rmtree, os.path.join(self.pages_dir, str(save_id))))
+
+        # Files go last, once no metadata points at them. Stored content is
+        # checked and removed under the store's write lock
+        self.store.begin()
+        try:
+            removals.extend(self._content_removals(unused))
+            self._remove_files(removals, progress)
+        finally:
+            self.store.commit()
+        return len(commits)
+
+    def _remove_files(self, removals, progress=None):
+        """Run queued file removals in parallel, reporting progress as they finish"""
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        def remove(func, path):
+            try:
+                func(path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"Failed to remove {path}: {e}")
+
+        total = len(removals)
+        if progress:
+            progress(0, total)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [executor.submit(remove, func, path) for func, path in removals]
+            for done, _ in enumerate(as_completed(futures), 1):
+                if progress:
+                    progress(done, total)
+
+    def gc(self, dry_run=False, grace_period=GC_GRACE_PERIOD):
+        """Remove stored content that no commit uses and repair reference counts.
+
+        Orphans are objects and manifests on disk that no commit refers to,
+        e.g. left by a crash between storing a version and recording it, or
+        chunks of a manifest that is no longer referenced. Files written
+        within grace_period seconds are kept, since a running commit may not
+        have recorded them yet. Returns counts of what was (or, with dry_run,
+        would be) removed.
+
+        Runs under the store's write lock and reads the commits from the
+        store, so commits made by other processes are accounted for.
+        """
+        self.store.begin()
+        try:
+            stats, removals = self._collect_garbage(dry_run, grace_period)
+            if not dry_run:
+                self._remove_files(removals)
+        except Exception:
+            self.store.rollback()
+            raise
+        if dry_run:
+            self.store.rollback()
+        else:
+            self.store.commit()
+        return stats
+
+    def _collect_garbage(self, dry_run, grace_period):
+        # Reference counts as they should be, from the commits themselves
+        expected = {"objects": {}, "manifests": {}}
+        for save in self.store.saves():
+            if not save.get("object"):
+                continue
+            kind = "manifests" if save.get("storage") == "chunked" else "objects"
+            expected[kind][save["object"]] = expected[kind].get(save["object"], 0) + 1
+        for digest in expected["manifests"]:
+            if not self.manifests.has(digest):
+                continue
+            for chunk_digest, _ in load_manifest(self.manifests, digest)["chunks"]:
+                expected["objects"][chunk_digest] = expected["objects"].get(chunk_digest, 0) + 1
+
+        stats = {"objects": 0, "manifests": 0, "temp_files": 0, "bytes": 0, "refs_fixed": 0}
+        cutoff = datetime.now().timestamp() - grace_period
+        removals = []
+        for kind, store in (("manifests", self.manifests), ("objects", self.objects)):
+            for digest, path, size, mtime in store.iter_files():
+                if mtime > cutoff:
+                    continue
+                if digest is None:
+                    stats["temp_files"] += 1
+                    removals.append((os.remove, path))
+                elif digest not in expected[kind]:
+                    stats[kind] += 1
+                    removals.append((store.remove, digest))
+                else:
+                    continue
+                stats["bytes"] += size
+
+            current = self.store.refs(kind)
+            for digest in set(current) | set(expected[kind]):
+                refs = expected[kind].get(digest, 0)
+                if current.get(digest, 0) != refs:
+                    stats["refs_fixed"] += 1
+                    if not dry_run:
+                        self.store.set_ref(kind, digest, refs)
+                        self._cache_ref(kind, digest, refs)
+        return stats, removals
+
+    def get_commit_message(self, save_id):
+        """Get commit message for a specific save"""
+        save = self._saves_by_id.get(save_id)
+        return save.get("message", "") if save else ""
+
+    def get_commit_note(self, save_id):
+        """Get commit note for a specific save"""
+        save = self._saves_by_id.get(save_id)
+        return save.get("note", "") if save else ""
+
+    def update_commit(self, save_id, message=None, color=None, note=None):
+        """Update commit metadata"""
+        save = self._saves_by_id.get(save_id)
+        if not save:
+            return
+        if message is not None:
+            save["message"] = message
+        if color is not None:
+            save["color"] = color
+        if note is not None:
+            save["note"] = note
+        self.store.update_save(save)
+        if message is not None or note is not None:
+            self.search_index.add(save)
+            self._bump_search_revision()
+        self.store.commit()
+
+    def search_commits(self, query, match_all=False):
+        """Return the ids of commits whose message or note has a word starting with
+        any (or, with match_all, every) word of the query, oldest first"""
+        return sorted(self.search_index.search(query, match_all))
+
+    def query_commits(self, query, is_cancelled=None):
+        """Run a compiled CommitQuery and return the matching ids, oldest first.
+
+        Returns None if is_cancelled() turned true before the query finished.
+        """
+        candidates = self.query_candidates(query)
+        if not query.needs_scan():
+            return sorted(candidates)
+        return query.scan(self.query_records(candidates), is_cancelled)
+
+    def query_candidates(self, query):
+        """Ids passing a query's indexed filters (dates, file type, words)"""
+        return query.candidates(self.query_index, self.search_index)
+
+    def query_records(self, save_ids):
+        """Snapshot (id, message, note) records a query can scan off the GUI thread"""
+        return [(save_id, self._saves_by_id[save_id]["message"], self._saves_by_id[save_id].get("note", ""))
+                for save_id in sorted(save_ids) if save_id in self._saves_by_id]
+
+    def commit_matches(self, save_id, query, match_all=False):
+        """Check a single commit against a search query"""
+        return self.search_index.matches(save_id, query, match_all)
+
+    def _load_search_index(self):
+        """Load the saved search index, rebuilding it if it missed any change"""
+        self.search_index_file = os.path.join(self.repo_path, "search_index.json")
+        self.search_index = SearchIndex()
+        revision = self.metadata.get("search_revision", 0)
+        self._search_index_dirty = not self.search_index.load(self.search_index_file, revision)
+        if self._search_index_dirty:
+            self.search_index.build(self.metadata["saves"])
+        # The revision the in-memory index reflects, or None once another
+        # process has changed commits this one has not indexed
+        self._search_synced = revision
+
+    def _bump_search_revision(self):
+        # The index file is only written on close; a newer revision in the store
+        # tells the next start that the file on disk is stale
+        self._note_search_revision(self.store.increment("search_revision"))
+
+    def _note_search_revision(self, revision):
+        if self._search_synced is not None and revision == self._search_synced + 1:
+            self._search_synced = revision
+        else:
+            self._search_synced = None
+        self.metadata["search_revision"] = revision
+        self._search_index_dirty = True
+
+    def close(self):
+        """Save the search index and close the metadata store"""
+        if self._search_index_dirty:
+            # Under the write lock, so no other process bumps the revision
+            # between the check and the write
+            self.store.begin()
+            try:
+                # An index missing another process's commits is not saved;
+                # the next start rebuilds it from the store instead
+                if (self._search_synced is not None
+                        and self.store.value("search_revision", 0) == self._search_synced):
+                    self.search_index.save(self.search_index_file, self._search_synced)
+                self._search_index_dirty = False
+            except OSError as e:
+                print(f"Failed to save search index: {e}")
+            finally:
+                self.store.commit()
+        self.store.close()
+
+    def __del__(self):
+        """Cleanup when FileManager is deleted"""
+        try:
+            self.close()
+        except:
+            pass
@@ -0,0 +1,251 @@
+import os
+
+
+def fit_image(image, size):
+    """Shrink a PIL image to fit within size, as RGB or greyscale"""
+    from PIL import Image
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    image.thumbnail(size, Image.LANCZOS)
+    return image
+
+
+class FormatHandler:
+    """Reads one family of file formats.
+
+    Handlers import their decoding library inside their methods, so a format's
+    library is only loaded the first time a file of that format is opened.
+    `source` is a file path or a seekable binary file object throughout.
+    full_quality asks for a full render where a handler would otherwise use a
+    stored preview.
+    """
+
+    name = ""
+    extensions = ()
+    # Whether the preview panel can show the file itself; otherwise it shows
+    # the rendered thumbnail
+    qt_preview = False
+    # Whether the preview panel pages through the file's rendered pages
+    paged = False
+
+    def decode(self, source, full_quality=False):
+        """Decode the file (its first page, for documents) into a PIL image"""
+        from PIL import Image
+        return Image.open(source)
+
+    def page_count(self, source):
+        return 1
+
+    def thumbnail(self, source, size, full_quality=False):
+        """Decode the file and shrink it to fit within size, as an RGB image"""
+        return fit_image(self.decode(source, full_quality), size)
+
+    def render_pages(self, source, size, pages):
+        """Yield (page, image) for each page number in pages, fitted within size"""
+        for page in pages:
+            if page != 0:
+                raise ValueError(f"{self.name} files have a single page")
+            yield page, self.thumbnail(source, size)
+
+
+class RasterHandler(FormatHandler):
+    name = "Image"
+    extensions = (".png", ".jpg", ".jpeg", ".gif", ".bmp")
+    qt_preview = True
+
+    def page_count(self, source):
+        # Animated GIFs report their frames
+        from PIL import Image
+        with Image.open(source) as image:
+            return getattr(image, "n_frames", 1)
+
+    def render_pages(self, source, size, pages):
+        from PIL import Image
+        with Image.open(source) as image:
+            for page in pages:
+                image.seek(page)
+                yield page, fit_image(image.copy(), size)
+
+
+class PsdHandler(FormatHandler):
+    """Uses the previews Photoshop stores before compositing layers.
+
+    A PSD saved with "Maximize Compatibility" carries a flattened copy of the
+    image, and usually a small JPEG thumbnail too. Reading either skips the
+    layers entirely, where compositing re-renders every layer and can take
+    tens of seconds and gigabytes on complex files. Layers are composited
+    only when the file has neither preview, or when full_quality is set.
+    """
+
+    name = "Photoshop"
+    extensions = (".psd",)
+
+    def decode(self, source, full_quality=False):
+        from .psd_preview import read_preview_resources, has_merged_image
+        if not full_quality:
+            try:
+                if has_merged_image(read_preview_resources(source)):
+                    return self._merged_image(source)
+            except (OSError, ValueError, SyntaxError) as e:
+                print(f"Could not read the stored PSD image, compositing layers instead: {e}")
+        return self._composite(source)
+
+    def thumbnail(self, source, size, full_quality=False):
+        from .psd_preview import read_preview_resources, has_merged_image, embedded_thumbnail
+        if not full_quality:
+            try:
+                resources = read_preview_resources(source)
+                embedded = embedded_thumbnail(resources)
+                # The embedded JPEG is at most 160px; use it only if that is enough
+                if embedded is not None and max(embedded.size) >= max(size):
+                    return fit_image(embedded, size)
+                if has_merged_image(resources):
+                    return fit_image(self._merged_image(source), size)
+                if embedded is not None:
+                    return fit_image(embedded, size)
+            except (OSError, ValueError, SyntaxError) as e:
+                print(f"Could not read the stored PSD previews, compositing layers instead: {e}")
+        return fit_image(self._composite(source), size)
+
+    @staticmethod
+    def _merged_image(source):
+        # Pillow reads only the flattened image section and skips layer pixels
+        from PIL import Image
+        image = Image.open(source)
+        image.load()
+        return image
+
+    def _composite(self, source):
+        try:
+            from psd_tools import PSDImage
+        except ImportError:
+            # Without psd_tools the stored flattened image is all there is
+            return super().decode(source)
+        if not isinstance(source, str):
+            source.seek(0)
+        psd = PSDImage.open(source)
+        # Try different methods to get the image
+        try:
+            return psd.composite(force=True)
+        except TypeError:
+            # Older psd_tools versions have no force flag
+            return psd.composite()
+        except AttributeError:
+            try:
+                return psd.compose()
+            except AttributeError:
+                return psd.as_PIL()
+
+
+class PdfHandler(FormatHandler):
+    """Renders pages with PyMuPDF at the size they are shown at"""
+
+    name = "PDF"
+    extensions = (".pdf",)
+    paged = True
+    # Zoom for decode(), which renders a page for pixel comparison
+    DECODE_ZOOM = 2
+
+    def _open(self, source):
+        import fitz  # PyMuPDF
+        if isinstance(source, str):
+            return fitz.open(source, filetype="pdf")
+        source.seek(0)
+        return fitz.open(stream=source.read(), filetype="pdf")
+
+    @staticmethod
+    def _render(pdf_page, zoom):
+        import fitz
+        from PIL import Image
+        pix = pdf_page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        return Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+    def decode(self, source, full_quality=False):
+        pdf_document = self._open(source)
+        try:
+            return self._render(pdf_document[0], self.DECODE_ZOOM)
+        finally:
+            pdf_document.close()
+
+    def thumbnail(self, source, size, full_quality=False):
+        return next(self.render_pages(source, size, [0]))[1]
+
+    def render_pages(self, source, size, pages):
+        # Rasterize straight at the zoom that fits the page within size
+        # instead of rendering the whole page large and shrinking it
+        pdf_document = self._open(source)
+        try:
+            for page in pages:
+                if not 0 <= page < pdf_document.page_count:
+                    raise ValueError(f"Page {page + 1} is out of range")
+                pdf_page = pdf_document[page]
+                zoom = min(size[0] / pdf_page.rect.width, size[1] / pdf_page.rect.height)
+                yield page, self._render(pdf_page, zoom)
+        finally:
+            pdf_document.close()
+
+    def page_count(self, source):
+        pdf_document = self._open(source)
+        try:
+            return pdf_document.page_count
+        finally:
+            pdf_document.close()
+
+
+class IllustratorHandler(PdfHandler):
+    """Illustrator files saved with "Create PDF Compatible File" (the
+    default) are PDF documents, one page per artboard"""
+
+    name = "Illustrator"
+    extensions = (".ai",)
+
+    def _open(self, source):
+        try:
+            return super()._open(source)
+        except RuntimeError as e:
+            raise ValueError(f"Illustrator file has no PDF-compatible content: {e}")
+
+
+class SvgHandler(FormatHandler):
+    name = "SVG"
+    extensions = (".svg",)
+    qt_preview = True
+
+    def decode(self, source, full_quality=False):
+        try:
+            import cairosvg
+        except ImportError:
+            raise ValueError("Rendering SVG files needs the cairosvg package")
+        import io
+        from PIL import Image
+        if isinstance(source, str):
+            png = cairosvg.svg2png(url=source)
+        else:
+            png = cairosvg.svg2png(file_obj=source)
+        return Image.open(io.BytesIO(png))
+
+
+_handlers = []
+_by_extension = {}
+
+
+def register_handler(handler):
+    """Add a handler; a later handler for the same extension replaces the earlier one"""
+    _handlers.append(handler)
+    for ext in handler.extensions:
+        _by_extension[ext] = handler
+
+
+def handler_for(name):
+    """The handler for a file name or extension, or None if the format is unsupported"""
+    ext = os.path.splitext(name)[1] or name
+    return _by_extension.get(ext.lower())
+
+
+def supported_formats():
+    """Every extension with a handler, in registration order"""
+    return list(_by_extension)
+
+
+for _handler in (RasterHandler(), PsdHandler(), IllustratorHandler(), SvgHandler(), PdfHandler()):
+    register_handler(_handler)
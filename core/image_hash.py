@@ -0,0 +1,108 @@
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 8
+PHASH_SAMPLE = 32
+
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    return np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+
+
+_DCT = _dct_matrix(PHASH_SAMPLE)
+
+
+def phash(image):
+    """Perceptual hash of a PIL image as a 16-digit hex string.
+
+    The image is shrunk to 32x32 grey levels and its lowest 8x8 DCT
+    frequencies are compared to their median, so recompression, resizing and
+    small edits only flip a few of the 64 bits.
+    """
+    grey = image.convert("L").resize((PHASH_SAMPLE, PHASH_SAMPLE), Image.LANCZOS)
+    pixels = np.asarray(grey, dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:HASH_SIZE, :HASH_SIZE]
+    bits = (low > np.median(low)).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return f"{value:016x}"
+
+
+def hamming(a, b):
+    """Number of differing bits between two hex hashes"""
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+class MultiIndexHash:
+    """Finds hashes within a Hamming radius without comparing against all of them.
+
+    The 64-bit hash is split into four 16-bit blocks, each with its own table.
+    Two hashes within distance r must agree to within r // 4 bits on at least
+    one block, so a search only probes those nearby block values and checks
+    the few hashes it finds there.
+    """
+
+    BLOCKS = 4
+    BLOCK_BITS = 16
+
+    def __init__(self):
+        self.tables = [{} for _ in range(self.BLOCKS)]  # block value -> {hash: items}
+        self.size = 0
+        self._masks = {}
+
+    def _blocks(self, value):
+        block_mask = (1 << self.BLOCK_BITS) - 1
+        return [(value >> (i * self.BLOCK_BITS)) & block_mask for i in range(self.BLOCKS)]
+
+    def add(self, image_hash, item):
+        value = int(image_hash, 16)
+        for table, block in zip(self.tables, self._blocks(value)):
+            table.setdefault(block, {}).setdefault(value, []).append(item)
+        self.size += 1
+
+    def remove(self, image_hash, item):
+        """Drop one item stored under a hash; does nothing if it is not there"""
+        value = int(image_hash, 16)
+        removed = False
+        for table, block in zip(self.tables, self._blocks(value)):
+            items = table.get(block, {}).get(value)
+            if items and item in items:
+                items.remove(item)
+                removed = True
+                if not items:
+                    del table[block][value]
+                    if not table[block]:
+                        del table[block]
+        if removed:
+            self.size -= 1
+
+    def _flip_masks(self, bits):
+        """Every 16-bit mask with at most `bits` bits set"""
+        if bits not in self._masks:
+            masks = {0}
+            for _ in range(bits):
+                masks |= {mask | (1 << i) for mask in masks for i in range(self.BLOCK_BITS)}
+            self._masks[bits] = list(masks)
+        return self._masks[bits]
+
+    def search(self, image_hash, max_distance):
+        """Return (distance, item) pairs within max_distance, closest first"""
+        value = int(image_hash, 16)
+        masks = self._flip_masks(max_distance // self.BLOCKS)
+        candidates = set()
+        for table, block in zip(self.tables, self._blocks(value)):
+            for mask in masks:
+                bucket = table.get(block ^ mask)
+                if bucket:
+                    candidates.update(bucket)
+        found = []
+        for candidate in candidates:
+            distance = bin(value ^ candidate).count("1")
+            if distance <= max_distance:
+                items = self.tables[0][candidate & ((1 << self.BLOCK_BITS) - 1)][candidate]
+                found.extend((distance, item) for item in items)
+        found.sort(key=lambda pair: pair[0])
+        return found
@@ -0,0 +1,301 @@
+import os
+import json
+import sqlite3
+
+
+def _next_id(saves):
+    return max((save["id"] for save in saves), default=-1) + 1
+
+
+def _save_ext(save):
+    filename = save.get("filename") or os.path.basename(save.get("file", ""))
+    return os.path.splitext(filename)[1].lower()
+
+
+class JsonMetadataStore:
+    """Keeps all metadata in one JSON document, rewritten on every commit.
+
+    The FileManager mutates the dict returned by load() directly, so the
+    row-level calls are no-ops here and commit() writes the whole document.
+    Only one process may have a JSON repository open at a time.
+    """
+
+    def __init__(self, metadata_file):
+        self.metadata_file = metadata_file
+        self.metadata = None
+
+    def load(self):
+        if os.path.exists(self.metadata_file):
+            with open(self.metadata_file, "r") as f:
+                self.metadata = json.load(f)
+        else:
+            self.metadata = {"saves": [], "branches": {"main": []}}
+        self.metadata.setdefault("objects", {})
+        self.metadata.setdefault("manifests", {})
+        self.metadata.setdefault("next_id", _next_id(self.metadata["saves"]))
+        return self.metadata
+
+    def begin(self):
+        pass
+
+    def reserve_id(self):
+        save_id = self.metadata["next_id"]
+        self.metadata["next_id"] = save_id + 1
+        return save_id
+
+    def saves(self):
+        return self.metadata["saves"]
+
+    def add_save(self, save):
+        pass
+
+    def update_save(self, save):
+        pass
+
+    def delete_saves(self, save_ids):
+        pass
+
+    def refs(self, kind):
+        return dict(self.metadata[kind])
+
+    def ref_count(self, kind, digest):
+        return self.metadata[kind].get(digest, 0)
+
+    def change_ref(self, kind, digest, delta):
+        return self.ref_count(kind, digest) + delta
+
+    def set_ref(self, kind, digest, count):
+        pass
+
+    def set_value(self, key, value):
+        pass
+
+    def value(self, key, default=None):
+        return self.metadata.get(key, default)
+
+    def increment(self, key):
+        self.metadata[key] = self.metadata.get(key, 0) + 1
+        return self.metadata[key]
+
+    def commit(self):
+        # Branch lists are derived from the saves so they can never drift
+        branches = {"main": []}
+        for save in self.metadata["saves"]:
+            branches.setdefault(save["branch"], []).append(save["id"])
+        self.metadata["branches"] = branches
+        with open(self.metadata_file, "w") as f:
+            json.dump(self.metadata, f, indent=4)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SqliteMetadataStore:
+    """Stores one row per commit so edits only touch the rows they change.
+
+    Several processes (the GUI and the command line) may have a repository
+    open at once, so commit ids are handed out and reference counts changed
+    inside write transactions against the database, never from a process's
+    own copy of the metadata.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS saves (
+            id INTEGER PRIMARY KEY,
+            timestamp TEXT NOT NULL,
+            branch TEXT NOT NULL,
+            ext TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS saves_branch ON saves (branch, id);
+        CREATE INDEX IF NOT EXISTS saves_timestamp ON saves (timestamp);
+        CREATE INDEX IF NOT EXISTS saves_ext ON saves (ext);
+        CREATE TABLE IF NOT EXISTS refs (
+            kind TEXT NOT NULL,
+            digest TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (kind, digest)
+        );
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        # Another process holding the write lock (a commit or a delete
+        # removing files) is waited for rather than failed on
+        self.conn = sqlite3.connect(db_file, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+
+    def load(self):
+        saves = [json.loads(data) for (data,) in
+                 self.conn.execute("SELECT data FROM saves ORDER BY id")]
+        metadata = {"saves": saves, "objects": {}, "manifests": {}}
+        for kind, digest, count in self.conn.execute("SELECT kind, digest, count FROM refs"):
+            metadata[kind][digest] = count
+        for key, value in self.conn.execute("SELECT key, value FROM settings"):
+            metadata[key] = json.loads(value)
+        metadata.setdefault("next_id", _next_id(saves))
+        return metadata
+
+    def begin(self):
+        """Take the database's write lock until the next commit or rollback.
+
+        Other processes block here, so whatever is read after begin() stays
+        true until this process commits.
+        """
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+
+    def reserve_id(self):
+        """Allocate a commit id that no other process can also be given"""
+        self.begin()
+        try:
+            row = self.conn.execute("SELECT value FROM settings WHERE key = 'next_id'").fetchone()
+            (max_id,) = self.conn.execute("SELECT max(id) FROM saves").fetchone()
+            save_id = max(json.loads(row[0]) if row else 0, -1 if max_id is None else max_id + 1)
+            self.set_value("next_id", save_id + 1)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return save_id
+
+    def saves(self):
+        """Every save record as currently in the database"""
+        return [json.loads(data) for (data,) in self.conn.execute("SELECT data FROM saves ORDER BY id")]
+
+    def add_save(self, save):
+        # A plain insert, so an id collision fails rather than replacing a commit
+        self.conn.execute(
+            "INSERT INTO saves (id, timestamp, branch, ext, data) VALUES (?, ?, ?, ?, ?)",
+            (save["id"], save["timestamp"], save["branch"], _save_ext(save), json.dumps(save))
+        )
+
+    def update_save(self, save):
+        self.conn.execute(
+            "UPDATE saves SET timestamp = ?, branch = ?, ext = ?, data = ? WHERE id = ?",
+            (save["timestamp"], save["branch"], _save_ext(save), json.dumps(save), save["id"])
+        )
+
+    def delete_saves(self, save_ids):
+        self.conn.executemany("DELETE FROM saves WHERE id = ?", [(save_id,) for save_id in save_ids])
+
+    def refs(self, kind):
+        return dict(self.conn.execute("SELECT digest, count FROM refs WHERE kind = ?", (kind,)))
+
+    def ref_count(self, kind, digest):
+        row = self.conn.execute("SELECT count FROM refs WHERE kind = ? AND digest = ?", (kind, digest)).fetchone()
+        return row[0] if row else 0
+
+    def change_ref(self, kind, digest, delta):
+        """Add delta to a reference count in the database and return the new count"""
+        self.begin()
+        # UPDATE then INSERT rather than an upsert, which needs SQLite 3.24
+        cursor = self.conn.execute(
+            "UPDATE refs SET count = count + ? WHERE kind = ? AND digest = ?", (delta, kind, digest)
+        )
+        if cursor.rowcount == 0:
+            self.conn.execute("INSERT INTO refs (kind, digest, count) VALUES (?, ?, ?)", (kind, digest, delta))
+        count = self.ref_count(kind, digest)
+        if count <= 0:
+            self.conn.execute("DELETE FROM refs WHERE kind = ? AND digest = ?", (kind, digest))
+        return count
+
+    def set_ref(self, kind, digest, count):
+        if count > 0:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO refs (kind, digest, count) VALUES (?, ?, ?)",
+                (kind, digest, count)
+            )
+        else:
+            self.conn.execute("DELETE FROM refs WHERE kind = ? AND digest = ?", (kind, digest))
+
+    def set_value(self, key, value):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+            (key, json.dumps(value))
+        )
+
+    def value(self, key, default=None):
+        """A setting as currently in the database"""
+        row = self.conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def increment(self, key):
+        """Add one to a counter setting under the write lock and return it.
+
+        Counted in the database rather than from a process's copy, so the
+        GUI and the command line never hand out the same value.
+        """
+        self.begin()
+        count = self.value(key, 0) + 1
+        self.set_value(key, count)
+        return count
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.conn.close()
+
+    def import_metadata(self, metadata):
+        """Copy a whole JSON metadata document into the database"""
+        # Older repos could reuse ids after a delete; later records that
+        # reuse one get fresh ids rather than replacing the earlier commit
+        next_id = max(metadata.get("next_id", 0), _next_id(metadata["saves"]))
+        saves = []
+        seen = set()
+        for save in metadata["saves"]:
+            if save["id"] in seen:
+                print(f"Commit id {save['id']} was used twice; importing the later commit as {next_id}")
+                save = dict(save, id=next_id)
+                next_id += 1
+            seen.add(save["id"])
+            saves.append(save)
+        self.conn.executemany(
+            "INSERT INTO saves (id, timestamp, branch, ext, data) VALUES (?, ?, ?, ?, ?)",
+            [(save["id"], save["timestamp"], save["branch"], _save_ext(save), json.dumps(save))
+             for save in saves]
+        )
+        for kind in ("objects", "manifests"):
+            for digest, count in metadata.get(kind, {}).items():
+                self.set_ref(kind, digest, count)
+        self.set_value("next_id", next_id)
+        self.commit()
+
+
+def open_metadata_store(repo_path, backend="sqlite"):
+    """Open the repo's metadata store, importing metadata.json into SQLite once"""
+    json_file = os.path.join(repo_path, "metadata.json")
+    if backend == "json":
+        return JsonMetadataStore(json_file)
+
+    db_file = os.path.join(repo_path, "metadata.db")
+    if not os.path.exists(db_file) and os.path.exists(json_file):
+        import_json_metadata(json_file, db_file)
+    return SqliteMetadataStore(db_file)
+
+
+def import_json_metadata(json_file, db_file):
+    """Convert a metadata.json document into a new SQLite database"""
+    # Build the database under a temp name so an interrupted import is redone
+    temp_file = db_file + ".importing"
+    if os.path.exists(temp_file):
+        os.remove(temp_file)
+    store = SqliteMetadataStore(temp_file)
+    store.import_metadata(JsonMetadataStore(json_file).load())
+    store.close()
+    os.replace(temp_file, db_file)
+
+    # Keep the original document around, but never import it twice
+    os.replace(json_file, json_file + ".imported")
@@ -0,0 +1,180 @@
+import os
+import gzip
+import lzma
+import zlib
+import hashlib
+import shutil
+import tempfile
+
+HASH_BLOCK_SIZE = 1024 * 1024
+SAMPLE_SIZE = 256 * 1024
+PARTIAL_HASH_SIZE = 64 * 1024
+
+# Compressed objects carry a suffix so the store can tell how to read them back.
+# "zlib" writes a deflate stream in a gzip container, which gzip.open can stream.
+CODECS = {
+    "zlib": (".gz", lambda f, mode, level: gzip.open(f, mode, compresslevel=level)),
+    "lzma": (".xz", lambda f, mode, level: lzma.open(f, mode, preset=level)),
+}
+
+# Leading bytes of formats whose data is already compressed
+COMPRESSED_SIGNATURES = (
+    b"\x89PNG",         # PNG
+    b"\xff\xd8\xff",    # JPEG
+    b"GIF8",            # GIF
+    b"PK\x03\x04",      # ZIP based formats
+    b"\x1f\x8b",        # gzip
+    b"\xfd7zXZ",        # xz
+)
+
+
+def hash_file(file_path):
+    """Return the SHA-256 hex digest of a file, reading it in blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_fingerprint(file_path):
+    """Cheap identity of a file: size, mtime and a hash of its first and last blocks"""
+    stat = os.stat(file_path)
+    digest = hashlib.sha256(str(stat.st_size).encode())
+    with open(file_path, "rb") as f:
+        digest.update(f.read(PARTIAL_HASH_SIZE))
+        if stat.st_size > 2 * PARTIAL_HASH_SIZE:
+            f.seek(-PARTIAL_HASH_SIZE, os.SEEK_END)
+            digest.update(f.read(PARTIAL_HASH_SIZE))
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "partial_hash": digest.hexdigest()}
+
+
+def is_compressible(sample):
+    """Check whether data is worth compressing, judging by its first bytes"""
+    if sample.startswith(COMPRESSED_SIGNATURES):
+        return False
+    if sample[:4] == b"RIFF" and sample[8:12] == b"WEBP":
+        return False
+    # Formats with compressed payloads (e.g. PDF streams) barely shrink at level 1
+    sample = sample[:SAMPLE_SIZE]
+    return len(zlib.compress(sample, 1)) < len(sample) * 0.9
+
+
+class ObjectStore:
+    """Content-addressed blob storage under objects/ab/cdef..."""
+
+    def __init__(self, objects_dir):
+        self.objects_dir = objects_dir
+        if not os.path.exists(objects_dir):
+            os.makedirs(objects_dir)
+
+    def object_path(self, digest):
+        """Get the on-disk path for an object"""
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def has(self, digest):
+        return self._find(digest) is not None
+
+    def plain_path(self, digest):
+        """Get the path of an uncompressed object, or None if it is compressed"""
+        object_path = self.object_path(digest)
+        return object_path if os.path.exists(object_path) else None
+
+    def _find(self, digest):
+        object_path = self.object_path(digest)
+        if os.path.exists(object_path):
+            return object_path, None
+        for codec, (suffix, _) in CODECS.items():
+            if os.path.exists(object_path + suffix):
+                return object_path + suffix, codec
+        return None
+
+    def add_file(self, file_path, digest=None, compression=None, level=6):
+        """Store a file and return its digest; existing objects are not rewritten"""
+        if digest is None:
+            digest = hash_file(file_path)
+        if not self.has(digest):
+            with open(file_path, "rb") as src:
+                self._write(digest, lambda dst: shutil.copyfileobj(src, dst, HASH_BLOCK_SIZE),
+                            compression, level)
+        return digest
+
+    def add_bytes(self, data, digest=None, compression=None, level=6):
+        """Store an in-memory blob and return its digest"""
+        if digest is None:
+            digest = hashlib.sha256(data).hexdigest()
+        if not self.has(digest):
+            self._write(digest, lambda dst: dst.write(data), compression, level)
+        return digest
+
+    def _write(self, digest, write_content, compression=None, level=6):
+        object_path = self.object_path(digest)
+        object_dir = os.path.dirname(object_path)
+        os.makedirs(object_dir, exist_ok=True)
+        if compression:
+            suffix, open_codec = CODECS[compression]
+            object_path += suffix
+
+        # Write to a temp file first so a crash never leaves a partial object
+        fd, temp_path = tempfile.mkstemp(dir=object_dir, prefix=".tmp_")
+        try:
+            with os.fdopen(fd, "wb") as dst:
+                if compression:
+                    with open_codec(dst, "wb", level) as compressed:
+                        write_content(compressed)
+                else:
+                    write_content(dst)
+            os.replace(temp_path, object_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def open(self, digest):
+        """Open an object for binary reading, decompressing as it streams"""
+        found = self._find(digest)
+        if found is None:
+            raise FileNotFoundError(f"Object not found: {digest}")
+        path, codec = found
+        if codec:
+            return CODECS[codec][1](path, "rb", None)
+        return open(path, "rb")
+
+    def iter_files(self):
+        """Yield (digest, path, size, mtime) for every stored file.
+
+        Leftover temp files from interrupted writes are yielded with digest None.
+        """
+        try:
+            fan_out = os.listdir(self.objects_dir)
+        except FileNotFoundError:
+            return
+        for prefix in fan_out:
+            object_dir = os.path.join(self.objects_dir, prefix)
+            if len(prefix) != 2 or not os.path.isdir(object_dir):
+                continue
+            with os.scandir(object_dir) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    if entry.name.startswith(".tmp_"):
+                        yield None, entry.path, stat.st_size, stat.st_mtime
+                        continue
+                    name = entry.name
+                    for suffix, _ in CODECS.values():
+                        if name.endswith(suffix):
+                            name = name[:-len(suffix)]
+                            break
+                    yield prefix + name, entry.path, stat.st_size, stat.st_mtime
+
+    def remove(self, digest):
+        """Remove an object from disk"""
+        found = self._find(digest)
+        if found is not None:
+            os.remove(found[0])
+        # Drop the fan-out directory once it is empty
+        try:
+            os.rmdir(os.path.dirname(self.object_path(digest)))
+        except OSError:
+            pass
@@ -0,0 +1,197 @@
+import math
+import numpy as np
+
+# Pixels are compared one tile at a time, so memory use does not grow with the canvas
+TILE_SIZE = 1024
+# The heatmap has at most this many cells along its longer side
+HEATMAP_SIZE = 512
+# Largest channel difference (0-255) still treated as unchanged, so
+# recompression noise is not reported as an edit
+THRESHOLD = 24
+# Canvases more than this many pixels across are compared at a reduced scale;
+# two 10k x 10k versions decoded side by side would take over 600 MB
+MAX_DIFF_SIDE = 4096
+
+
+class PixelDiff:
+    """Result of comparing two images of possibly different sizes.
+
+    The heatmap holds, per cell_size x cell_size cell of the combined canvas,
+    the share of changed pixels scaled to 0-255. boxes are (left, top, right,
+    bottom) pixel rectangles around each connected group of changed cells,
+    largest first. sizes are the (width, height) of the two compared images,
+    in the order they were given; both sit at the canvas's top-left.
+    """
+
+    def __init__(self, width, height, cell_size, heatmap, boxes, changed_pixels, sizes):
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+        self.heatmap = heatmap
+        self.boxes = boxes
+        self.changed_pixels = changed_pixels
+        self.sizes = sizes
+
+    @property
+    def changed_fraction(self):
+        total = self.width * self.height
+        return self.changed_pixels / total if total else 0.0
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                size=np.array([self.width, self.height, self.cell_size, self.changed_pixels], dtype=np.int64),
+                sizes=np.array(self.sizes, dtype=np.int64).reshape(2, 2),
+                heatmap=self.heatmap,
+                boxes=np.array(self.boxes, dtype=np.int64).reshape(-1, 4)
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            width, height, cell_size, changed_pixels = (int(value) for value in data["size"])
+            boxes = [tuple(int(value) for value in box) for box in data["boxes"]]
+            sizes = [tuple(int(value) for value in size) for size in data["sizes"]]
+            return cls(width, height, cell_size, data["heatmap"], boxes, changed_pixels, sizes)
+
+    def scaled(self, width, height):
+        """The same result in the pixel coordinates of a width x height canvas"""
+        scale_x = width / self.width
+        scale_y = height / self.height
+        boxes = [(round(left * scale_x), round(top * scale_y),
+                  min(width, round(right * scale_x)), min(height, round(bottom * scale_y)))
+                 for left, top, right, bottom in self.boxes]
+        sizes = [(min(width, round(size_x * scale_x)), min(height, round(size_y * scale_y)))
+                 for size_x, size_y in self.sizes]
+        return PixelDiff(width, height, max(1, round(self.cell_size * scale_x)), self.heatmap, boxes,
+                         round(self.changed_pixels * scale_x * scale_y), sizes)
+
+    def swapped(self):
+        """The same result with the two compared images given the other way round"""
+        return PixelDiff(self.width, self.height, self.cell_size, self.heatmap, self.boxes,
+                         self.changed_pixels, self.sizes[::-1])
+
+
+def _rgb_tile(image, left, top, right, bottom):
+    """One tile of a PIL image as a uint8 RGB array; areas past its edge are 0"""
+    tile = image.crop((left, top, right, bottom))
+    if tile.mode != "RGB":
+        tile = tile.convert("RGB")
+    return np.asarray(tile)
+
+
+def diff_images(image_a, image_b, threshold=THRESHOLD):
+    """Compare two PIL images pixel by pixel.
+
+    Both are placed at the top-left of a canvas large enough for either, and
+    anything that only one of them covers counts as changed.
+    """
+    width = max(image_a.width, image_b.width)
+    height = max(image_a.height, image_b.height)
+    cell = max(1, math.ceil(max(width, height) / HEATMAP_SIZE))
+    tile_size = cell * max(1, TILE_SIZE // cell)
+    cells_x = math.ceil(width / cell)
+    cells_y = math.ceil(height / cell)
+    heatmap = np.zeros((cells_y, cells_x), dtype=np.uint8)
+    changed_pixels = 0
+
+    for top in range(0, height, tile_size):
+        bottom = min(top + tile_size, height)
+        for left in range(0, width, tile_size):
+            right = min(left + tile_size, width)
+            a = _rgb_tile(image_a, left, top, right, bottom)
+            b = _rgb_tile(image_b, left, top, right, bottom)
+            # |a - b| without widening to a signed type; channels are compared
+            # one at a time, which numpy does far faster than max(axis=2)
+            delta = np.maximum(a, b)
+            delta -= np.minimum(a, b)
+            del a, b
+            changed = delta[..., 0] > threshold
+            changed |= delta[..., 1] > threshold
+            changed |= delta[..., 2] > threshold
+            del delta
+            for image in (image_a, image_b):
+                changed[:, max(0, image.width - left):] = True
+                changed[max(0, image.height - top):, :] = True
+            changed_pixels += int(changed.sum())
+
+            # Share of changed pixels per heatmap cell; edge cells are padded
+            rows = math.ceil((bottom - top) / cell)
+            cols = math.ceil((right - left) / cell)
+            if changed.shape != (rows * cell, cols * cell):
+                padded = np.zeros((rows * cell, cols * cell), dtype=bool)
+                padded[:bottom - top, :right - left] = changed
+                changed = padded
+            share = changed.reshape(rows, cell, cols, cell).sum(axis=(1, 3), dtype=np.uint32) / (cell * cell)
+            heatmap[top // cell:top // cell + rows, left // cell:left // cell + cols] = \
+                np.ceil(share * 255).astype(np.uint8)
+
+    boxes = _changed_boxes(heatmap, cell, width, height)
+    return PixelDiff(width, height, cell, heatmap, boxes, changed_pixels, [image_a.size, image_b.size])
+
+
+def diff_decoded(decoders, threshold=THRESHOLD, max_side=MAX_DIFF_SIDE):
+    """Compare the PIL images returned by two decode callables.
+
+    Each image is shrunk as soon as it is decoded, before the next one is, so
+    at most one full-size image is held at a time. When the combined canvas
+    is more than max_side pixels across, both are compared at the scale that
+    fits it within max_side, and the result is mapped back to full-size
+    coordinates.
+    """
+    from PIL import Image
+    images = []
+    sizes = []
+    for decode in decoders:
+        image = decode()
+        sizes.append(image.size)
+        if max(image.size) > max_side:
+            # Lazily opened JPEGs are decoded at a reduced size to begin with,
+            # and a box reduction by a whole factor needs no full-size copy
+            factor = math.ceil(max(image.size) / max_side)
+            image.draft("RGB", (max(1, image.width // factor), max(1, image.height // factor)))
+            factor = math.ceil(max(image.size) / max_side)
+            if image.mode not in ("RGB", "RGBA", "L", "LA"):
+                image = image.convert("RGB")
+            if factor > 1:
+                image = image.reduce(factor)
+        images.append(image)
+
+    width = max(size[0] for size in sizes)
+    height = max(size[1] for size in sizes)
+    scale = max_side / max(width, height)
+    if scale >= 1:
+        return diff_images(images[0], images[1], threshold)
+    for i, (image, size) in enumerate(zip(images, sizes)):
+        target = (max(1, round(size[0] * scale)), max(1, round(size[1] * scale)))
+        if image.size != target:
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            images[i] = image.resize(target, Image.LANCZOS)
+    result = diff_images(images[0], images[1], threshold).scaled(width, height)
+    result.sizes = sizes
+    return result
+
+
+def _changed_boxes(heatmap, cell, width, height):
+    """Bounding boxes of 8-connected groups of changed heatmap cells"""
+    remaining = set(zip(*np.nonzero(heatmap)))
+    boxes = []
+    while remaining:
+        stack = [remaining.pop()]
+        min_y, min_x = max_y, max_x = stack[0]
+        while stack:
+            y, x = stack.pop()
+            min_y, max_y = min(min_y, y), max(max_y, y)
+            min_x, max_x = min(min_x, x), max(max_x, x)
+            for dy in (-1, 0, 1):
+                for dx in (-1, 0, 1):
+                    neighbour = (y + dy, x + dx)
+                    if neighbour in remaining:
+                        remaining.discard(neighbour)
+                        stack.append(neighbour)
+        boxes.append((int(min_x) * cell, int(min_y) * cell,
+                      min(width, (int(max_x) + 1) * cell), min(height, (int(max_y) + 1) * cell)))
+    boxes.sort(key=lambda box: (box[2] - box[0]) * (box[3] - box[1]), reverse=True)
+    return boxes
@@ -0,0 +1,212 @@
+import os
+import time
+from collections import deque
+
+DEFAULT_MIN_INTERVAL = 1.0
+DEFAULT_MAX_INTERVAL = 30.0
+# Directory entries stat'ed per step, so one step never blocks the caller for long
+BATCH_SIZE = 2000
+# Quiet passes double the interval, up to max_interval
+BACKOFF = 2.0
+# The wait between passes is at least this many times the time a pass took,
+# which keeps polling a huge tree or a slow share busy about 2% of the time
+COST_FACTOR = 50
+
+
+def is_watched_name(name, extensions):
+    """Whether a file name inside a watched tree should be tracked"""
+    # Skip hidden files and editor temp files such as "~$name" or ".name.swp"
+    if name.startswith((".", "~")):
+        return False
+    return name.lower().endswith(extensions)
+
+
+class PollingWatcher:
+    """Finds changed files by re-reading directory listings instead of OS events.
+
+    Works on network shares, where change notifications are unreliable, and
+    on trees too large for the OS watch limits. Each pass walks the watched
+    directories with os.scandir and compares every file's (size, mtime_ns)
+    to a stat cache, so only files that appeared or changed are reported. A
+    pass is split into steps of BATCH_SIZE entries, and the wait between
+    passes grows while nothing changes and with the cost of a pass. The
+    watcher never touches Qt; the caller drives step() from a timer, and
+    since a pass over a share can block on the network, off the GUI thread.
+    """
+
+    def __init__(self, extensions, min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+                 clock=time.monotonic):
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.clock = clock
+        self.files = {}  # individually watched file -> (size, mtime_ns) or None
+        self.trees = set()  # roots of watched directory trees
+        self.dirs = {}  # directory in a tree -> {path: (size, mtime_ns)} of its watched files
+        self.queue = deque()  # files and directories left to check in the current pass
+        self.unlisted = deque()  # directories of newly added trees not listed yet
+        self.pass_changes = 0
+        self.pass_cost = 0.0
+
+    def add_file(self, path):
+        path = os.path.abspath(path)
+        if path not in self.files:
+            self.files[path] = self._stat(path)
+
+    def add_tree(self, root):
+        """Watch every supported file under root; existing files are not reported.
+
+        Only registers the tree: the following step() calls list it, in
+        batches, before any pass checks it for changes.
+        """
+        root = os.path.abspath(root)
+        if root in self.trees:
+            return
+        self.trees.add(root)
+        self.unlisted.append(root)
+
+    def listing(self):
+        """Whether a newly added tree is still being listed"""
+        return bool(self.unlisted)
+
+    def remove_file(self, path):
+        self.files.pop(os.path.abspath(path), None)
+
+    def remove_tree(self, root):
+        self.trees.discard(os.path.abspath(root))
+        for directory in [directory for directory in self.dirs if not self.in_tree(directory)]:
+            del self.dirs[directory]
+
+    def clear(self):
+        self.files.clear()
+        self.trees.clear()
+        self.dirs.clear()
+        self.queue.clear()
+        self.unlisted.clear()
+
+    def watched_files(self):
+        """Every file currently being watched, sorted"""
+        found = set(self.files)
+        for snapshot in self.dirs.values():
+            found.update(snapshot)
+        return sorted(found)
+
+    def in_tree(self, directory):
+        return any(directory == root or directory.startswith(root + os.sep) for root in self.trees)
+
+    def stat(self, path):
+        """Fresh (size, mtime_ns) of a file, also refreshing the cache"""
+        stat = self._stat(path)
+        if path in self.files:
+            self.files[path] = stat
+        snapshot = self.dirs.get(os.path.dirname(path))
+        if snapshot is not None and path in snapshot:
+            if stat is None:
+                del snapshot[path]
+            else:
+                snapshot[path] = stat
+        return stat
+
+    def step(self, max_entries=BATCH_SIZE):
+        """Check the next batch of the current pass, starting one if needed.
+
+        Returns (changed paths, seconds to wait before the next step). The
+        wait is 0 while the pass, or the listing of a new tree, is unfinished.
+        """
+        if self.unlisted:
+            self._list_new_dirs(max_entries)
+            return [], 0 if self.unlisted or self.queue else self.interval
+        start = self.clock()
+        if not self.queue:
+            # A tree root that was removed is looked for again on every pass
+            for root in self.trees:
+                self.dirs.setdefault(root, {})
+            self.queue.extend(self.files)
+            self.queue.extend(sorted(self.dirs))
+            self.pass_changes = 0
+            self.pass_cost = 0.0
+        changed = []
+        entries = 0
+        while self.queue and entries < max_entries:
+            path = self.queue.popleft()
+            if path in self.files:
+                entries += 1
+                stat = self._stat(path)
+                if stat != self.files[path]:
+                    self.files[path] = stat
+                    if stat is not None:
+                        changed.append(path)
+            elif path in self.dirs:
+                entries += len(self.dirs[path]) + 1
+                new_dirs = self._scan(path, report=True, changed=changed)
+                # New subdirectories are read in this same pass
+                for directory in new_dirs:
+                    if directory not in self.dirs:
+                        self.dirs[directory] = {}
+                        self.queue.append(directory)
+        self.pass_changes += len(changed)
+        self.pass_cost += self.clock() - start
+        if self.queue:
+            return changed, 0
+        return changed, self._next_interval()
+
+    def _list_new_dirs(self, max_entries):
+        """Fill the cache for the next batch of a new tree without reporting anything"""
+        entries = 0
+        while self.unlisted and entries < max_entries:
+            directory = self.unlisted.popleft()
+            # Already listed as part of another tree, or its tree was removed
+            if directory in self.dirs or not self.in_tree(directory):
+                continue
+            self.dirs[directory] = {}
+            self.unlisted.extend(self._scan(directory, report=False))
+            entries += len(self.dirs.get(directory, ())) + 1
+
+    def _next_interval(self):
+        if self.pass_changes:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * BACKOFF, self.max_interval)
+        return max(self.interval, self.pass_cost * COST_FACTOR)
+
+    def _scan(self, directory, report, changed=None):
+        """Refresh one directory's cache; returns the subdirectories it holds"""
+        previous = self.dirs[directory]
+        current = {}
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    name = entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not name.startswith("."):
+                                subdirs.append(entry.path)
+                            continue
+                        if not is_watched_name(name, self.extensions) or not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    current[entry.path] = stat = (stat.st_size, stat.st_mtime_ns)
+                    if report and previous.get(entry.path) != stat:
+                        changed.append(entry.path)
+        except (FileNotFoundError, NotADirectoryError):
+            # Removed; its parent's next listing brings it back if it reappears
+            for path in [path for path in self.dirs if path == directory or path.startswith(directory + os.sep)]:
+                del self.dirs[path]
+            return []
+        except OSError:
+            # Share briefly unavailable; keep the old cache and try next pass
+            return []
+        self.dirs[directory] = current
+        return subdirs
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
@@ -0,0 +1,84 @@
+import io
+import struct
+
+PSD_SIGNATURE = b"8BPS"
+RESOURCE_SIGNATURES = (b"8BIM", b"MeSa", b"AgHg", b"PHUT", b"DCSR")
+HEADER_SIZE = 26
+
+THUMBNAIL_RESOURCE = 1036
+# Photoshop 4 stored the thumbnail with red and blue swapped
+THUMBNAIL_RESOURCE_PS4 = 1033
+VERSION_INFO_RESOURCE = 1057
+# Format, width, height, row bytes, sizes, depth and planes precede the JPEG data
+THUMBNAIL_HEADER_SIZE = 28
+
+
+def read_image_resources(f, wanted):
+    """Read image resource blocks from the start of an open PSD file.
+
+    Only the header and the image resources section are read, so this stays
+    cheap however many layers the file has. Returns {resource id: data} for
+    the ids in wanted that are present.
+    """
+    header = f.read(HEADER_SIZE)
+    if len(header) != HEADER_SIZE or not header.startswith(PSD_SIGNATURE):
+        raise ValueError("Not a PSD file")
+    (color_mode_length,) = struct.unpack(">I", f.read(4))
+    f.seek(color_mode_length, io.SEEK_CUR)
+    (section_length,) = struct.unpack(">I", f.read(4))
+    end = f.tell() + section_length
+
+    found = {}
+    while f.tell() + 12 <= end:
+        if f.read(4) not in RESOURCE_SIGNATURES:
+            break
+        resource_id, name_length = struct.unpack(">HB", f.read(3))
+        # The Pascal-string name, with its length byte, is padded to an even size
+        f.seek(name_length + (name_length + 1) % 2, io.SEEK_CUR)
+        (size,) = struct.unpack(">I", f.read(4))
+        if resource_id in wanted:
+            found[resource_id] = f.read(size)
+            f.seek(size % 2, io.SEEK_CUR)
+        else:
+            f.seek(size + size % 2, io.SEEK_CUR)
+    return found
+
+
+def read_preview_resources(source):
+    """The resources that describe a PSD's stored previews, from a path or file object"""
+    wanted = (THUMBNAIL_RESOURCE, THUMBNAIL_RESOURCE_PS4, VERSION_INFO_RESOURCE)
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return read_image_resources(f, wanted)
+    source.seek(0)
+    try:
+        return read_image_resources(source, wanted)
+    finally:
+        source.seek(0)
+
+
+def has_merged_image(resources):
+    """Whether the file stores a real flattened image ("Maximize Compatibility")"""
+    version_info = resources.get(VERSION_INFO_RESOURCE)
+    if version_info and len(version_info) > 4:
+        return version_info[4] != 0
+    # Files without version info always carry the merged image
+    return True
+
+
+def embedded_thumbnail(resources):
+    """The small JPEG preview Photoshop embeds, as a PIL image, or None"""
+    from PIL import Image
+    data = resources.get(THUMBNAIL_RESOURCE)
+    swapped = False
+    if data is None:
+        data = resources.get(THUMBNAIL_RESOURCE_PS4)
+        swapped = True
+    if not data or len(data) <= THUMBNAIL_HEADER_SIZE:
+        return None
+    image = Image.open(io.BytesIO(data[THUMBNAIL_HEADER_SIZE:]))
+    image.load()
+    if swapped and image.mode == "RGB":
+        red, green, blue = image.split()
+        image = Image.merge("RGB", (blue, green, red))
+    return image
@@ -0,0 +1,108 @@
+import os
+import re
+from bisect import bisect_left, bisect_right, insort
+
+# Timestamps are stored as "%Y-%m-%d %H:%M:%S", so they sort as plain strings
+DAY_END = " 99:99:99"
+SCAN_CHECK_INTERVAL = 1000
+
+
+def save_ext(save):
+    """Lowercase extension of a save record's original file"""
+    filename = save.get("filename") or os.path.basename(save.get("file", ""))
+    return os.path.splitext(filename)[1].lower()
+
+
+class CommitQueryIndex:
+    """Timestamp and file type indexes for advanced queries"""
+
+    def __init__(self):
+        self.timestamps = []  # sorted (timestamp, id) pairs
+        self.ext_ids = {}  # extension -> set of ids
+
+    def add(self, save):
+        entry = (save["timestamp"], save["id"])
+        # Commits are nearly always newer than everything indexed so far
+        if not self.timestamps or entry > self.timestamps[-1]:
+            self.timestamps.append(entry)
+        else:
+            insort(self.timestamps, entry)
+        self.ext_ids.setdefault(save_ext(save), set()).add(save["id"])
+
+    def remove(self, save):
+        entry = (save["timestamp"], save["id"])
+        i = bisect_left(self.timestamps, entry)
+        if i < len(self.timestamps) and self.timestamps[i] == entry:
+            del self.timestamps[i]
+        self.ext_ids.get(save_ext(save), set()).discard(save["id"])
+
+    def remove_many(self, saves):
+        """Drop several saves with one pass over the timestamp list"""
+        entries = {(save["timestamp"], save["id"]) for save in saves}
+        self.timestamps = [entry for entry in self.timestamps if entry not in entries]
+        for save in saves:
+            self.ext_ids.get(save_ext(save), set()).discard(save["id"])
+
+    def ids_between(self, date_from=None, date_to=None):
+        """Ids of commits made on or between two dates (datetime.date, inclusive)"""
+        start = 0
+        end = len(self.timestamps)
+        if date_from is not None:
+            start = bisect_left(self.timestamps, (date_from.isoformat(),))
+        if date_to is not None:
+            end = bisect_right(self.timestamps, (date_to.isoformat() + DAY_END,))
+        return {save_id for _, save_id in self.timestamps[start:end]}
+
+    def ids_with_ext(self, ext):
+        return set(self.ext_ids.get(ext.lower(), ()))
+
+
+class CommitQuery:
+    """An advanced search query, compiled once and then run against the indexes.
+
+    Running it is split in two: candidates() narrows by date, file type and
+    indexed words using only set operations, and scan() applies the regular
+    expression to the records that are left. scan() only reads the records
+    it is given, so it can run on a worker thread.
+    """
+
+    def __init__(self, text="", use_regex=False, date_from=None, date_to=None, file_type=None):
+        self.text = text.strip()
+        self.use_regex = use_regex
+        self.date_from = date_from
+        self.date_to = date_to
+        self.file_type = file_type
+        self.pattern = None
+        self.invalid = False
+        if use_regex and self.text:
+            try:
+                self.pattern = re.compile(self.text, re.IGNORECASE)
+            except re.error:
+                self.invalid = True
+
+    def candidates(self, query_index, search_index):
+        """Ids that pass every indexed filter, before any regex is applied"""
+        if self.invalid:
+            return set()
+        ids = query_index.ids_between(self.date_from, self.date_to)
+        if self.file_type:
+            ids &= query_index.ids_with_ext(self.file_type)
+        if self.text and not self.use_regex:
+            ids &= search_index.search(self.text, match_all=True)
+        return ids
+
+    def needs_scan(self):
+        return self.pattern is not None
+
+    def scan(self, records, is_cancelled=None):
+        """Filter (id, message, note) records with the regex.
+
+        Returns the matching ids, or None if is_cancelled() turned true first.
+        """
+        matches = []
+        for i, (save_id, message, note) in enumerate(records):
+            if is_cancelled and i % SCAN_CHECK_INTERVAL == 0 and is_cancelled():
+                return None
+            if self.pattern.search(message) or self.pattern.search(note):
+                matches.append(save_id)
+        return matches
@@ -0,0 +1,119 @@
+import os
+import re
+import json
+from bisect import bisect_left
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Split text into the lowercase word tokens the index stores"""
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class SearchIndex:
+    """Inverted index from message and note tokens to commit ids.
+
+    Tokens are kept sorted so a query word matches every token it is a prefix
+    of, which lets search run on each keystroke.
+    """
+
+    def __init__(self):
+        self.postings = {}  # token -> set of commit ids
+        self.doc_tokens = {}  # commit id -> tokens indexed for it
+        self.sorted_tokens = []
+        self.tokens_dirty = False
+
+    def add(self, save):
+        """Index (or re-index) the text of a save record"""
+        self.remove(save["id"])
+        tokens = set(tokenize(save.get("message", ""))) | set(tokenize(save.get("note", "")))
+        for token in tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                ids = self.postings[token] = set()
+                self.tokens_dirty = True
+            ids.add(save["id"])
+        self.doc_tokens[save["id"]] = tokens
+
+    def remove(self, save_id):
+        for token in self.doc_tokens.pop(save_id, ()):
+            ids = self.postings[token]
+            ids.discard(save_id)
+            if not ids:
+                del self.postings[token]
+                self.tokens_dirty = True
+
+    def prefix_ids(self, prefix):
+        """Ids of commits with any token starting with prefix"""
+        if self.tokens_dirty:
+            self.sorted_tokens = sorted(self.postings)
+            self.tokens_dirty = False
+        found = set()
+        start = bisect_left(self.sorted_tokens, prefix)
+        for token in self.sorted_tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            found |= self.postings[token]
+        return found
+
+    def search(self, query, match_all=False):
+        """Return the ids matching any (or, with match_all, every) query word"""
+        words = tokenize(query)
+        if not words:
+            return set()
+        found = None
+        for word in words:
+            ids = self.prefix_ids(word)
+            if found is None:
+                found = ids
+            elif match_all:
+                found &= ids
+            else:
+                found |= ids
+        return found
+
+    def matches(self, save_id, query, match_all=False):
+        """Check one commit against a query without touching the postings"""
+        tokens = self.doc_tokens.get(save_id, ())
+        words = tokenize(query)
+        if not words:
+            return False
+        check = all if match_all else any
+        return check(any(token.startswith(word) for token in tokens) for word in words)
+
+    def build(self, saves):
+        self.postings = {}
+        self.doc_tokens = {}
+        self.tokens_dirty = True
+        for save in saves:
+            self.add(save)
+
+    def load(self, index_file, revision):
+        """Load a saved index; returns False if it is missing or out of date"""
+        if not os.path.exists(index_file):
+            return False
+        try:
+            with open(index_file, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("revision") != revision:
+            return False
+        self.postings = {}
+        self.doc_tokens = {}
+        for token, ids in data["postings"].items():
+            self.postings[token] = set(ids)
+            for save_id in ids:
+                self.doc_tokens.setdefault(save_id, set()).add(token)
+        self.tokens_dirty = True
+        return True
+
+    def save(self, index_file, revision):
+        temp_file = index_file + ".tmp"
+        with open(temp_file, "w") as f:
+            json.dump({
+                "revision": revision,
+                "postings": {token: sorted(ids) for token, ids in self.postings.items()}
+            }, f)
+        os.replace(temp_file, index_file)
@@ -0,0 +1,59 @@
+import os
+import json
+import threading
+
+
+class ThumbnailQueue:
+    """Pending thumbnail jobs, persisted so they survive a restart.
+
+    The command line may queue jobs while the GUI has the repo open, so every
+    change is applied to the jobs as read back from the file, not only to
+    this process's copy.
+    """
+
+    def __init__(self, jobs_file):
+        self.jobs_file = jobs_file
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.jobs = self._read()
+
+    def add(self, save):
+        """Queue a thumbnail for a save record"""
+        job = {key: save.get(key) for key in ("id", "filename", "object", "storage", "file")}
+        with self.lock:
+            self.jobs = self._read()
+            self.jobs[job["id"]] = job
+            self._write()
+        return job
+
+    def remove(self, save_ids):
+        with self.lock:
+            self.jobs = self._read()
+            removed = [self.jobs.pop(save_id, None) for save_id in save_ids]
+            if any(removed):
+                self._write()
+
+    def get(self, save_id):
+        with self.lock:
+            return self.jobs.get(save_id)
+
+    def pending(self):
+        with self.lock:
+            return list(self.jobs.values())
+
+    def _read(self):
+        if not os.path.exists(self.jobs_file):
+            return {}
+        try:
+            with open(self.jobs_file, "r") as f:
+                return {job["id"]: job for job in json.load(f)}
+        except (OSError, ValueError) as e:
+            print(f"Failed to read the thumbnail queue: {e}")
+            return dict(self.jobs)
+
+    def _write(self):
+        # Per process, since the GUI and the command line may both write
+        temp_file = f"{self.jobs_file}.{os.getpid()}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(list(self.jobs.values()), f)
+        os.replace(temp_file, self.jobs_file)
@@ -0,0 +1,99 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from .thumbnails import render_version_thumbnail
+
+# A job whose worker dies this many times (e.g. killed for running out of
+# memory on a huge file) is reported as failed rather than tried again
+MAX_CRASHES = 3
+
+
+class ThumbnailService:
+    """Renders thumbnails in a process pool, since decoding is CPU-bound.
+
+    on_done(save_id, thumbnail_path, image_hash, error) is called from a pool
+    thread once each job finishes; thumbnail_path and image_hash are None when
+    rendering failed. full_quality is passed on to the format handlers.
+
+    When a worker process dies the pool is replaced and the jobs it held are
+    submitted again, so one bad file does not stop every later thumbnail.
+    """
+
+    def __init__(self, repo_path, on_done, max_workers=None, full_quality=False):
+        self.repo_path = repo_path
+        self.on_done = on_done
+        self.full_quality = full_quality
+        if max_workers is None:
+            max_workers = max(1, (os.cpu_count() or 2) - 1)
+        self.max_workers = max_workers
+        # Done callbacks run on the pool's own thread
+        self.lock = threading.RLock()
+        self.futures = {}  # save id -> future of the job still running
+        self.crashes = {}  # save id -> times a worker died while it was queued
+        self.closed = False
+        self.executor = self._new_executor()
+
+    def _new_executor(self):
+        # Spawn rather than fork so workers never inherit GUI threads
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def submit(self, job):
+        """Queue a job. Never raises, since it is called from GUI handlers;
+        a job that cannot be queued stays pending for the next start."""
+        with self.lock:
+            if self.closed:
+                return
+            executor = self.executor
+            try:
+                try:
+                    future = executor.submit(render_version_thumbnail, self.repo_path, job, self.full_quality)
+                except BrokenProcessPool:
+                    self._restart(executor)
+                    executor = self.executor
+                    future = executor.submit(render_version_thumbnail, self.repo_path, job, self.full_quality)
+            except Exception as e:
+                print(f"Failed to queue the thumbnail for commit {job['id']}: {e}")
+                return
+            self.futures[job["id"]] = future
+            future.add_done_callback(lambda f, job=job, executor=executor: self._finished(job, executor, f))
+
+    def _restart(self, broken):
+        """Replace a pool whose worker died, unless that was done already"""
+        if self.executor is broken:
+            print("A thumbnail worker stopped unexpectedly; restarting the pool")
+            broken.shutdown(wait=False)
+            self.executor = self._new_executor()
+
+    def _finished(self, job, executor, future):
+        save_id = job["id"]
+        with self.lock:
+            if self.futures.get(save_id) is future:
+                del self.futures[save_id]
+            if future.cancelled() or self.closed:
+                return
+            if isinstance(future.exception(), BrokenProcessPool):
+                self.crashes[save_id] = self.crashes.get(save_id, 0) + 1
+                if self.crashes[save_id] < MAX_CRASHES:
+                    self._restart(executor)
+                    self.submit(job)
+                    return
+            self.crashes.pop(save_id, None)
+        try:
+            (thumbnail_path, image_hash), error = future.result(), ""
+        except Exception as e:
+            thumbnail_path, image_hash, error = None, None, str(e)
+        self.on_done(save_id, thumbnail_path, image_hash, error)
+
+    def shutdown(self):
+        """Stop the workers; unfinished jobs stay queued for the next start"""
+        with self.lock:
+            self.closed = True
+            # Cancelled one by one, as shutdown(cancel_futures=True) needs Python 3.9
+            for future in list(self.futures.values()):
+                future.cancel()
+            self.futures.clear()
+            self.executor.shutdown(wait=False)
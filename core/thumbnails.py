@@ -0,0 +1,133 @@
+import os
+import shutil
+import tempfile
+import threading
+from .object_store import ObjectStore
+from .versions import open_stored, stored_path
+from .formats import handler_for, fit_image
+
+THUMBNAIL_SIZE = (200, 200)
+# Longest sides of the preview pyramid rendered for each version; the
+# smallest level is the thumbnail itself
+PREVIEW_LEVELS = (200, 800, 2048)
+PREVIEW_QUALITY = 90
+# Multi-page documents get thumbnails for at most this many pages up front;
+# later pages are rendered when they are first shown
+MAX_PAGE_THUMBNAILS = 100
+# Compressed and chunked versions are unpacked for decoding in memory up to
+# this size, and into a temporary file beyond it
+SPOOL_SIZE = 64 * 1024 * 1024
+
+
+def _handler(ext):
+    handler = handler_for(ext)
+    if handler is None:
+        raise ValueError(f"Unsupported file format: {ext}")
+    return handler
+
+
+def decode_image(source, ext, full_quality=False):
+    """Decode a file path or binary file object into a PIL image"""
+    return _handler(ext).decode(source, full_quality)
+
+
+def render_thumbnail(source, ext, thumbnail_path, full_quality=False):
+    """Render a thumbnail for a file path or binary file object.
+
+    Returns the thumbnail path and the perceptual hash of the rendered image.
+    """
+    from .image_hash import phash
+    image = _handler(ext).thumbnail(source, THUMBNAIL_SIZE, full_quality)
+    image.save(thumbnail_path, "PNG")
+    return thumbnail_path, phash(image)
+
+
+def preview_level_path(repo_path, save_id, level):
+    """Where one level of a version's preview pyramid is stored"""
+    if level == PREVIEW_LEVELS[0]:
+        return os.path.join(repo_path, "thumbnails", f"thumb_{save_id}.png")
+    return os.path.join(repo_path, "thumbnails", f"preview_{save_id}_{level}.jpg")
+
+
+def render_preview_levels(source, ext, repo_path, save_id, full_quality=False):
+    """Render a version's preview pyramid from a single decode.
+
+    The largest level is decoded first and each smaller one is shrunk from
+    the level above. Every level is written even when the image is smaller
+    than it, so a version whose largest level exists has a pyramid.
+    Returns the thumbnail path and the perceptual hash of the thumbnail.
+    """
+    from .image_hash import phash
+    largest = PREVIEW_LEVELS[-1]
+    image = _handler(ext).thumbnail(source, (largest, largest), full_quality)
+    for level in reversed(PREVIEW_LEVELS):
+        image = fit_image(image, (level, level))
+        path = preview_level_path(repo_path, save_id, level)
+        # Written under a temporary name so the preview never reads half a file
+        temp_path = path + ".tmp"
+        if level == PREVIEW_LEVELS[0]:
+            image.save(temp_path, "PNG")
+        else:
+            image.save(temp_path, "JPEG", quality=PREVIEW_QUALITY)
+        os.replace(temp_path, path)
+    return path, phash(image)
+
+
+def page_path(repo_path, save_id, page, size):
+    """Where the render of one page of a version at one size is cached"""
+    return os.path.join(repo_path, "pages", str(save_id), f"page_{page + 1}_{size[0]}x{size[1]}.png")
+
+
+def render_pages(repo_path, save_id, source, ext, pages, size):
+    """Render pages of a version into the page cache and return their paths"""
+    os.makedirs(os.path.dirname(page_path(repo_path, save_id, 0, size)), exist_ok=True)
+    paths = []
+    for page, image in _handler(ext).render_pages(source, size, pages):
+        path = page_path(repo_path, save_id, page, size)
+        # The preview and its prefetcher may render the same page at once
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        image.save(temp_path, "PNG")
+        os.replace(temp_path, path)
+        paths.append(path)
+    return paths
+
+
+def version_source(objects, manifests, save):
+    """The stored content of a save record as a file path, or as a temporary
+    copy for compressed and chunked versions, since decoders need to seek.
+    The copy is kept in memory up to SPOOL_SIZE and on disk beyond it."""
+    source = stored_path(objects, save)
+    if source:
+        return source
+    copy = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    with open_stored(objects, manifests, save) as f:
+        shutil.copyfileobj(f, copy, 1024 * 1024)
+    copy.seek(0)
+    return copy
+
+
+def decode_version(objects, manifests, save, full_quality=False):
+    """Decode the stored content of a save record into a PIL image"""
+    ext = os.path.splitext(save.get("filename") or save.get("file", ""))[1].lower()
+    return decode_image(version_source(objects, manifests, save), ext, full_quality)
+
+
+def render_version_thumbnail(repo_path, job, full_quality=False):
+    """Render the thumbnail and preview pyramid for a queued job and return
+    (thumbnail path, perceptual hash); runs in a worker process. Multi-page
+    documents also get a thumbnail for each further page in the page cache."""
+    objects = ObjectStore(os.path.join(repo_path, "objects"))
+    manifests = ObjectStore(os.path.join(repo_path, "manifests"))
+    ext = os.path.splitext(job["filename"])[1].lower()
+
+    source = version_source(objects, manifests, job)
+    result = render_preview_levels(source, ext, repo_path, job["id"], full_quality)
+    handler = _handler(ext)
+    if handler.paged:
+        try:
+            count = min(handler.page_count(source), MAX_PAGE_THUMBNAILS)
+            render_pages(repo_path, job["id"], source, ext, range(1, count), THUMBNAIL_SIZE)
+        except Exception as e:
+            # The first page's thumbnail is still usable
+            print(f"Failed to render page thumbnails for commit {job['id']}: {e}")
+    return result
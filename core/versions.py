@@ -0,0 +1,33 @@
+import io
+import os
+import json
+from .chunking import ChunkedReader
+
+
+def load_manifest(manifests, digest):
+    """Read the chunk manifest of a chunked version"""
+    with manifests.open(digest) as f:
+        return json.load(f)
+
+
+def stored_path(objects, save):
+    """Get the on-disk path of a version stored as a plain file, or None"""
+    if save.get("storage") == "chunked":
+        return None
+    # Older repos keep a full copy under v{id}/ instead of an object
+    if save.get("object"):
+        return objects.plain_path(save["object"])
+    return save.get("file")
+
+
+def open_stored(objects, manifests, save):
+    """Open the content of a save record for binary reading"""
+    if save.get("storage") == "chunked":
+        # Rebuild the file by streaming its chunks in order
+        manifest = load_manifest(manifests, save["object"])
+        return io.BufferedReader(ChunkedReader(objects, manifest["chunks"]), 1024 * 1024)
+    if save.get("object"):
+        return objects.open(save["object"])
+    if os.path.exists(save["file"]):
+        return open(save["file"], "rb")
+    raise FileNotFoundError(f"Version {save['id']} not found")
@@ -0,0 +1,89 @@
+import io
+import os
+import json
+import random
+import shutil
+import tempfile
+import unittest
+from core.chunking import iter_chunks, MIN_CHUNK_SIZE, MAX_CHUNK_SIZE
+from core.file_manager import FileManager
+from core.versions import load_manifest
+
+
+def random_bytes(size, seed):
+    return random.Random(seed).getrandbits(size * 8).to_bytes(size, "little")
+
+
+class TestIterChunks(unittest.TestCase):
+    def test_chunks_join_back_to_the_input(self):
+        data = random_bytes(5 * MAX_CHUNK_SIZE + 12345, 1)
+        chunks = list(iter_chunks(io.BytesIO(data)))
+        self.assertEqual(b"".join(chunks), data)
+        self.assertTrue(all(len(chunk) <= MAX_CHUNK_SIZE for chunk in chunks))
+        self.assertTrue(all(len(chunk) >= MIN_CHUNK_SIZE for chunk in chunks[:-1]))
+
+    def test_empty_and_small_inputs(self):
+        self.assertEqual(list(iter_chunks(io.BytesIO(b""))), [])
+        self.assertEqual(list(iter_chunks(io.BytesIO(b"abc"))), [b"abc"])
+
+    def test_boundaries_survive_an_insertion(self):
+        data = random_bytes(4 * MAX_CHUNK_SIZE, 2)
+        edited = data[:1000] + b"inserted" + data[1000:]
+        before = set(iter_chunks(io.BytesIO(data)))
+        after = list(iter_chunks(io.BytesIO(edited)))
+        # Only the chunk holding the edit differs
+        self.assertGreaterEqual(sum(chunk in before for chunk in after), len(after) - 2)
+
+
+class TestChunkedStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.repo = os.path.join(self.tmp, "repo")
+        os.makedirs(self.repo)
+        with open(os.path.join(self.repo, "config.json"), "w") as f:
+            json.dump({"storage_mode": "chunked", "compression": "zlib"}, f)
+        self.fm = FileManager(self.repo)
+
+    def tearDown(self):
+        self.fm.close()
+        shutil.rmtree(self.tmp)
+
+    def write(self, data):
+        path = os.path.join(self.tmp, "design.bmp")
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def manifest(self, save_id):
+        return load_manifest(self.fm.manifests, self.fm.get_commit(save_id)["object"])
+
+    def test_round_trip(self):
+        data = random_bytes(3 * MAX_CHUNK_SIZE, 3)
+        save_id = self.fm.save(self.write(data), "chunked")
+        self.assertEqual(self.fm.get_commit(save_id)["storage"], "chunked")
+        with self.fm.open_version(save_id) as f:
+            self.assertEqual(f.read(), data)
+        dest = os.path.join(self.tmp, "export.bmp")
+        self.fm.export_version(save_id, dest)
+        with open(dest, "rb") as f:
+            self.assertEqual(f.read(), data)
+
+    def test_versions_share_unchanged_chunks(self):
+        data = random_bytes(3 * MAX_CHUNK_SIZE, 4)
+        first = self.fm.save(self.write(data), "one")
+        second = self.fm.save(self.write(data[:-100] + b"x" * 100), "two")
+        chunks = [{digest for digest, _ in self.manifest(save_id)["chunks"]} for save_id in (first, second)]
+        shared = chunks[0] & chunks[1]
+        self.assertTrue(shared)
+        self.assertTrue(all(self.fm.store.ref_count("objects", digest) == 2 for digest in shared))
+
+        self.fm.delete_commits([first])
+        with self.fm.open_version(second) as f:
+            self.assertEqual(f.read(), data[:-100] + b"x" * 100)
+        self.assertTrue(all(self.fm.objects.has(digest) for digest in chunks[1]))
+        self.assertFalse(any(self.fm.objects.has(digest) for digest in chunks[0] - chunks[1]))
+        self.assertEqual(self.fm.gc(dry_run=True, grace_period=0)["refs_fixed"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import io
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import subprocess
+from contextlib import redirect_stdout, redirect_stderr
+from PIL import Image
+import cli
+from core.file_manager import FileManager
+
+CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cli.py")
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.repo = os.path.join(self.tmp, "repo")
+        self.red = os.path.join(self.tmp, "red.png")
+        self.blue = os.path.join(self.tmp, "blue.png")
+        Image.new("RGB", (32, 32), "red").save(self.red)
+        Image.new("RGB", (32, 32), "blue").save(self.blue)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def run_cli(self, *args):
+        """Run a command in this process; returns (exit code, stdout)"""
+        out = io.StringIO()
+        with redirect_stdout(out), redirect_stderr(io.StringIO()):
+            code = cli.main(["--repo", self.repo] + list(args))
+        return code, out.getvalue()
+
+    def test_commit_log_export(self):
+        code, out = self.run_cli("commit", self.red, "-m", "red square")
+        self.assertEqual((code, out.strip()), (0, f"{self.red}: committed as 0"))
+        self.run_cli("commit", self.blue, "-m", "blue square")
+
+        code, out = self.run_cli("log")
+        lines = out.splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn("blue square", lines[0])
+        self.assertIn("red square", lines[1])
+
+        dest = os.path.join(self.tmp, "out")
+        os.makedirs(dest)
+        code, out = self.run_cli("export", "0", dest)
+        self.assertEqual(code, 0)
+        with open(out.strip(), "rb") as exported, open(self.red, "rb") as original:
+            self.assertEqual(exported.read(), original.read())
+
+    def test_commit_if_changed_skips_unchanged_files(self):
+        self.run_cli("commit", self.red)
+        code, out = self.run_cli("commit", "--if-changed", self.red)
+        self.assertEqual(code, 0)
+        self.assertIn("unchanged, skipped", out)
+
+    def test_search(self):
+        self.run_cli("commit", self.red, "-m", "header draft")
+        self.run_cli("commit", self.blue, "-m", "footer")
+        code, out = self.run_cli("search", "head")
+        self.assertEqual(code, 0)
+        self.assertEqual(len(out.splitlines()), 1)
+        self.assertEqual(self.run_cli("search", "missing")[0], 1)
+
+    def test_missing_file_fails(self):
+        code, _ = self.run_cli("commit", os.path.join(self.tmp, "missing.png"))
+        self.assertEqual(code, 1)
+
+    def test_gc_on_a_clean_repo(self):
+        self.run_cli("commit", self.red)
+        code, out = self.run_cli("gc", "--grace", "0")
+        self.assertEqual(code, 0)
+        self.assertIn("Removed 0 objects, 0 manifests and 0 temp files", out)
+
+    def test_two_writers(self):
+        # The GUI keeps its FileManager open while the command line commits
+        fm = FileManager(self.repo)
+        try:
+            first = fm.save(self.red, "from the GUI")
+            result = subprocess.run([sys.executable, CLI, "--repo", self.repo, "commit", self.red, "-m", "from the CLI"],
+                                    capture_output=True, text=True, check=True)
+            cli_id = int(result.stdout.strip().rsplit(" ", 1)[1])
+            second = fm.save(self.blue, "from the GUI again")
+
+            self.assertEqual(len({first, cli_id, second}), 3)
+            saves = {save["id"]: save for save in fm.store.saves()}
+            self.assertEqual(saves[cli_id]["message"], "from the CLI")
+            self.assertEqual(saves[second]["message"], "from the GUI again")
+
+            # The GUI deleting its commit must not take the content the CLI committed too
+            digest = saves[first]["object"]
+            fm.delete_commits([first])
+            self.assertTrue(fm.objects.has(digest))
+            self.assertEqual(fm.store.ref_count("objects", digest), 1)
+            self.assertEqual(fm.gc(dry_run=True, grace_period=0),
+                             {"objects": 0, "manifests": 0, "temp_files": 0, "bytes": 0, "refs_fixed": 0})
+        finally:
+            fm.close()
+
+    def test_commits_from_another_process_stay_searchable(self):
+        fm = FileManager(self.repo)
+        try:
+            first = fm.save(self.red, "from the GUI")
+            subprocess.run([sys.executable, CLI, "--repo", self.repo, "commit", self.blue, "-m", "zebra"],
+                           capture_output=True, check=True)
+            # The GUI changes its own index after the command line committed
+            fm.update_commit(first, note="edited")
+        finally:
+            fm.close()
+        fm = FileManager(self.repo)
+        try:
+            self.assertEqual(len(fm.search_commits("zebra")), 1)
+            self.assertEqual(fm.search_commits("edited"), [first])
+        finally:
+            fm.close()
+
+    def test_thumbnail_jobs_from_another_process_are_kept(self):
+        fm = FileManager(self.repo)
+        try:
+            first = fm.save(self.red, "from the GUI")
+            subprocess.run([sys.executable, CLI, "--repo", self.repo, "commit", self.blue],
+                           capture_output=True, check=True)
+            fm.set_thumbnail(first, None)
+        finally:
+            fm.close()
+        fm = FileManager(self.repo)
+        try:
+            self.assertEqual([job["id"] for job in fm.thumbnail_queue.pending()], [first + 1])
+        finally:
+            fm.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+import unittest
+from PIL import Image
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PySide2.QtWidgets import QApplication
+from core.file_manager import FileManager
+from ui.widgets.commit_list import CommitList
+
+app = QApplication.instance() or QApplication([])
+
+
+class TestFilterCommits(unittest.TestCase):
+    def setUp(self):
+        self.repo = tempfile.mkdtemp()
+        self.fm = FileManager(self.repo)
+        path = os.path.join(self.repo, "design.png")
+        Image.new("RGB", (8, 8), "red").save(path)
+        for message in ("Logo draft", "Logo final", "Poster"):
+            self.fm.save(path, message)
+        self.commit_list = CommitList(self.fm)
+
+    def tearDown(self):
+        self.fm.close()
+        shutil.rmtree(self.repo)
+
+    def hidden_rows(self):
+        return [row for row in range(self.commit_list.count()) if self.commit_list.isRowHidden(row)]
+
+    def test_filter_and_clear(self):
+        self.commit_list.filter_commits("logo")
+        self.assertEqual(self.hidden_rows(), [2])
+        self.commit_list.filter_commits("logo fin")
+        self.assertEqual(self.hidden_rows(), [0, 2])
+        self.commit_list.filter_commits("")
+        self.assertEqual(self.hidden_rows(), [])
+
+    def test_query_without_words_shows_every_row(self):
+        self.commit_list.filter_commits("#")
+        self.assertEqual(self.hidden_rows(), [])
+        self.commit_list.filter_commits("poster")
+        self.commit_list.filter_commits(" - ")
+        self.assertEqual(self.hidden_rows(), [])
+        self.assertIsNone(self.commit_list.visible_ids)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from core.commit_scheduler import CommitScheduler, MISSING_TIMEOUT
+
+
+class FakeFiles:
+    """A clock and file stats the test moves by hand"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.stats = {}
+
+    def clock(self):
+        return self.now
+
+    def stat(self, path):
+        return self.stats.get(path)
+
+    def write(self, path, size):
+        self.stats[path] = (size, int(self.now * 1e9))
+
+
+class TestCommitScheduler(unittest.TestCase):
+    def setUp(self):
+        self.files = FakeFiles()
+        self.scheduler = CommitScheduler(stable_window=1.0, min_interval=5.0,
+                                         clock=self.files.clock, stat=self.files.stat)
+
+    def advance(self, seconds):
+        self.files.now += seconds
+        return self.scheduler.poll()
+
+    def test_waits_for_the_file_to_settle(self):
+        self.files.write("a.psd", 100)
+        self.scheduler.notify("a.psd")
+        self.assertEqual(self.advance(0.5), [])
+        # Still being written: the size changed, so the window starts over
+        self.files.write("a.psd", 200)
+        self.assertEqual(self.advance(0.6), [])
+        self.assertEqual(self.advance(0.6), [])
+        self.assertEqual(self.advance(0.5), ["a.psd"])
+        self.assertFalse(self.scheduler.has_pending())
+
+    def test_burst_of_events_gives_one_commit(self):
+        self.files.write("a.psd", 100)
+        for _ in range(10):
+            self.scheduler.notify("a.psd")
+            self.assertEqual(self.advance(0.2), [])
+        self.assertEqual(self.advance(1.0), ["a.psd"])
+        self.assertEqual(self.advance(1.0), [])
+
+    def test_min_interval_coalesces_later_saves(self):
+        self.files.write("a.psd", 100)
+        self.scheduler.notify("a.psd")
+        self.assertEqual(self.advance(1.0), ["a.psd"])
+        for size in (110, 120, 130):
+            self.files.write("a.psd", size)
+            self.scheduler.notify("a.psd")
+            self.assertEqual(self.advance(1.1), [])
+        # Settled, but the last commit was less than five seconds ago
+        self.assertEqual(self.advance(1.0), [])
+        self.assertEqual(self.advance(1.0), ["a.psd"])
+        self.assertEqual(self.advance(10.0), [])
+
+    def test_files_are_scheduled_independently(self):
+        self.files.write("a.psd", 1)
+        self.scheduler.notify("a.psd")
+        self.advance(0.5)
+        self.files.write("b.png", 1)
+        self.scheduler.notify("b.png")
+        self.assertEqual(self.advance(0.6), ["a.psd"])
+        self.assertEqual(self.advance(0.5), ["b.png"])
+
+    def test_replaced_file_is_kept_and_deleted_file_dropped(self):
+        self.files.write("a.psd", 1)
+        self.scheduler.notify("a.psd")
+        del self.files.stats["a.psd"]
+        self.assertEqual(self.advance(1.0), [])
+        self.files.write("a.psd", 2)
+        self.assertEqual(self.advance(0.1), [])
+        self.assertEqual(self.advance(1.0), ["a.psd"])
+
+        self.scheduler.notify("a.psd")
+        del self.files.stats["a.psd"]
+        self.advance(1.0)
+        self.advance(MISSING_TIMEOUT + 1)
+        self.assertFalse(self.scheduler.has_pending())
+
+    def test_forget(self):
+        self.files.write("a.psd", 1)
+        self.scheduler.notify("a.psd")
+        self.assertEqual(self.advance(1.0), ["a.psd"])
+        self.scheduler.forget("a.psd")
+        self.scheduler.notify("a.psd")
+        # No interval is held against a forgotten file
+        self.assertEqual(self.advance(1.0), ["a.psd"])
+
+
+if __name__ == "__main__":
+    unittest.main()
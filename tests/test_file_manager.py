@@ -0,0 +1,189 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from PIL import Image
+from core.file_manager import FileManager
+
+
+def write_image(path, color, size=(64, 48)):
+    Image.new("RGB", size, color).save(path)
+    return path
+
+
+class FileManagerTestCase(unittest.TestCase):
+    backend = "sqlite"
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.repo = os.path.join(self.tmp, "repo")
+        os.makedirs(self.repo)
+        with open(os.path.join(self.repo, "config.json"), "w") as f:
+            json.dump({"metadata_backend": self.backend}, f)
+        self.fm = FileManager(self.repo)
+
+    def tearDown(self):
+        self.fm.close()
+        shutil.rmtree(self.tmp)
+
+    def image(self, name, color, size=(64, 48)):
+        return write_image(os.path.join(self.tmp, name), color, size)
+
+    def reopen(self):
+        self.fm.close()
+        self.fm = FileManager(self.repo)
+        return self.fm
+
+
+class TestCommits(FileManagerTestCase):
+    def test_save_and_read_back(self):
+        path = self.image("a.png", "red")
+        save_id = self.fm.save(path, "first")
+        with open(path, "rb") as f, self.fm.open_version(save_id) as stored:
+            self.assertEqual(stored.read(), f.read())
+        self.assertEqual(self.fm.get_commit_message(save_id), "first")
+
+    def test_ids_are_not_reused_after_delete(self):
+        path = self.image("a.png", "red")
+        self.fm.save(path, "one")
+        second = self.fm.save(path, "two")
+        self.fm.delete_commits([second])
+        self.assertEqual(self.reopen().save(path, "three"), second + 1)
+
+    def test_commits_survive_reopening(self):
+        path = self.image("a.png", "red")
+        save_id = self.fm.save(path, "kept")
+        self.fm.update_commit(save_id, note="a note")
+        fm = self.reopen()
+        self.assertEqual(fm.get_commit_message(save_id), "kept")
+        self.assertEqual(fm.get_commit_note(save_id), "a note")
+
+    def test_previous_version(self):
+        a = self.image("a.png", "red")
+        b = self.image("b.png", "blue")
+        first = self.fm.save(a, "a1")
+        other = self.fm.save(b, "b1")
+        second = self.fm.save(a, "a2")
+        self.assertEqual(self.fm.previous_version(second)["id"], first)
+        self.assertIsNone(self.fm.previous_version(first))
+        self.assertIsNone(self.fm.previous_version(other))
+        self.fm.delete_commits([first])
+        self.assertIsNone(self.fm.previous_version(second))
+
+    def test_diff_versions_sizes_follow_the_order_asked(self):
+        first = self.fm.save(self.image("a.png", "red", (64, 48)), "wide")
+        second = self.fm.save(self.image("b.png", "red", (32, 48)), "narrow")
+        result = self.fm.diff_versions(first, second)
+        self.assertEqual(result.sizes, [(64, 48), (32, 48)])
+        self.assertEqual(result.boxes, [(32, 0, 64, 48)])
+        # The reverse order is answered from the same cached comparison
+        self.assertEqual(self.fm.diff_versions(second, first).sizes, [(32, 48), (64, 48)])
+        self.assertEqual(len(os.listdir(self.fm.diffs_dir)), 1)
+
+
+class TestReferenceCounts(FileManagerTestCase):
+    def test_identical_content_is_stored_once(self):
+        path = self.image("a.png", "red")
+        first = self.fm.save(path, "one")
+        second = self.fm.save(path, "two")
+        digest = self.fm.get_commit(first)["object"]
+        self.assertEqual(digest, self.fm.get_commit(second)["object"])
+        self.assertEqual(self.fm.store.ref_count("objects", digest), 2)
+        self.assertEqual(self.fm.metadata["objects"][digest], 2)
+
+    def test_delete_keeps_content_still_referenced(self):
+        path = self.image("a.png", "red")
+        first = self.fm.save(path, "one")
+        second = self.fm.save(path, "two")
+        digest = self.fm.get_commit(first)["object"]
+
+        self.assertEqual(self.fm.delete_commits([first]), 1)
+        self.assertTrue(self.fm.objects.has(digest))
+        self.assertEqual(self.fm.store.ref_count("objects", digest), 1)
+
+        self.assertEqual(self.fm.delete_commits([second]), 1)
+        self.assertFalse(self.fm.objects.has(digest))
+        self.assertEqual(self.fm.store.ref_count("objects", digest), 0)
+
+    def test_delete_removes_thumbnails(self):
+        save_id = self.fm.save(self.image("a.png", "red"), "one")
+        self.fm.render_pending_thumbnails()
+        thumbnail = self.fm.get_commit(save_id)["thumbnail"]
+        self.assertTrue(os.path.exists(thumbnail))
+        self.fm.delete_commits([save_id])
+        self.assertFalse(os.path.exists(thumbnail))
+
+
+    def test_failed_delete_changes_nothing(self):
+        path = self.image("a.png", "red")
+        first = self.fm.save(path, "red one")
+        second = self.fm.save(path, "two")
+        digest = self.fm.get_commit(first)["object"]
+
+        def fail(save_ids):
+            raise OSError("disk full")
+        self.fm.store.delete_saves = fail
+        self.assertEqual(self.fm.delete_commits([first]), 0)
+        del self.fm.store.delete_saves
+
+        self.assertEqual(self.fm.get_commit(first)["message"], "red one")
+        self.assertEqual([save["id"] for save in self.fm.get_commit_history()], [first, second])
+        self.assertEqual(self.fm.search_commits("red"), [first])
+        self.assertEqual(self.fm.metadata["objects"][digest], 2)
+        self.assertEqual(self.fm.store.ref_count("objects", digest), 2)
+        self.assertTrue(self.fm.objects.has(digest))
+
+
+
+class TestGarbageCollection(FileManagerTestCase):
+    def test_clean_repo_has_nothing_to_collect(self):
+        path = self.image("a.png", "red")
+        self.fm.save(path, "one")
+        self.fm.save(path, "two")
+        stats = self.fm.gc(grace_period=0)
+        self.assertEqual(stats, {"objects": 0, "manifests": 0, "temp_files": 0, "bytes": 0, "refs_fixed": 0})
+
+    def test_orphans_are_removed(self):
+        save_id = self.fm.save(self.image("a.png", "red"), "kept")
+        version = self.fm.store_version(self.image("b.png", "blue"))
+        # Stored but never recorded, as after a crash mid-commit
+        self.assertTrue(self.fm.objects.has(version["digest"]))
+
+        self.assertEqual(self.fm.gc(dry_run=True, grace_period=0)["objects"], 1)
+        self.assertTrue(self.fm.objects.has(version["digest"]))
+        self.assertEqual(self.fm.gc(grace_period=0)["objects"], 1)
+        self.assertFalse(self.fm.objects.has(version["digest"]))
+        self.assertTrue(self.fm.objects.has(self.fm.get_commit(save_id)["object"]))
+
+    def test_grace_period_keeps_recent_files(self):
+        version = self.fm.store_version(self.image("b.png", "blue"))
+        self.assertEqual(self.fm.gc()["objects"], 0)
+        self.assertTrue(self.fm.objects.has(version["digest"]))
+
+    def test_wrong_reference_counts_are_repaired(self):
+        save_id = self.fm.save(self.image("a.png", "red"), "one")
+        digest = self.fm.get_commit(save_id)["object"]
+        self.fm.store.set_ref("objects", digest, 5)
+        self.fm.metadata["objects"][digest] = 5
+        self.fm.store.commit()
+
+        self.assertEqual(self.fm.gc(grace_period=0)["refs_fixed"], 1)
+        self.assertEqual(self.fm.store.ref_count("objects", digest), 1)
+        self.assertEqual(self.fm.gc(grace_period=0)["refs_fixed"], 0)
+
+
+class TestCommitsJson(TestCommits):
+    backend = "json"
+
+
+class TestReferenceCountsJson(TestReferenceCounts):
+    backend = "json"
+
+
+class TestGarbageCollectionJson(TestGarbageCollection):
+    backend = "json"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+import unittest
+from PIL import Image
+from core import formats
+from core.formats import handler_for, register_handler, supported_formats, FormatHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestRegistry(unittest.TestCase):
+    def test_handler_for_names_and_extensions(self):
+        self.assertEqual(handler_for("design.PSD").name, "Photoshop")
+        self.assertEqual(handler_for(".pdf").name, "PDF")
+        self.assertEqual(handler_for("logo.ai").name, "Illustrator")
+        self.assertEqual(handler_for("/work/photo.jpeg").name, "Image")
+        self.assertIsNone(handler_for("notes.txt"))
+        self.assertIsNone(handler_for("README"))
+
+    def test_supported_formats(self):
+        self.assertEqual(set(supported_formats()),
+                         {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".psd", ".ai", ".svg", ".pdf"})
+
+    def test_later_handler_replaces_earlier(self):
+        class TiffHandler(FormatHandler):
+            name = "TIFF"
+            extensions = (".tif", ".png")
+
+        handlers = list(formats._handlers)
+        by_extension = dict(formats._by_extension)
+        try:
+            register_handler(TiffHandler())
+            self.assertEqual(handler_for("scan.tif").name, "TIFF")
+            self.assertEqual(handler_for("a.png").name, "TIFF")
+            self.assertIn(".tif", supported_formats())
+        finally:
+            formats._handlers[:] = handlers
+            formats._by_extension.clear()
+            formats._by_extension.update(by_extension)
+        self.assertEqual(handler_for("a.png").name, "Image")
+
+    def test_decoding_libraries_load_on_first_use(self):
+        code = ("import sys, core.formats; "
+                "print(sorted(m for m in ('fitz', 'psd_tools', 'cairosvg') if m in sys.modules))")
+        output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), "[]")
+
+
+class TestHandlers(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_raster_thumbnail_and_frames(self):
+        path = os.path.join(self.tmp, "anim.gif")
+        frames = [Image.new("RGB", (200, 100), color) for color in ("red", "blue", "green")]
+        frames[0].save(path, save_all=True, append_images=frames[1:])
+        handler = handler_for(path)
+        self.assertEqual(handler.page_count(path), 3)
+        self.assertEqual(handler.thumbnail(path, (50, 50)).size, (50, 25))
+        pages = dict(handler.render_pages(path, (50, 50), [2]))
+        self.assertEqual(pages[2].size, (50, 25))
+
+    def test_pdf_pages_render_at_the_requested_size(self):
+        import fitz
+        path = os.path.join(self.tmp, "doc.pdf")
+        document = fitz.open()
+        for _ in range(2):
+            document.new_page(width=200, height=100)
+        document.save(path)
+        document.close()
+        handler = handler_for(path)
+        self.assertEqual(handler.page_count(path), 2)
+        pages = dict(handler.render_pages(path, (100, 100), [0, 1]))
+        self.assertEqual(pages[1].size, (100, 50))
+        with open(path, "rb") as f:
+            self.assertEqual(handler.thumbnail(f, (100, 100)).size, (100, 50))
+        with self.assertRaises(ValueError):
+            list(handler.render_pages(path, (100, 100), [2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
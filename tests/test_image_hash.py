@@ -0,0 +1,66 @@
+import random
+import unittest
+from PIL import Image, ImageDraw
+from core.image_hash import phash, hamming, MultiIndexHash
+
+
+def flip_bits(image_hash, bits):
+    value = int(image_hash, 16)
+    for bit in bits:
+        value ^= 1 << bit
+    return f"{value:016x}"
+
+
+class TestPhash(unittest.TestCase):
+    def test_resized_image_hashes_close(self):
+        image = Image.new("RGB", (256, 192), "white")
+        draw = ImageDraw.Draw(image)
+        draw.rectangle((20, 30, 120, 150), fill="navy")
+        draw.ellipse((140, 40, 230, 170), fill="orange")
+        image_hash = phash(image)
+        self.assertEqual(len(image_hash), 16)
+        self.assertLessEqual(hamming(image_hash, phash(image.resize((128, 96)))), 4)
+
+    def test_hamming(self):
+        self.assertEqual(hamming("0" * 16, "0" * 16), 0)
+        self.assertEqual(hamming("0" * 16, "f" * 16), 64)
+        self.assertEqual(hamming("0" * 15 + "3", "0" * 16), 2)
+
+
+class TestMultiIndexHash(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(5)
+        self.hashes = [f"{rng.getrandbits(64):016x}" for _ in range(200)]
+        self.index = MultiIndexHash()
+        for item, image_hash in enumerate(self.hashes):
+            self.index.add(image_hash, item)
+
+    def brute_force(self, image_hash, max_distance):
+        return sorted((hamming(image_hash, other), item) for item, other in enumerate(self.hashes)
+                      if hamming(image_hash, other) <= max_distance)
+
+    def test_search_matches_brute_force(self):
+        for max_distance in (0, 3, 8, 12):
+            query = flip_bits(self.hashes[7], [0, 17, 40])
+            self.assertEqual(sorted(self.index.search(query, max_distance)),
+                             self.brute_force(query, max_distance))
+
+    def test_results_are_closest_first(self):
+        self.index.add(flip_bits(self.hashes[3], [5]), "near")
+        self.index.add(flip_bits(self.hashes[3], [1, 20, 33, 50, 63]), "far")
+        found = self.index.search(self.hashes[3], 5)
+        self.assertEqual(found[:3], [(0, 3), (1, "near"), (5, "far")])
+
+    def test_remove(self):
+        self.index.add(self.hashes[0], "copy")
+        self.index.remove(self.hashes[0], 0)
+        self.assertEqual(self.index.search(self.hashes[0], 0), [(0, "copy")])
+        self.assertEqual(self.index.size, 200)
+        # Removing what is not there leaves the count alone
+        self.index.remove(self.hashes[0], 0)
+        self.index.remove("0123456789abcdef", "missing")
+        self.assertEqual(self.index.size, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
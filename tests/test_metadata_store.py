@@ -0,0 +1,136 @@
+import os
+import json
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from core.metadata_store import open_metadata_store, SqliteMetadataStore
+
+
+def save_record(save_id, digest, branch="main"):
+    return {"id": save_id, "timestamp": f"2024-01-0{save_id + 1} 10:00:00", "branch": branch,
+            "filename": f"design_{save_id}.png", "object": digest, "storage": "whole",
+            "message": f"commit {save_id}"}
+
+
+class TestJsonImport(unittest.TestCase):
+    def setUp(self):
+        self.repo = tempfile.mkdtemp()
+        self.json_file = os.path.join(self.repo, "metadata.json")
+        self.metadata = {
+            "saves": [save_record(0, "aa"), save_record(1, "aa"), save_record(2, "bb", "feature")],
+            "objects": {"aa": 2, "bb": 1},
+            "manifests": {},
+            "next_id": 5,
+        }
+        with open(self.json_file, "w") as f:
+            json.dump(self.metadata, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.repo)
+
+    def test_import_copies_everything(self):
+        store = open_metadata_store(self.repo)
+        try:
+            self.assertIsInstance(store, SqliteMetadataStore)
+            metadata = store.load()
+            self.assertEqual(metadata["saves"], self.metadata["saves"])
+            self.assertEqual(metadata["objects"], {"aa": 2, "bb": 1})
+            self.assertEqual(metadata["next_id"], 5)
+            self.assertEqual(store.reserve_id(), 5)
+        finally:
+            store.close()
+
+    def test_import_runs_once(self):
+        open_metadata_store(self.repo).close()
+        self.assertFalse(os.path.exists(self.json_file))
+        self.assertTrue(os.path.exists(self.json_file + ".imported"))
+
+        store = open_metadata_store(self.repo)
+        try:
+            self.assertEqual(len(store.load()["saves"]), 3)
+        finally:
+            store.close()
+
+    def test_interrupted_import_is_redone(self):
+        with open(os.path.join(self.repo, "metadata.db.importing"), "w") as f:
+            f.write("partial")
+        store = open_metadata_store(self.repo)
+        try:
+            self.assertEqual(len(store.load()["saves"]), 3)
+        finally:
+            store.close()
+        self.assertFalse(os.path.exists(os.path.join(self.repo, "metadata.db.importing")))
+
+    def test_reused_ids_get_new_ids(self):
+        # Older versions numbered commits by position, so ids came back after deletes
+        self.metadata["saves"].append(dict(save_record(1, "bb"), message="later"))
+        with open(self.json_file, "w") as f:
+            json.dump(self.metadata, f)
+        store = open_metadata_store(self.repo)
+        try:
+            metadata = store.load()
+            self.assertEqual([(save["id"], save["message"]) for save in metadata["saves"]],
+                             [(0, "commit 0"), (1, "commit 1"), (2, "commit 2"), (5, "later")])
+            self.assertEqual(metadata["next_id"], 6)
+        finally:
+            store.close()
+
+
+class TestSqliteStore(unittest.TestCase):
+    def setUp(self):
+        self.repo = tempfile.mkdtemp()
+        self.store = SqliteMetadataStore(os.path.join(self.repo, "metadata.db"))
+        self.store.load()
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.repo)
+
+    def test_reserved_ids_are_unique_across_connections(self):
+        other = SqliteMetadataStore(os.path.join(self.repo, "metadata.db"))
+        try:
+            other.load()
+            ids = [self.store.reserve_id(), other.reserve_id(), self.store.reserve_id(), other.reserve_id()]
+        finally:
+            other.close()
+        self.assertEqual(ids, [0, 1, 2, 3])
+
+    def test_add_save_refuses_a_duplicate_id(self):
+        self.store.add_save(save_record(0, "aa"))
+        self.store.commit()
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.store.add_save(save_record(0, "bb"))
+        self.store.rollback()
+        self.assertEqual(self.store.saves()[0]["object"], "aa")
+
+    def test_reference_counts_change_by_delta(self):
+        other = SqliteMetadataStore(os.path.join(self.repo, "metadata.db"))
+        try:
+            self.assertEqual(self.store.change_ref("objects", "aa", 1), 1)
+            self.store.commit()
+            self.assertEqual(other.change_ref("objects", "aa", 1), 2)
+            other.commit()
+            self.assertEqual(self.store.change_ref("objects", "aa", -1), 1)
+            self.store.commit()
+            self.assertEqual(other.change_ref("objects", "aa", -1), 0)
+            other.commit()
+        finally:
+            other.close()
+        self.assertEqual(self.store.refs("objects"), {})
+
+    def test_increment_counts_across_connections(self):
+        other = SqliteMetadataStore(os.path.join(self.repo, "metadata.db"))
+        try:
+            self.assertEqual(self.store.increment("search_revision"), 1)
+            self.store.commit()
+            self.assertEqual(other.increment("search_revision"), 2)
+            other.commit()
+        finally:
+            other.close()
+        self.assertEqual(self.store.value("search_revision"), 2)
+        self.assertIsNone(self.store.value("missing"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import shutil
+import hashlib
+import tempfile
+import unittest
+from core.object_store import ObjectStore, hash_file
+
+
+class TestObjectStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.store = ObjectStore(os.path.join(self.tmp, "objects"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_objects_are_addressed_by_content(self):
+        digest = self.store.add_bytes(b"layer data")
+        self.assertEqual(digest, hashlib.sha256(b"layer data").hexdigest())
+        self.assertTrue(self.store.has(digest))
+        with self.store.open(digest) as f:
+            self.assertEqual(f.read(), b"layer data")
+
+    def test_add_file_matches_add_bytes(self):
+        path = os.path.join(self.tmp, "design.psd")
+        with open(path, "wb") as f:
+            f.write(b"x" * 100000)
+        digest = self.store.add_file(path)
+        self.assertEqual(digest, hash_file(path))
+        self.assertEqual(self.store.add_bytes(b"x" * 100000), digest)
+        self.assertEqual([found for found, _, _, _ in self.store.iter_files()], [digest])
+
+    def test_existing_objects_are_not_rewritten(self):
+        digest = self.store.add_bytes(b"same")
+        path = self.store.plain_path(digest)
+        mtime = os.stat(path).st_mtime_ns
+        os.utime(path, ns=(mtime - 10 ** 9, mtime - 10 ** 9))
+        self.store.add_bytes(b"same")
+        self.assertEqual(os.stat(path).st_mtime_ns, mtime - 10 ** 9)
+
+    def test_remove(self):
+        digest = self.store.add_bytes(b"gone soon")
+        self.store.remove(digest)
+        self.assertFalse(self.store.has(digest))
+        self.assertFalse(os.path.exists(os.path.dirname(self.store.object_path(digest))))
+        with self.assertRaises(FileNotFoundError):
+            self.store.open(digest)
+
+    def test_leftover_temp_files_are_listed_without_a_digest(self):
+        digest = self.store.add_bytes(b"kept")
+        temp_path = os.path.join(os.path.dirname(self.store.object_path(digest)), ".tmp_interrupted")
+        with open(temp_path, "wb") as f:
+            f.write(b"partial")
+        found = {path: found_digest for found_digest, path, _, _ in self.store.iter_files()}
+        self.assertIsNone(found[temp_path])
+        self.assertIn(digest, found.values())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+from PIL import Image, ImageDraw
+from core.pixel_diff import PixelDiff, diff_images, diff_decoded
+
+
+def canvas(size=(400, 300), color="white"):
+    return Image.new("RGB", size, color)
+
+
+class TestDiffImages(unittest.TestCase):
+    def test_identical_images(self):
+        result = diff_images(canvas(), canvas())
+        self.assertEqual(result.boxes, [])
+        self.assertEqual(result.changed_pixels, 0)
+        self.assertEqual(result.sizes, [(400, 300), (400, 300)])
+
+    def test_changed_regions_are_boxed_largest_first(self):
+        edited = canvas()
+        draw = ImageDraw.Draw(edited)
+        draw.rectangle((10, 10, 29, 29), fill="black")
+        draw.rectangle((200, 100, 299, 199), fill="red")
+        result = diff_images(canvas(), edited)
+        self.assertEqual(result.cell_size, 1)
+        self.assertEqual(result.boxes, [(200, 100, 300, 200), (10, 10, 30, 30)])
+        self.assertEqual(result.changed_pixels, 100 * 100 + 20 * 20)
+        self.assertAlmostEqual(result.changed_fraction, 10400 / 120000)
+
+    def test_small_differences_are_noise(self):
+        self.assertEqual(diff_images(canvas(color=(100, 100, 100)), canvas(color=(110, 95, 100))).boxes, [])
+
+    def test_size_mismatch(self):
+        # The uncovered strip of the wider image counts as changed
+        result = diff_images(canvas((400, 300)), canvas((300, 300)))
+        self.assertEqual((result.width, result.height), (400, 300))
+        self.assertEqual(result.sizes, [(400, 300), (300, 300)])
+        self.assertEqual(result.boxes, [(300, 0, 400, 300)])
+        self.assertEqual(result.changed_pixels, 100 * 300)
+
+    def test_save_and_load(self):
+        edited = canvas()
+        ImageDraw.Draw(edited).rectangle((0, 0, 49, 49), fill="black")
+        result = diff_images(canvas(), edited)
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, "diff.npz")
+            result.save(path)
+            loaded = PixelDiff.load(path)
+        finally:
+            shutil.rmtree(tmp)
+        self.assertEqual(loaded.boxes, result.boxes)
+        self.assertEqual(loaded.sizes, result.sizes)
+        self.assertEqual(loaded.changed_pixels, result.changed_pixels)
+        self.assertEqual(loaded.heatmap.tolist(), result.heatmap.tolist())
+
+
+class TestDiffDecoded(unittest.TestCase):
+    def test_large_canvases_are_compared_at_a_reduced_scale(self):
+        old = canvas((2000, 1000))
+        new = canvas((1000, 1000))
+        ImageDraw.Draw(new).rectangle((400, 100, 499, 199), fill="black")
+        result = diff_decoded([lambda: old, lambda: new], max_side=500)
+        self.assertEqual((result.width, result.height), (2000, 1000))
+        self.assertEqual(result.sizes, [(2000, 1000), (1000, 1000)])
+        # The edit and the strip only the old version covers, in full-size pixels
+        self.assertEqual(result.boxes[0], (1000, 0, 2000, 1000))
+        left, top, right, bottom = result.boxes[1]
+        self.assertLessEqual(abs(left - 400) + abs(top - 100) + abs(right - 500) + abs(bottom - 200), 24)
+
+    def test_swapped(self):
+        result = diff_images(canvas((400, 300)), canvas((300, 200)))
+        self.assertEqual(result.swapped().sizes, [(300, 200), (400, 300)])
+        self.assertEqual(result.swapped().boxes, result.boxes)
+
+
+if __name__ == "__main__":
+    unittest.main()
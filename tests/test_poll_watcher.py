@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+from core.poll_watcher import PollingWatcher, is_watched_name
+
+
+def write(path, data=b"x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+class TestPollingWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.watcher = PollingWatcher([".psd", ".png"], min_interval=1.0, max_interval=8.0)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def full_pass(self, max_entries=2000):
+        changed = []
+        while True:
+            found, delay = self.watcher.step(max_entries)
+            changed.extend(found)
+            if delay:
+                return sorted(changed)
+
+    def test_watched_names(self):
+        extensions = (".psd", ".png")
+        self.assertTrue(is_watched_name("Logo.PSD", extensions))
+        self.assertFalse(is_watched_name("notes.txt", extensions))
+        self.assertFalse(is_watched_name("~$logo.psd", extensions))
+        self.assertFalse(is_watched_name(".logo.psd", extensions))
+
+    def test_new_tree_is_listed_by_steps_without_reports(self):
+        files = [write(os.path.join(self.tmp, f"dir{i}", f"file{i}.psd")) for i in range(5)]
+        self.watcher.add_tree(self.tmp)
+        self.assertTrue(self.watcher.listing())
+        self.assertEqual(self.watcher.watched_files(), [])
+        # One directory per step
+        self.assertEqual(self.watcher.step(max_entries=1), ([], 0))
+        self.assertEqual(self.full_pass(max_entries=1), [])
+        self.assertFalse(self.watcher.listing())
+        self.assertEqual(self.watcher.watched_files(), sorted(files))
+        self.assertEqual(self.full_pass(), [])
+
+    def test_changed_and_new_files_are_reported(self):
+        changed = write(os.path.join(self.tmp, "a.psd"))
+        write(os.path.join(self.tmp, "b.png"))
+        self.watcher.add_tree(self.tmp)
+        self.full_pass()
+
+        write(changed, b"longer")
+        created = write(os.path.join(self.tmp, "c.png"))
+        write(os.path.join(self.tmp, "notes.txt"))
+        self.assertEqual(self.full_pass(), sorted([changed, created]))
+        self.assertEqual(self.full_pass(), [])
+
+    def test_files_in_new_subdirectories_are_reported(self):
+        self.watcher.add_tree(self.tmp)
+        self.full_pass()
+        nested = write(os.path.join(self.tmp, "new", "deeper", "d.psd"))
+        self.assertEqual(self.full_pass(), [nested])
+        self.assertIn(nested, self.watcher.watched_files())
+
+    def test_single_files(self):
+        path = write(os.path.join(self.tmp, "single.psd"))
+        self.watcher.add_file(path)
+        self.assertEqual(self.full_pass(), [])
+        write(path, b"edited")
+        self.assertEqual(self.full_pass(), [path])
+        os.remove(path)
+        self.assertEqual(self.full_pass(), [])
+        self.assertIsNone(self.watcher.stat(path))
+
+    def test_quiet_passes_back_off(self):
+        write(os.path.join(self.tmp, "a.psd"))
+        self.watcher.add_tree(self.tmp)
+        self.full_pass()
+        delays = []
+        for _ in range(4):
+            self.watcher.step()
+            delays.append(self.watcher.interval)
+        self.assertEqual(delays, [2.0, 4.0, 8.0, 8.0])
+        write(os.path.join(self.tmp, "b.psd"))
+        self.full_pass()
+        self.assertEqual(self.watcher.interval, 1.0)
+
+    def test_removed_tree_is_not_listed(self):
+        write(os.path.join(self.tmp, "a.psd"))
+        self.watcher.add_tree(self.tmp)
+        self.watcher.remove_tree(self.tmp)
+        self.full_pass()
+        self.assertEqual(self.watcher.watched_files(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
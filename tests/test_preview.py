@@ -0,0 +1,47 @@
+import os
+import unittest
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PySide2.QtWidgets import QApplication
+from PySide2.QtGui import QPixmap, QColor
+from core.pixel_diff import PixelDiff
+from ui.widgets.preview import PreviewWidget
+
+app = QApplication.instance() or QApplication([])
+
+
+class TestShowDiff(unittest.TestCase):
+    def setUp(self):
+        self.preview = PreviewWidget()
+        self.preview.base_pixmap = QPixmap(500, 500)
+        self.preview.base_pixmap.fill(QColor("white"))
+
+    def shown(self, x, y):
+        color = self.preview.pixmap().toImage().pixelColor(x, y)
+        return color.red(), color.green(), color.blue()
+
+    def test_overlay_covers_only_the_newer_version(self):
+        # Old version 2000 x 1000, new one 1000 x 1000 shown at half size
+        cell = 4
+        heatmap = np.zeros((250, 500), dtype=np.uint8)
+        heatmap[25:50, 225:250] = 255
+        heatmap[:, 250:] = 255
+        boxes = [(1000, 0, 2000, 1000), (900, 100, 1000, 200)]
+        result = PixelDiff(2000, 1000, cell, heatmap, boxes, 100 * 100 + 1000 * 1000,
+                           [(2000, 1000), (1000, 1000)])
+        self.preview.show_diff(result)
+        self.assertEqual(self.preview.pixmap().size(), self.preview.base_pixmap.size())
+
+        # The change at x=900 is drawn at x=450
+        red, green, blue = self.shown(475, 75)
+        self.assertGreater(red, 200)
+        self.assertLess(green, 150)
+        self.assertEqual(self.shown(425, 75), (255, 255, 255))
+        # Nothing of the strip only the old version covers
+        self.assertEqual(self.shown(300, 300), (255, 255, 255))
+        self.assertEqual(self.shown(20, 400), (255, 255, 255))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PySide2.QtWidgets import QApplication
+from PySide2.QtGui import QPixmap
+from ui.widgets.preview_cache import PreviewCache
+
+app = QApplication.instance() or QApplication([])
+
+
+def pixmap(width, height=100):
+    return QPixmap(width, height)
+
+
+class TestPreviewCache(unittest.TestCase):
+    def setUp(self):
+        self.unit = PreviewCache.cost(pixmap(100))
+        self.cache = PreviewCache(3 * self.unit)
+
+    def test_cost_is_the_uncompressed_size(self):
+        self.assertEqual(PreviewCache.cost(pixmap(100, 50)), 100 * 50 * max(pixmap(1).depth(), 8) // 8)
+
+    def test_least_recently_used_is_evicted_first(self):
+        for key in "abc":
+            self.cache.put(key, pixmap(100))
+        # Reading a leaves b the oldest
+        self.assertIsNotNone(self.cache.get("a"))
+        self.cache.put("d", pixmap(100))
+        self.assertNotIn("b", self.cache)
+        self.assertEqual(list(self.cache.pixmaps), ["c", "a", "d"])
+        self.assertEqual(self.cache.used, 3 * self.unit)
+
+    def test_large_pixmap_evicts_several(self):
+        for key in "abc":
+            self.cache.put(key, pixmap(100))
+        self.cache.put("wide", pixmap(200))
+        self.assertEqual(list(self.cache.pixmaps), ["c", "wide"])
+        self.assertEqual(self.cache.used, 3 * self.unit)
+
+    def test_pixmap_over_budget_is_not_cached(self):
+        self.cache.put("a", pixmap(100))
+        self.cache.put("huge", pixmap(400))
+        self.assertNotIn("huge", self.cache)
+        self.assertIn("a", self.cache)
+
+    def test_replacing_a_key_updates_the_total(self):
+        self.cache.put("a", pixmap(100))
+        self.cache.put("a", pixmap(200))
+        self.assertEqual(self.cache.used, 2 * self.unit)
+        self.cache.discard("a")
+        self.cache.discard("missing")
+        self.assertEqual(self.cache.used, 0)
+        self.assertIsNone(self.cache.get("a"))
+
+    def test_zero_budget_caches_nothing(self):
+        cache = PreviewCache(0)
+        cache.put("a", pixmap(100))
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.used, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import io
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from PIL import Image
+from core.formats import PsdHandler
+from core.psd_preview import (read_preview_resources, has_merged_image, embedded_thumbnail,
+                              THUMBNAIL_RESOURCE, THUMBNAIL_RESOURCE_PS4, VERSION_INFO_RESOURCE)
+
+
+def resource_block(resource_id, data):
+    block = b"8BIM" + struct.pack(">H", resource_id) + b"\0\0" + struct.pack(">I", len(data)) + data
+    return block + b"\0" * (len(data) % 2)
+
+
+def thumbnail_resource(image):
+    jpeg = io.BytesIO()
+    image.save(jpeg, "JPEG", quality=95)
+    jpeg = jpeg.getvalue()
+    row_bytes = (image.width * 24 + 31) // 32 * 4
+    return struct.pack(">6I2H", 1, image.width, image.height, row_bytes,
+                       row_bytes * image.height, len(jpeg), 24, 1) + jpeg
+
+
+def version_info(has_merged):
+    # Version, then the "has real merged data" flag
+    return struct.pack(">IB", 1, 1 if has_merged else 0) + b"\0" * 8
+
+
+def build_psd(color, size=(300, 200), resources=()):
+    """A flat RGB PSD with raw image data and the given (id, data) resources"""
+    width, height = size
+    header = b"8BPS" + struct.pack(">H6xHIIHH", 1, 3, height, width, 8, 3)
+    section = b"".join(resource_block(resource_id, data) for resource_id, data in resources)
+    planes = b"".join(bytes([value]) * (width * height) for value in color)
+    return (header + struct.pack(">I", 0) + struct.pack(">I", len(section)) + section
+            + struct.pack(">I", 0) + struct.pack(">H", 0) + planes)
+
+
+class TestPreviewResources(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write(self, data):
+        path = os.path.join(self.tmp, "design.psd")
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_only_preview_resources_are_read(self):
+        thumbnail = thumbnail_resource(Image.new("RGB", (160, 107), "blue"))
+        data = build_psd((255, 0, 0), resources=[(1005, b"resolution"), (THUMBNAIL_RESOURCE, thumbnail),
+                                                 (VERSION_INFO_RESOURCE, version_info(True))])
+        resources = read_preview_resources(self.write(data))
+        self.assertEqual(set(resources), {THUMBNAIL_RESOURCE, VERSION_INFO_RESOURCE})
+        self.assertEqual(resources[THUMBNAIL_RESOURCE], thumbnail)
+
+        # File objects are read from the start and left there
+        f = io.BytesIO(data)
+        f.seek(100)
+        self.assertEqual(read_preview_resources(f), resources)
+        self.assertEqual(f.tell(), 0)
+
+    def test_not_a_psd(self):
+        with self.assertRaises(ValueError):
+            read_preview_resources(io.BytesIO(b"\x89PNG" + b"\0" * 40))
+
+    def test_has_merged_image(self):
+        self.assertTrue(has_merged_image({VERSION_INFO_RESOURCE: version_info(True)}))
+        self.assertFalse(has_merged_image({VERSION_INFO_RESOURCE: version_info(False)}))
+        self.assertTrue(has_merged_image({}))
+
+    def test_embedded_thumbnail(self):
+        resources = {THUMBNAIL_RESOURCE: thumbnail_resource(Image.new("RGB", (160, 107), (0, 0, 255)))}
+        image = embedded_thumbnail(resources)
+        self.assertEqual(image.size, (160, 107))
+        self.assertGreater(image.getpixel((80, 50))[2], 240)
+        self.assertIsNone(embedded_thumbnail({}))
+
+    def test_photoshop_4_thumbnail_has_red_and_blue_swapped(self):
+        resources = {THUMBNAIL_RESOURCE_PS4: thumbnail_resource(Image.new("RGB", (64, 64), (0, 0, 255)))}
+        red, green, blue = embedded_thumbnail(resources).getpixel((32, 32))
+        self.assertGreater(red, 240)
+        self.assertLess(blue, 15)
+
+
+class TestPsdHandler(unittest.TestCase):
+    """The stored image is red, the embedded thumbnail blue and the layers green"""
+
+    def setUp(self):
+        self.handler = PsdHandler()
+        self.composited = []
+        self.handler._composite = self.composite
+
+    def composite(self, source):
+        self.composited.append(source)
+        return Image.new("RGB", (300, 200), "green")
+
+    def psd(self, thumbnail=False, merged=True):
+        resources = [(VERSION_INFO_RESOURCE, version_info(merged))]
+        if thumbnail:
+            resources.append((THUMBNAIL_RESOURCE, thumbnail_resource(Image.new("RGB", (160, 107), "blue"))))
+        return io.BytesIO(build_psd((255, 0, 0), resources=resources))
+
+    def color(self, image):
+        return max(range(3), key=lambda channel: image.getpixel((image.width // 2, image.height // 2))[channel])
+
+    def test_small_thumbnails_use_the_embedded_preview(self):
+        image = self.handler.thumbnail(self.psd(thumbnail=True), (100, 100))
+        self.assertEqual((self.color(image), image.size), (2, (100, 67)))
+        self.assertEqual(self.composited, [])
+
+    def test_larger_thumbnails_use_the_stored_image(self):
+        image = self.handler.thumbnail(self.psd(thumbnail=True), (256, 256))
+        self.assertEqual((self.color(image), image.size), (0, (256, 171)))
+        self.assertEqual(self.color(self.handler.decode(self.psd())), 0)
+        self.assertEqual(self.composited, [])
+
+    def test_embedded_preview_when_no_image_was_stored(self):
+        image = self.handler.thumbnail(self.psd(thumbnail=True, merged=False), (256, 256))
+        self.assertEqual(self.color(image), 2)
+        self.assertEqual(self.composited, [])
+
+    def test_layers_are_composited_when_nothing_is_stored(self):
+        self.assertEqual(self.color(self.handler.thumbnail(self.psd(merged=False), (256, 256))), 1)
+        self.assertEqual(self.color(self.handler.decode(self.psd(merged=False))), 1)
+        self.assertEqual(len(self.composited), 2)
+
+    def test_full_quality_composites(self):
+        self.assertEqual(self.color(self.handler.thumbnail(self.psd(thumbnail=True), (100, 100), True)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from datetime import date
+from core.query_engine import CommitQuery, CommitQueryIndex
+from core.search_index import SearchIndex
+
+
+def save_record(save_id, day, filename, message, note=""):
+    return {"id": save_id, "timestamp": f"2024-03-{day:02d} 12:30:00", "filename": filename,
+            "message": message, "note": note}
+
+
+SAVES = [
+    save_record(0, 1, "logo.psd", "Logo draft v1"),
+    save_record(1, 2, "logo.PSD", "Logo draft v2", "client feedback"),
+    save_record(2, 2, "poster.png", "Poster layout"),
+    save_record(3, 5, "poster.pdf", "Poster print v10"),
+]
+
+
+class QueryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.query_index = CommitQueryIndex()
+        self.search_index = SearchIndex()
+        # Added out of order to exercise the sorted insert
+        for save in reversed(SAVES):
+            self.query_index.add(save)
+        self.search_index.build(SAVES)
+
+    def run_query(self, query):
+        candidates = query.candidates(self.query_index, self.search_index)
+        if not query.needs_scan():
+            return sorted(candidates)
+        records = [(save["id"], save["message"], save.get("note", "")) for save in SAVES
+                   if save["id"] in candidates]
+        return query.scan(records)
+
+
+class TestCommitQueryIndex(QueryTestCase):
+    def test_dates_are_inclusive(self):
+        self.assertEqual(self.query_index.ids_between(date(2024, 3, 2), date(2024, 3, 2)), {1, 2})
+        self.assertEqual(self.query_index.ids_between(date(2024, 3, 2)), {1, 2, 3})
+        self.assertEqual(self.query_index.ids_between(None, date(2024, 3, 1)), {0})
+        self.assertEqual(self.query_index.ids_between(date(2024, 3, 3), date(2024, 3, 4)), set())
+
+    def test_extensions_ignore_case(self):
+        self.assertEqual(self.query_index.ids_with_ext(".psd"), {0, 1})
+        self.assertEqual(self.query_index.ids_with_ext(".PNG"), {2})
+        self.assertEqual(self.query_index.ids_with_ext(".ai"), set())
+
+    def test_remove(self):
+        self.query_index.remove(SAVES[1])
+        self.query_index.remove_many([SAVES[2], SAVES[3]])
+        self.assertEqual(self.query_index.ids_between(), {0})
+        self.assertEqual(self.query_index.ids_with_ext(".psd"), {0})
+
+
+class TestCommitQuery(QueryTestCase):
+    def test_date_range(self):
+        query = CommitQuery(date_from=date(2024, 3, 2), date_to=date(2024, 3, 4))
+        self.assertFalse(query.needs_scan())
+        self.assertEqual(self.run_query(query), [1, 2])
+
+    def test_file_type_and_words(self):
+        self.assertEqual(self.run_query(CommitQuery(file_type=".psd")), [0, 1])
+        self.assertEqual(self.run_query(CommitQuery("poster", file_type=".pdf")), [3])
+        self.assertEqual(self.run_query(CommitQuery("logo client")), [1])
+
+    def test_regex(self):
+        query = CommitQuery(r"v\d$", use_regex=True)
+        self.assertTrue(query.needs_scan())
+        self.assertEqual(self.run_query(query), [0, 1])
+        self.assertEqual(self.run_query(CommitQuery("FEEDBACK", use_regex=True)), [1])
+        self.assertEqual(self.run_query(CommitQuery(r"v\d+", use_regex=True, date_from=date(2024, 3, 3))), [3])
+
+    def test_invalid_regex_matches_nothing(self):
+        query = CommitQuery("poster(", use_regex=True)
+        self.assertTrue(query.invalid)
+        self.assertEqual(self.run_query(query), [])
+
+    def test_scan_can_be_cancelled(self):
+        query = CommitQuery("poster", use_regex=True)
+        records = [(save["id"], save["message"], "") for save in SAVES]
+        self.assertIsNone(query.scan(records, lambda: True))
+        self.assertEqual(query.scan(records, lambda: False), [2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
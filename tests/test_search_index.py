@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+from core.search_index import SearchIndex, tokenize
+
+
+def save_record(save_id, message, note=""):
+    return {"id": save_id, "message": message, "note": note}
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.build([
+            save_record(0, "Logo draft", "blue background"),
+            save_record(1, "Logo final"),
+            save_record(2, "Poster layout", "logos moved left"),
+        ])
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Logo-v2, FINAL!"), ["logo", "v2", "final"])
+        self.assertEqual(tokenize("#"), [])
+        self.assertEqual(tokenize(None), [])
+
+    def test_words_match_as_prefixes(self):
+        self.assertEqual(self.index.search("log"), {0, 1, 2})
+        self.assertEqual(self.index.search("logos"), {2})
+        self.assertEqual(self.index.search("BLUE"), {0})
+        self.assertEqual(self.index.search("zebra"), set())
+        self.assertEqual(self.index.search("-"), set())
+
+    def test_any_or_every_word(self):
+        self.assertEqual(self.index.search("draft poster"), {0, 2})
+        self.assertEqual(self.index.search("logo fin", match_all=True), {1})
+        self.assertTrue(self.index.matches(2, "poster left", match_all=True))
+        self.assertFalse(self.index.matches(1, "poster left"))
+
+    def test_edits_and_removals(self):
+        self.index.add(save_record(1, "Banner final"))
+        self.assertEqual(self.index.search("logo"), {0, 2})
+        self.assertEqual(self.index.search("banner"), {1})
+        self.index.remove(1)
+        self.assertEqual(self.index.search("banner final"), set())
+        self.index.build([])
+        self.assertEqual(self.index.search("logo"), set())
+
+
+class TestSavedIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.index_file = os.path.join(self.tmp, "search_index.json")
+        self.index = SearchIndex()
+        self.index.build([save_record(0, "Logo draft"), save_record(1, "Poster")])
+        self.index.save(self.index_file, 3)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_load_matching_revision(self):
+        loaded = SearchIndex()
+        self.assertTrue(loaded.load(self.index_file, 3))
+        self.assertEqual(loaded.search("lo"), {0})
+        self.assertTrue(loaded.matches(1, "post"))
+
+    def test_other_revisions_are_stale(self):
+        loaded = SearchIndex()
+        self.assertFalse(loaded.load(self.index_file, 4))
+        self.assertFalse(loaded.load(self.index_file, None))
+        self.assertEqual(loaded.search("logo"), set())
+
+    def test_missing_or_damaged_file(self):
+        self.assertFalse(SearchIndex().load(os.path.join(self.tmp, "missing.json"), 3))
+        with open(self.index_file, "w") as f:
+            f.write("{not json")
+        self.assertFalse(SearchIndex().load(self.index_file, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PySide2.QtWidgets import QApplication
+from ui.watch_dispatcher import WatchDispatcher, PollingWatchDispatcher
+
+app = QApplication.instance() or QApplication([])
+
+
+def wait_for(condition, timeout=5.0):
+    """Process Qt events until condition() holds or timeout seconds pass"""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    return condition()
+
+
+def touch(path, data=b"x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+class TestWatchDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.dispatcher = WatchDispatcher([".psd", ".png"])
+        self.added = []
+        self.changed = []
+        self.dispatcher.tree_added.connect(self.added.append)
+        self.dispatcher.file_changed.connect(self.changed.append)
+
+    def tearDown(self):
+        self.dispatcher.clear()
+        self.dispatcher.pool.waitForDone()
+        shutil.rmtree(self.tmp)
+
+    def test_tree_is_walked_in_the_background(self):
+        expected = [touch(os.path.join(self.tmp, "a.psd")), touch(os.path.join(self.tmp, "sub", "b.png"))]
+        touch(os.path.join(self.tmp, "notes.txt"))
+        touch(os.path.join(self.tmp, ".hidden", "c.psd"))
+        self.dispatcher.add_tree(self.tmp)
+        self.assertTrue(wait_for(lambda: self.added))
+        self.assertEqual(self.added, [self.tmp])
+        self.assertEqual(self.dispatcher.watched_files(), sorted(expected))
+        # Files already there when watching starts are not changes
+        self.assertEqual(self.changed, [])
+
+    def test_tree_removed_during_the_walk_is_not_watched(self):
+        touch(os.path.join(self.tmp, "a.psd"))
+        self.dispatcher.add_tree(self.tmp)
+        self.dispatcher.remove_tree(self.tmp)
+        self.dispatcher.pool.waitForDone()
+        app.processEvents()
+        self.assertEqual(self.added, [])
+        self.assertEqual(self.dispatcher.watched_files(), [])
+
+    def test_files_in_new_subdirectories_are_reported(self):
+        self.dispatcher.add_tree(self.tmp)
+        self.assertTrue(wait_for(lambda: self.added))
+        # Simulate the directory event that creating the folder sends
+        path = touch(os.path.join(self.tmp, "new", "d.psd"))
+        self.dispatcher.on_directory_changed(self.tmp)
+        self.assertTrue(wait_for(lambda: path in self.changed))
+        self.assertIn(path, self.dispatcher.watched_files())
+
+
+class TestPollingWatchDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.dispatcher = PollingWatchDispatcher([".psd"], min_interval=0.05, max_interval=0.05)
+        self.added = []
+        self.changed = []
+        self.dispatcher.tree_added.connect(self.added.append)
+        self.dispatcher.file_changed.connect(self.changed.append)
+
+    def tearDown(self):
+        self.dispatcher.clear()
+        self.dispatcher.pool.waitForDone()
+        shutil.rmtree(self.tmp)
+
+    def test_tree_is_listed_in_the_background(self):
+        existing = touch(os.path.join(self.tmp, "sub", "a.psd"))
+        self.dispatcher.add_tree(self.tmp)
+        # Nothing is listed on the calling thread
+        self.assertEqual(self.dispatcher.poller.dirs, {})
+        self.assertTrue(wait_for(lambda: self.added))
+        self.assertEqual(self.added, [self.tmp])
+        self.assertEqual(self.dispatcher.watched_files(), [existing])
+
+        created = touch(os.path.join(self.tmp, "b.psd"))
+        self.assertTrue(wait_for(lambda: created in self.changed))
+        self.assertNotIn(existing, self.changed)
+
+
+if __name__ == "__main__":
+    unittest.main()
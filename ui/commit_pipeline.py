@@ -0,0 +1,127 @@
+from PySide2.QtCore import QObject, QRunnable, QThreadPool, Signal
+from PySide2.QtWidgets import QApplication
+from datetime import datetime
+
+
+class CommitJobSignals(QObject):
+    started = Signal(object)
+    stored = Signal(object, object)  # job, stored version
+    skipped = Signal(object)  # job whose content matched the latest save
+    failed = Signal(object, str)
+
+
+class CommitJob(QRunnable):
+    """Copy and hash stages of one commit, run on a worker thread"""
+
+    def __init__(self, file_manager, file_path, message, timestamp, skip_unchanged=False, baseline=None):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.file_manager = file_manager
+        self.file_path = file_path
+        self.message = message
+        self.timestamp = timestamp
+        self.skip_unchanged = skip_unchanged
+        # Copy of the file's latest save, so unchanged content is not stored again
+        self.baseline = baseline
+        self.signals = CommitJobSignals()
+
+    def run(self):
+        self.signals.started.emit(self)
+        try:
+            if self.baseline:
+                version = self.file_manager.store_version_if_changed(self.file_path, self.baseline)
+            else:
+                version = self.file_manager.store_version(self.file_path)
+        except Exception as e:
+            self.signals.failed.emit(self, str(e))
+            return
+        if version is None:
+            self.signals.skipped.emit(self)
+        else:
+            self.signals.stored.emit(self, version)
+
+
+class CommitPipeline(QObject):
+    """Runs commits on a thread pool and records their metadata on the GUI thread"""
+    committed = Signal(dict)  # the new save record
+    failed = Signal(str, str)  # file path, error message
+    skipped = Signal(str)  # file path whose content had not changed
+    status_changed = Signal(int, int)  # queued, in flight
+
+    def __init__(self, file_manager, parent=None, max_workers=2):
+        super().__init__(parent)
+        self.file_manager = file_manager
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self.queued = set()
+        self.running = set()
+
+    def submit(self, file_path, message, skip_unchanged=False):
+        """Queue a commit; raises right away if the file cannot be committed.
+
+        With skip_unchanged, the commit is dropped if the file's content matches
+        the latest save made from it.
+        """
+        self.file_manager.check_source(file_path)
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        baseline = None
+        if skip_unchanged:
+            latest = self.file_manager.latest_source_version(file_path)
+            baseline = dict(latest) if latest else None
+
+        job = CommitJob(self.file_manager, file_path, message, timestamp, skip_unchanged, baseline)
+        job.signals.started.connect(self.on_job_started)
+        job.signals.stored.connect(self.on_job_stored)
+        job.signals.skipped.connect(self.on_job_skipped)
+        job.signals.failed.connect(self.on_job_failed)
+        self.queued.add(job)
+        self.emit_status()
+        self.pool.start(job)
+
+    def on_job_started(self, job):
+        self.queued.discard(job)
+        self.running.add(job)
+        self.emit_status()
+
+    def on_job_stored(self, job, version):
+        """Metadata stage, run on the GUI thread that owns the store"""
+        self.finish_job(job)
+        if job.skip_unchanged:
+            # A commit of the same file may have been recorded while this one ran
+            latest = self.file_manager.latest_source_version(job.file_path)
+            if latest and latest["object"] == version["digest"]:
+                self.skipped.emit(job.file_path)
+                return
+        try:
+            # Ids are handed out here so skipped commits leave no gaps
+            save_id = self.file_manager.reserve_save_id()
+            save = self.file_manager.record_save(save_id, version, job.message, timestamp=job.timestamp)
+        except Exception as e:
+            self.failed.emit(job.file_path, str(e))
+            return
+        self.committed.emit(save)
+
+    def on_job_skipped(self, job):
+        self.finish_job(job)
+        self.skipped.emit(job.file_path)
+
+    def on_job_failed(self, job, error):
+        self.finish_job(job)
+        self.failed.emit(job.file_path, error)
+
+    def finish_job(self, job):
+        self.queued.discard(job)
+        self.running.discard(job)
+        self.emit_status()
+
+    def emit_status(self):
+        self.status_changed.emit(len(self.queued), len(self.running))
+
+    def is_busy(self):
+        return bool(self.queued or self.running)
+
+    def wait_for_done(self):
+        """Block until every queued commit has been stored and recorded"""
+        self.pool.waitForDone()
+        # Deliver the queued stored/failed signals so their metadata is written
+        QApplication.processEvents()
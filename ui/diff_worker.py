@@ -0,0 +1,25 @@
+from PySide2.QtCore import QObject, QRunnable, Signal
+
+
+class DiffWorkerSignals(QObject):
+    finished = Signal(object, object, str)  # worker, PixelDiff or None, error message
+
+
+class DiffWorker(QRunnable):
+    """Compares two versions off the GUI thread; large canvases take seconds"""
+
+    def __init__(self, file_manager, old_id, new_id):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.file_manager = file_manager
+        self.old_id = old_id
+        self.new_id = new_id
+        self.signals = DiffWorkerSignals()
+
+    def run(self):
+        try:
+            result = self.file_manager.diff_versions(self.old_id, self.new_id)
+        except Exception as e:
+            self.signals.finished.emit(self, None, str(e))
+            return
+        self.signals.finished.emit(self, result, "")
@@ -1,31 +1,68 @@
 from PySide2.QtWidgets import (QMainWindow, QWidget, QHBoxLayout, QSplitter, 
-                              QInputDialog, QFileDialog, QMessageBox, QStatusBar, QApplication)
-from PySide2.QtCore import Qt, QFileSystemWatcher, QTimer
+                              QInputDialog, QFileDialog, QMessageBox, QStatusBar, QApplication, QLabel)
+from PySide2.QtCore import Qt, QTimer, QObject, Signal, QThreadPool
 from PySide2.QtGui import QIcon
 from .panels.left_panel import LeftPanel
 from .panels.right_panel import RightPanel
+from .commit_pipeline import CommitPipeline
+from .watch_dispatcher import create_watch_dispatcher
+from .diff_worker import DiffWorker
+from .page_worker import PageWorker
+from .preview_prefetcher import PreviewPrefetcher
+from core.thumbnail_service import ThumbnailService
+from core.commit_scheduler import CommitScheduler
+from core.formats import handler_for
 import os
 from shutil import copytree, rmtree
 from datetime import datetime
 import json
 from .utils.icon_loader import load_app_icon
 
+# How often pending auto-commits are checked for a stable file
+SCHEDULER_POLL_MS = 250
+
+class ThumbnailNotifier(QObject):
+    """Carries results from the thumbnail service's threads to the GUI thread"""
+    finished = Signal(int, object, object, str)  # save id, thumbnail path, perceptual hash, error
+
 class FileManagerUI(QMainWindow):
     def __init__(self, file_manager):
         super().__init__()
         self.file_manager = file_manager
-        self.file_watcher = QFileSystemWatcher()
-        self.file_watcher.fileChanged.connect(self.on_file_changed)
-        self.file_watcher.directoryChanged.connect(self.on_directory_changed)
-        self.last_modified = None
-        self.watched_file = None
+        self.watcher = create_watch_dispatcher(file_manager.config, file_manager.supported_formats, self)
+        self.watcher.file_changed.connect(self.on_file_changed)
+        self.watcher.tree_added.connect(self.on_tree_added)
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
-        self.is_committing = False
+        self.commit_status_label = QLabel()
+        self.status_bar.addPermanentWidget(self.commit_status_label)
+        self.commit_pipeline = CommitPipeline(file_manager, self)
+        self.commit_pipeline.committed.connect(self.on_commit_recorded)
+        self.commit_pipeline.failed.connect(self.on_commit_failed)
+        self.commit_pipeline.skipped.connect(self.on_commit_skipped)
+        self.skipped_commits = 0
+        self.commit_pipeline.status_changed.connect(self.update_commit_status)
+        self.thumbnail_notifier = ThumbnailNotifier(self)
+        self.thumbnail_notifier.finished.connect(self.on_thumbnail_finished)
+        self.thumbnail_service = ThumbnailService(
+            file_manager.repo_path, self.thumbnail_notifier.finished.emit,
+            full_quality=file_manager.config["psd_composite"]
+        )
+        self.commit_scheduler = CommitScheduler(
+            stable_window=file_manager.config["auto_commit_stable_window"],
+            min_interval=file_manager.config["auto_commit_min_interval"],
+            stat=self.watcher.stat_file
+        )
         self.commit_timer = QTimer()
-        self.commit_timer.setSingleShot(True)
-        self.commit_timer.timeout.connect(self.execute_pending_commit)
-        self.pending_commit_path = None
+        self.commit_timer.setInterval(SCHEDULER_POLL_MS)
+        self.commit_timer.timeout.connect(self.execute_pending_commits)
+        self.diff_worker = None
+        self.diff_workers = set()  # keeps running workers alive until they report back
+        self.shown_diff = None  # (commit id, PixelDiff) overlaid on the preview
+        self.page_commit = None  # commit whose pages the preview is showing
+        self.page_worker = None
+        self.page_workers = set()
+        self.previews_requested = set()  # commits queued for a preview pyramid this session
         self.init_ui()
 
     def init_ui(self):
@@ -39,7 +76,15 @@ class FileManagerUI(QMainWindow):
         self.right_panel = RightPanel(self.file_manager, self)
 
         # Connect commit selection to preview
-        self.left_panel.commit_list.currentItemChanged.connect(self.on_commit_selected)
+        self.left_panel.commit_list.current_commit_changed.connect(self.on_commit_selected)
+        self.left_panel.commit_list.compare_requested.connect(self.show_version_diff)
+        self.right_panel.page_requested.connect(lambda page: self.show_page(self.page_commit, page))
+        self.prefetcher = PreviewPrefetcher(
+            self.file_manager, self.left_panel.commit_list, self.right_panel.preview,
+            radius=self.file_manager.config["preview_prefetch"],
+            budget=self.file_manager.config["preview_prefetch_mb"] * 1024 * 1024,
+            parent=self
+        )
 
         # Add panels to splitter
         splitter = QSplitter(Qt.Horizontal)
@@ -50,30 +95,146 @@ class FileManagerUI(QMainWindow):
         central_widget.setLayout(main_layout)
         self.setCentralWidget(central_widget)
 
-    def on_commit_selected(self, current, previous):
-        if not current:
+        # Pick up thumbnails that were still pending when the app last closed
+        for job in self.file_manager.thumbnail_queue.pending():
+            self.thumbnail_service.submit(job)
+
+    def on_commit_selected(self, commit_id):
+        self.right_panel.hide_diff()
+        self.shown_diff = None
+        self.page_commit = None
+        self.page_worker = None
+        self.right_panel.set_page(0, 1)
+        self.prefetcher.schedule(commit_id)
+        if commit_id is None:
             self.right_panel.preview.clear()
             return
 
-        widget = self.left_panel.commit_list.itemWidget(current)
-        if not widget:
-            return
-            
-        commit_id = widget.get_commit_id()
-        file_path = self.file_manager.get_version_path(commit_id)
+        filename = self.file_manager.get_version_filename(commit_id)
         
-        if file_path:
-            # For PDFs, use thumbnail
-            if file_path.lower().endswith('.pdf'):
-                thumbnail_path = f"{self.file_manager.thumbnails_dir}/thumb_{commit_id}.png"
-                self.right_panel.preview.set_preview(thumbnail_path)
+        if filename:
+            handler = handler_for(filename)
+            if handler is not None and handler.paged:
+                self.show_page(commit_id, 0)
             else:
-                self.right_panel.preview.set_preview(file_path)
+                self.show_preview(commit_id)
 
             # Update note if exists
             note = self.file_manager.get_commit_note(commit_id)
             self.right_panel.note_panel.set_note(note) 
 
+    def show_preview(self, commit_id):
+        """Show the stored preview level that fits the preview panel.
+
+        Versions committed before preview pyramids existed fall back to their
+        thumbnail or original file, and get a pyramid rendered in the background.
+        """
+        preview = self.right_panel.preview
+        path = self.file_manager.preview_path(commit_id, preview.preview_side())
+        if path:
+            preview.set_preview(path)
+            return
+        if commit_id not in self.previews_requested:
+            self.previews_requested.add(commit_id)
+            job = self.file_manager.queue_preview(commit_id)
+            if job:
+                self.thumbnail_service.submit(job)
+
+        # Formats Qt cannot draw (PSD) show their thumbnail
+        handler = handler_for(self.file_manager.get_version_filename(commit_id))
+        file_path = self.file_manager.get_version_path(commit_id)
+        if handler is None or not handler.qt_preview:
+            preview.set_preview(f"{self.file_manager.thumbnails_dir}/thumb_{commit_id}.png")
+        elif file_path:
+            preview.set_preview(file_path)
+        else:
+            # Chunked versions have no single file on disk
+            try:
+                with self.file_manager.open_version(commit_id) as f:
+                    preview.set_preview_data(f.read())
+            except FileNotFoundError:
+                preview.clear()
+
+    def show_page(self, commit_id, page):
+        """Preview one page of a document, rendered at the preview's size.
+
+        Pages come from the page cache when they have been shown at this size
+        before; otherwise the page's thumbnail stands in while it renders.
+        """
+        try:
+            page_count = self.file_manager.page_count(commit_id)
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"Failed to read pages of commit {commit_id}: {e}")
+            page_count = 1
+        if not 0 <= page < page_count:
+            return
+        if page != 0:
+            self.right_panel.hide_diff()
+            self.shown_diff = None
+        self.page_commit = commit_id
+        self.right_panel.set_page(page, page_count)
+
+        preview = self.right_panel.preview
+        size = preview.render_size()
+        path = self.file_manager.cached_page(commit_id, page, size)
+        if path:
+            self.page_worker = None
+            preview.set_preview(path)
+            return
+        placeholder = self.file_manager.page_thumbnail(commit_id, page)
+        if placeholder:
+            preview.set_preview(placeholder)
+        else:
+            preview.clear()
+            preview.setText(f"Rendering page {page + 1}...")
+        self.page_worker = PageWorker(self.file_manager, commit_id, page, size)
+        self.page_worker.signals.finished.connect(self.on_page_finished)
+        self.page_workers.add(self.page_worker)
+        QThreadPool.globalInstance().start(self.page_worker)
+
+    def on_page_finished(self, worker, path, error):
+        self.page_workers.discard(worker)
+        # Only the page still being looked at is shown
+        if worker is not self.page_worker:
+            return
+        self.page_worker = None
+        if path is None:
+            print(f"Failed to render page {worker.page + 1} of commit {worker.save_id}: {error}")
+            if self.right_panel.preview.base_pixmap is None:
+                self.right_panel.preview.setText("Preview not available")
+            return
+        self.right_panel.preview.set_preview(path)
+        if self.shown_diff and self.shown_diff[0] == worker.save_id and worker.page == 0:
+            self.right_panel.preview.show_diff(self.shown_diff[1])
+
+    def show_version_diff(self, old_id, new_id):
+        """Compare two versions in the background and overlay the changes on the newer one"""
+        self.diff_worker = DiffWorker(self.file_manager, old_id, new_id)
+        self.diff_worker.signals.finished.connect(self.on_diff_finished)
+        self.diff_workers.add(self.diff_worker)
+        self.status_bar.showMessage(f"Comparing commit {old_id} with commit {new_id}...")
+        QThreadPool.globalInstance().start(self.diff_worker)
+
+    def on_diff_finished(self, worker, result, error):
+        self.diff_workers.discard(worker)
+        # Only the latest comparison is shown
+        if worker is not self.diff_worker:
+            return
+        self.diff_worker = None
+        if result is None:
+            self.status_bar.showMessage(f"Could not compare versions: {error}", 5000)
+            print(f"Failed to compare commits {worker.old_id} and {worker.new_id}: {error}")
+            return
+        self.status_bar.clearMessage()
+        commit_list = self.left_panel.commit_list
+        if commit_list.current_commit_id() != worker.new_id:
+            commit_list.set_current_commit(worker.new_id)
+        elif self.page_commit == worker.new_id and self.right_panel.page != 0:
+            # Comparisons are of first pages
+            self.show_page(worker.new_id, 0)
+        self.right_panel.show_diff(worker.old_id, worker.new_id, result)
+        self.shown_diff = (worker.new_id, result)
+
     def save_project(self):
         """Export all commits to a single directory"""
         # First ask for project name
@@ -122,17 +283,20 @@ class FileManagerUI(QMainWindow):
             
             # Copy all commit files to the project directory
             history = self.file_manager.get_commit_history()
+            exported = []
             for commit in history:
-                source_file = commit['file']
-                if os.path.exists(source_file):
-                    # Create filename with commit ID and original name
-                    filename = os.path.basename(source_file)
-                    base, ext = os.path.splitext(filename)
-                    new_filename = f"{base}_v{commit['id']}{ext}"
-                    dest_file = os.path.join(project_path, new_filename)
-                    
-                    # Copy the file
-                    os.system(f"cp '{source_file}' '{dest_file}'")
+                # Create filename with commit ID and original name
+                filename = self.file_manager.get_version_filename(commit['id'])
+                base, ext = os.path.splitext(filename)
+                new_filename = f"{base}_v{commit['id']}{ext}"
+                dest_file = os.path.join(project_path, new_filename)
+                
+                # Copy the file
+                try:
+                    self.file_manager.export_version(commit['id'], dest_file)
+                except FileNotFoundError:
+                    continue
+                exported.append((commit, new_filename))
             
             # Save metadata for reference
             metadata = {
@@ -141,8 +305,8 @@ class FileManagerUI(QMainWindow):
                     'timestamp': commit['timestamp'],
                     'message': commit['message'],
                     'note': commit.get('note', ''),
-                    'filename': f"{os.path.splitext(os.path.basename(commit['file']))[0]}_v{commit['id']}{os.path.splitext(commit['file'])[1]}"
-                } for commit in history]
+                    'filename': new_filename
+                } for commit, new_filename in exported]
             }
             
             with open(os.path.join(project_path, 'project_info.json'), 'w') as f:
@@ -162,53 +326,24 @@ class FileManagerUI(QMainWindow):
             ) 
 
     def on_file_changed(self, path):
-        """Handle file changes"""
-        if not self.left_panel.auto_commit.isChecked() or self.is_committing:
+        """Handle a change to any watched file"""
+        if not self.left_panel.auto_commit.isChecked():
             return
 
-        try:
-            if not os.path.exists(path):
-                return
-
-            current_mtime = os.path.getmtime(path)
-            if self.last_modified is None or current_mtime > self.last_modified:
-                self.last_modified = current_mtime
-                self.schedule_commit(path)
-                
-            # Re-add the file to watcher
-            if path not in self.file_watcher.files():
-                self.file_watcher.addPath(path)
-                
-        except Exception as e:
-            self.is_committing = False
-            QMessageBox.warning(
-                self,
-                "Auto-commit Warning",
-                f"Failed to auto-commit changes: {str(e)}"
-            )
-
-    def on_directory_changed(self, path):
-        """Handle directory changes for Adobe files"""
-        if not self.watched_file or not self.left_panel.auto_commit.isChecked() or self.is_committing:
-            return
-
-        if os.path.exists(self.watched_file):
-            current_mtime = os.path.getmtime(self.watched_file)
-            if self.last_modified is None or current_mtime > self.last_modified:
-                self.last_modified = current_mtime
-                self.schedule_commit(self.watched_file)
+        self.schedule_commit(path)
 
     def schedule_commit(self, path):
-        """Schedule a commit with debouncing"""
-        self.is_committing = True
-        self.pending_commit_path = path
-        self.commit_timer.start(1000)  # 1 second delay
+        """Queue an auto-commit once the file has stopped changing"""
+        self.commit_scheduler.notify(path)
+        if not self.commit_timer.isActive():
+            self.commit_timer.start()
 
-    def execute_pending_commit(self):
-        """Execute the pending commit"""
-        if self.pending_commit_path:
-            self.create_auto_commit(self.pending_commit_path)
-            self.pending_commit_path = None
+    def execute_pending_commits(self):
+        """Commit the files whose writes have settled"""
+        for path in self.commit_scheduler.poll():
+            self.create_auto_commit(path)
+        if not self.commit_scheduler.has_pending():
+            self.commit_timer.stop()
 
     def create_auto_commit(self, path):
         """Create an auto-commit for the file"""
@@ -216,54 +351,91 @@ class FileManagerUI(QMainWindow):
             timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             filename = os.path.basename(path)
             message = f"Auto-commit: {filename} modified at {timestamp}"
-            commit_id = self.file_manager.save(path, message)
-            
-            # Add only the new commit to the list
-            commit = {
-                'id': commit_id,
-                'timestamp': timestamp,
-                'message': message,
-                'file': path,
-                'note': '',
-                'color': None
-            }
-            self.left_panel.commit_list.add_commit(commit)
-            
-            self.status_bar.showMessage(f"Auto-committed changes to: {filename}", 3000)
+            self.commit_pipeline.submit(path, message, skip_unchanged=True)
         except Exception as e:
             self.status_bar.showMessage(f"Failed to auto-commit: {str(e)}", 3000)
             print(f"Failed to create auto-commit: {e}")
-        finally:
-            self.is_committing = False
+
+    def on_commit_recorded(self, save):
+        """Add a commit finished by the pipeline to the list"""
+        self.left_panel.commit_list.add_commit(save)
+        self.status_bar.showMessage(f"Committed changes to: {save['filename']}", 3000)
+        job = self.file_manager.thumbnail_queue.get(save["id"])
+        if job:
+            self.thumbnail_service.submit(job)
+
+    def on_commit_failed(self, path, error):
+        self.status_bar.showMessage(f"Failed to commit {os.path.basename(path)}: {error}", 3000)
+        print(f"Failed to commit {path}: {error}")
+
+    def on_thumbnail_finished(self, save_id, thumbnail_path, image_hash, error):
+        if error:
+            print(f"Failed to generate thumbnail for commit {save_id}: {error}")
+        self.file_manager.set_thumbnail(save_id, thumbnail_path, image_hash)
+        if thumbnail_path:
+            self.left_panel.commit_list.set_commit_thumbnail(save_id, thumbnail_path)
+            # Swap in the new pyramid if this version is on show without one
+            if (save_id in self.previews_requested and self.shown_diff is None and self.page_commit is None
+                    and self.left_panel.commit_list.current_commit_id() == save_id):
+                self.show_preview(save_id)
+
+    def on_commit_skipped(self, path):
+        """Count auto-commits dropped because the file's content had not changed"""
+        self.skipped_commits += 1
+        self.update_commit_status(len(self.commit_pipeline.queued), len(self.commit_pipeline.running))
+
+    def update_commit_status(self, queued, in_flight):
+        """Show queued and in-flight commits, and skipped no-op saves, in the status bar"""
+        parts = []
+        if queued or in_flight:
+            parts.append(f"Commits: {queued} queued, {in_flight} in progress")
+        if self.skipped_commits:
+            parts.append(f"{self.skipped_commits} unchanged save{'s' if self.skipped_commits > 1 else ''} skipped")
+        self.commit_status_label.setText(" | ".join(parts))
 
     def watch_file(self, file_path):
-        """Start watching a file for changes"""
-        # Remove any existing watched files
-        if self.watched_file:
-            self.file_watcher.removePath(self.watched_file)
-            
-        # Add new file to watch
-        self.watched_file = file_path
-        self.file_watcher.addPath(file_path)
-        
-        # Also watch the directory for some file types (like AI files)
-        dir_path = os.path.dirname(file_path)
-        if dir_path not in self.file_watcher.directories():
-            self.file_watcher.addPath(dir_path)
+        """Start watching a file for changes, alongside any already watched"""
+        self.watcher.add_file(file_path)
+        self.show_watch_status(f"Watching: {os.path.basename(file_path)}")
+
+    def unwatch_file(self, file_path):
+        """Stop watching a file"""
+        self.watcher.remove_file(file_path)
+        self.commit_scheduler.forget(os.path.abspath(file_path))
+
+    def watch_directory(self, dir_path):
+        """Watch every supported file in a folder and its subfolders"""
+        # The count is shown once the folder has been walked
+        self.status_bar.showMessage(f"Scanning folder: {os.path.basename(os.path.normpath(dir_path))}")
+        self.watcher.add_tree(dir_path)
 
-        # Update status bar
-        self.status_bar.showMessage(f"Watching: {os.path.basename(file_path)}") 
+    def on_tree_added(self, dir_path):
+        self.show_watch_status(f"Watching folder: {os.path.basename(dir_path)}")
+
+    def stop_watching(self):
+        """Stop watching all files and folders"""
+        self.watcher.clear()
+        self.commit_scheduler.clear()
+
+    def show_watch_status(self, message):
+        count = len(self.watcher.watched_files())
+        self.status_bar.showMessage(f"{message} ({count} file{'s' if count != 1 else ''} watched)")
 
     def closeEvent(self, event):
         """Handle window close event"""
         try:
+            # Let queued commits finish so no save is lost
+            self.commit_pipeline.wait_for_done()
+            self.thumbnail_service.shutdown()
+            self.prefetcher.shutdown()
+            self.diff_worker = None
+
             # Clean up file watcher
-            if self.watched_file:
-                try:
-                    self.file_watcher.removePath(self.watched_file)
-                except:
-                    pass
-            self.file_watcher.deleteLater()
+            try:
+                self.stop_watching()
+            except:
+                pass
+            self.watcher.deleteLater()
             
             # Clean up panels safely
             try:
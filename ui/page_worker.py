@@ -0,0 +1,26 @@
+from PySide2.QtCore import QObject, QRunnable, Signal
+
+
+class PageWorkerSignals(QObject):
+    finished = Signal(object, object, str)  # worker, rendered page path or None, error message
+
+
+class PageWorker(QRunnable):
+    """Renders a document page for the preview off the GUI thread"""
+
+    def __init__(self, file_manager, save_id, page, size):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.file_manager = file_manager
+        self.save_id = save_id
+        self.page = page
+        self.size = size
+        self.signals = PageWorkerSignals()
+
+    def run(self):
+        try:
+            path = self.file_manager.render_page(self.save_id, self.page, self.size)
+        except Exception as e:
+            self.signals.finished.emit(self, None, str(e))
+            return
+        self.signals.finished.emit(self, path, "")
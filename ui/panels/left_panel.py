@@ -1,8 +1,10 @@
-from PySide2.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QCheckBox, QMessageBox
+from PySide2.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QCheckBox, QMessageBox, QProgressDialog
+from PySide2.QtCore import Qt
 from ..widgets.commit_list import CommitList
 from ..widgets.file_selector import FileSelector
 from ..search.search_box import SearchBox
-from datetime import datetime
+from ..search.advanced_search_dialog import AdvancedSearchDialog
+from ..search.search_handler import SearchHandler
 from PySide2.QtWidgets import QApplication
 
 class LeftPanel(QWidget):
@@ -27,11 +29,13 @@ class LeftPanel(QWidget):
         # Search box
         self.search_box = SearchBox()
         self.search_box.textChanged.connect(self.filter_commits)
+        self.search_box.advanced_requested.connect(self.show_advanced_search)
         layout.addWidget(self.search_box)
 
         # Commit list
         self.commit_list = CommitList(self.file_manager)
         layout.addWidget(self.commit_list)
+        self.search_handler = SearchHandler(self.commit_list, self.file_manager)
 
         # Buttons
         buttons_layout = self.create_buttons()
@@ -41,42 +45,16 @@ class LeftPanel(QWidget):
 
     def filter_commits(self, search_text):
         """Filter commits based on search text"""
-        # Get all commits first
-        history = self.file_manager.get_commit_history()
-        
-        # Store current selection
-        current_item = self.commit_list.currentItem()
-        current_id = None
-        if current_item:
-            widget = self.commit_list.itemWidget(current_item)
-            if widget:
-                current_id = widget.get_commit_id()
-        
-        # Clear current display
-        self.commit_list.clear()
-        
-        # Sort commits by ID to maintain order
-        history.sort(key=lambda x: x['id'])
-        
-        # Filter and add commits based on partial matches
-        search_text = search_text.strip().lower()
-        for commit in history:
-            message = commit['message'].lower()
-            note = commit.get('note', '').lower()
-            
-            # Check for partial matches in message or note
-            if any(word in message or word in note 
-                   for word in search_text.split() if word):
-                self.commit_list.add_commit(commit)
-        
-        # Restore selection if possible
-        if current_id is not None:
-            for i in range(self.commit_list.count()):
-                item = self.commit_list.item(i)
-                widget = self.commit_list.itemWidget(item)
-                if widget and widget.get_commit_id() == current_id:
-                    self.commit_list.setCurrentItem(item)
-                    break
+        # Rows are hidden in place, so the selection survives and typing stays cheap
+        self.search_handler.filter_commits(search_text)
+
+    def show_advanced_search(self):
+        """Show only the commits matching the advanced search dialog"""
+        dialog = AdvancedSearchDialog(self)
+        if dialog.exec_():
+            # The dialog's query replaces the one in the search box
+            self.search_box.clear()
+            self.search_handler.apply_advanced_search(dialog)
 
     def create_buttons(self):
         """Create commit and project buttons"""
@@ -132,22 +110,16 @@ class LeftPanel(QWidget):
             return
 
         message = "Initial commit"  # Could be extended with input dialog
-        commit_id = self.file_manager.save(file_path, message)
-        
-        # Add only the new commit
-        commit = {
-            'id': commit_id,
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'message': message,
-            'file': file_path,
-            'note': '',
-            'color': None
-        }
-        self.commit_list.add_commit(commit)
+        try:
+            # The pipeline adds the commit to the list once it is stored
+            self.parent_window.commit_pipeline.submit(file_path, message)
+        except Exception as e:
+            QMessageBox.warning(self, "Commit Failed", f"Failed to commit file: {str(e)}")
 
     def delete_project(self):
         """Delete all visible commits in the project"""
-        visible_count = self.commit_list.count()
+        commit_ids = self.commit_list.visible_commit_ids()
+        visible_count = len(commit_ids)
         if visible_count == 0:
             QMessageBox.information(
                 self,
@@ -170,17 +142,20 @@ class LeftPanel(QWidget):
         
         if reply == QMessageBox.Yes:
             try:
-                # Get IDs of visible commits
-                commit_ids = []
-                for i in range(self.commit_list.count()):
-                    item = self.commit_list.item(i)
-                    widget = self.commit_list.itemWidget(item)
-                    if widget:
-                        commit_ids.append(widget.get_commit_id())
-                
-                # Delete visible commits
-                for commit_id in commit_ids:
-                    self.file_manager.delete_commit(commit_id)
+                # Delete visible commits in one batch
+                progress_dialog = QProgressDialog("Deleting commits...", None, 0, 0, self)
+                progress_dialog.setWindowTitle("Delete Commits")
+                progress_dialog.setWindowModality(Qt.WindowModal)
+                progress_dialog.setMinimumDuration(500)
+
+                def report_progress(done, total):
+                    progress_dialog.setMaximum(total)
+                    progress_dialog.setValue(done)
+
+                try:
+                    self.file_manager.delete_commits(commit_ids, progress=report_progress)
+                finally:
+                    progress_dialog.close()
                 
                 # Clear UI elements
                 self.commit_list.clear()
@@ -190,14 +165,7 @@ class LeftPanel(QWidget):
                 
                 # Reset file watching and UI state
                 if self.parent_window:
-                    if self.parent_window.watched_file:
-                        try:
-                            self.parent_window.file_watcher.removePath(self.parent_window.watched_file)
-                        except:
-                            pass
-                    self.parent_window.watched_file = None
-                    self.parent_window.last_modified = None
-                    self.parent_window.is_committing = False
+                    self.parent_window.stop_watching()
                     
                     # Clear right panel
                     self.parent_window.right_panel.update_source_file(None)
@@ -1,11 +1,13 @@
 from PySide2.QtWidgets import (QWidget, QVBoxLayout, QPushButton, QLabel, QFrame, 
                               QHBoxLayout, QFileDialog)
-from PySide2.QtCore import Qt
+from PySide2.QtCore import Qt, Signal
 from ..widgets.preview import PreviewWidget
 from ..widgets.note_panel import NotePanel
 import os
 
 class RightPanel(QWidget):
+    page_requested = Signal(int)  # zero-based page number
+
     def __init__(self, file_manager, parent=None):
         super().__init__(parent)
         self.file_manager = file_manager
@@ -53,9 +55,34 @@ class RightPanel(QWidget):
         layout.addWidget(self.source_info)
         
         # Preview widget
-        self.preview = PreviewWidget()
+        self.preview = PreviewWidget(cache_budget=self.file_manager.config["preview_cache_mb"] * 1024 * 1024)
         layout.addWidget(self.preview)
 
+        # Page navigation for multi-page documents (initially hidden)
+        self.page = 0
+        self.page_bar = QWidget()
+        page_layout = QHBoxLayout()
+        page_layout.setContentsMargins(0, 0, 0, 0)
+        self.previous_page_button = QPushButton("◀")
+        self.previous_page_button.clicked.connect(lambda: self.page_requested.emit(self.page - 1))
+        self.page_label = QLabel()
+        self.page_label.setAlignment(Qt.AlignCenter)
+        self.next_page_button = QPushButton("▶")
+        self.next_page_button.clicked.connect(lambda: self.page_requested.emit(self.page + 1))
+        page_layout.addWidget(self.previous_page_button)
+        page_layout.addWidget(self.page_label)
+        page_layout.addWidget(self.next_page_button)
+        self.page_bar.setLayout(page_layout)
+        self.page_bar.hide()
+        layout.addWidget(self.page_bar)
+
+        # Summary of a version comparison shown over the preview (initially hidden)
+        self.diff_label = QLabel()
+        self.diff_label.setWordWrap(True)
+        self.diff_label.setStyleSheet("color: #c62828;")
+        self.diff_label.hide()
+        layout.addWidget(self.diff_label)
+
         # Show Note button (initially hidden)
         self.show_note_button = QPushButton("📝 Show Note")
         self.show_note_button.setStyleSheet("""
@@ -95,6 +122,10 @@ class RightPanel(QWidget):
         if file_path:
             main_window = self.window()
             if main_window:
+                # Re-linking replaces the source file; other watched files stay
+                current = self.file_path_label.text()
+                if current != "No file selected":
+                    main_window.unwatch_file(current)
                 main_window.watch_file(file_path)
                 self.update_source_file(file_path)
 
@@ -109,6 +140,30 @@ class RightPanel(QWidget):
             self.source_info.hide()
             self.watch_button.hide()
 
+    def set_page(self, page, page_count):
+        """Show which page of a document is previewed; hidden for single pages"""
+        self.page = page
+        self.page_label.setText(f"Page {page + 1} of {page_count}")
+        self.previous_page_button.setEnabled(page > 0)
+        self.next_page_button.setEnabled(page < page_count - 1)
+        self.page_bar.setVisible(page_count > 1)
+
+    def show_diff(self, old_id, new_id, result):
+        """Overlay the changes between two versions on the preview"""
+        self.preview.show_diff(result)
+        regions = len(result.boxes)
+        if regions:
+            self.diff_label.setText(
+                f"Changes from commit {old_id} to {new_id}: {regions} region{'s' if regions != 1 else ''}, "
+                f"{result.changed_fraction:.1%} of pixels"
+            )
+        else:
+            self.diff_label.setText(f"No visible changes from commit {old_id} to {new_id}")
+        self.diff_label.show()
+
+    def hide_diff(self):
+        self.diff_label.hide()
+
     def show_note(self):
         """Show note and hide button"""
         if self.note_panel.has_note():
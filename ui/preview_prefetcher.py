@@ -0,0 +1,156 @@
+from itertools import zip_longest
+from PySide2.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, QSize, Signal
+from PySide2.QtGui import QImage, QPixmap
+from core.formats import handler_for
+
+# Wait this long after a selection change before decoding neighbours, so
+# each step of a scrub does not queue work of its own
+PREFETCH_DELAY_MS = 50
+PREFETCH_THREADS = 2
+
+
+class PrefetchWorkerSignals(QObject):
+    finished = Signal(object, object)  # worker, scaled QImage or None
+
+
+class PrefetchWorker(QRunnable):
+    """Decodes one version's preview image and scales it for the preview panel.
+
+    QImage, unlike QPixmap, may be used off the GUI thread; the prefetcher
+    turns the result into a pixmap once it is back on the GUI thread. Paged
+    documents have no pyramid, so their first page is rendered into the
+    page cache first.
+    """
+
+    def __init__(self, file_manager, commit_id, path, size, page_size=None):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.file_manager = file_manager
+        self.commit_id = commit_id
+        self.path = path
+        self.size = size
+        self.page_size = page_size
+        self.cancelled = False
+        self.signals = PrefetchWorkerSignals()
+
+    def run(self):
+        image = None
+        if not self.cancelled:
+            try:
+                if self.path is None:
+                    self.path = self.file_manager.render_page(self.commit_id, 0, self.page_size)
+                image = QImage(self.path)
+            except Exception as e:
+                print(f"Failed to prefetch the preview of commit {self.commit_id}: {e}")
+        if self.cancelled or image is None or image.isNull():
+            self.signals.finished.emit(self, None)
+            return
+        self.signals.finished.emit(self, image.scaled(self.size, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+
+
+class PreviewPrefetcher(QObject):
+    """Decodes the previews of the versions around the selected one in the
+    background, so stepping through history finds them in the preview cache.
+
+    The radius versions on each side are fetched nearest first, leading in the
+    direction of travel. Work for versions that fall out of that window is
+    cancelled, and no more versions are fetched than fit in budget bytes.
+    """
+
+    def __init__(self, file_manager, commit_list, preview, radius, budget, parent=None):
+        super().__init__(parent)
+        self.file_manager = file_manager
+        self.commit_list = commit_list
+        self.preview = preview
+        self.radius = radius
+        # Prefetched pixmaps must never push out more than half the cache
+        self.budget = min(budget, preview.cache.budget // 2)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(PREFETCH_THREADS)
+        self.workers = {}  # commit id -> worker still wanted
+        self.running = set()  # keeps workers alive until they report back, cancelled or not
+        self.current = None
+        self.direction = 1
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(PREFETCH_DELAY_MS)
+        self.timer.timeout.connect(self.prefetch)
+
+    def schedule(self, commit_id):
+        """Note a new selection; neighbours are fetched once the event loop is idle"""
+        rows = [self.commit_list.commit_model.row_for_id(i) for i in (self.current, commit_id)]
+        if None not in rows and rows[0] != rows[1]:
+            self.direction = 1 if rows[1] > rows[0] else -1
+        self.current = commit_id
+        # Not restarted while running, so holding an arrow key still prefetches
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def prefetch(self):
+        if self.current is None or self.radius <= 0:
+            self.cancel_all()
+            return
+        above, below = self.commit_list.neighbor_ids(self.current, self.radius)
+        ahead, behind = (below, above) if self.direction > 0 else (above, below)
+        order = [commit_id for pair in zip_longest(ahead, behind) for commit_id in pair if commit_id is not None]
+        size = self.preview.display_size()
+        per_preview = max(1, size.width() * size.height() * 4)
+        wanted = order[:self.budget // per_preview]
+
+        for commit_id in list(self.workers):
+            if commit_id not in wanted:
+                self.cancel(commit_id)
+        for commit_id in wanted:
+            if commit_id not in self.workers:
+                worker = self._worker(commit_id, size)
+                if worker is not None:
+                    self.workers[commit_id] = worker
+                    self.running.add(worker)
+                    worker.signals.finished.connect(self.on_finished)
+                    self.pool.start(worker)
+
+    def _worker(self, commit_id, size):
+        """A worker for a version whose preview is not cached yet, or None"""
+        filename = self.file_manager.get_version_filename(commit_id)
+        handler = handler_for(filename) if filename else None
+        if handler is None:
+            return None
+        page_size = None
+        if handler.paged:
+            page_size = self.preview.render_size()
+            path = self.file_manager.cached_page(commit_id, 0, page_size)
+        else:
+            path = self.file_manager.preview_path(commit_id, self.preview.preview_side())
+            if path is None:
+                # No pyramid yet; decoding the original is what this avoids
+                return None
+        if path is not None and (path, size.width(), size.height()) in self.preview.cache:
+            return None
+        return PrefetchWorker(self.file_manager, commit_id, path, QSize(size), page_size)
+
+    def on_finished(self, worker, image):
+        self.running.discard(worker)
+        if self.workers.get(worker.commit_id) is worker:
+            del self.workers[worker.commit_id]
+        if image is None or worker.cancelled:
+            return
+        self.preview.cache.put((worker.path, worker.size.width(), worker.size.height()), QPixmap.fromImage(image))
+
+    def cancel(self, commit_id):
+        worker = self.workers.pop(commit_id, None)
+        if worker is None:
+            return
+        worker.cancelled = True
+        # Work that has not started is dropped; running work is discarded when done
+        if self.pool.tryTake(worker):
+            self.running.discard(worker)
+
+    def cancel_all(self):
+        for commit_id in list(self.workers):
+            self.cancel(commit_id)
+
+    def shutdown(self):
+        self.timer.stop()
+        self.current = None
+        self.cancel_all()
+        self.pool.waitForDone()
@@ -3,6 +3,7 @@ from PySide2.QtCore import Signal, Qt
 
 class SearchBox(QWidget):
     textChanged = Signal(str)  # Signal for when search text changes
+    advanced_requested = Signal()  # Signal for opening the advanced search dialog
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -13,6 +14,7 @@ class SearchBox(QWidget):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search commits...")
         self.search_input.returnPressed.connect(self.trigger_search)  # Add Enter key support
+        self.search_input.textChanged.connect(self.on_text_changed)  # Search as you type
         layout.addWidget(self.search_input)
 
         # Search button
@@ -31,6 +33,11 @@ class SearchBox(QWidget):
         """)
         layout.addWidget(self.search_button)
 
+        # Advanced search button
+        self.advanced_button = QPushButton("Advanced")
+        self.advanced_button.clicked.connect(self.advanced_requested.emit)
+        layout.addWidget(self.advanced_button)
+
         self.setLayout(layout)
 
     def trigger_search(self):
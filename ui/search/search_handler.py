@@ -1,80 +1,69 @@
-from datetime import datetime
-import re
-from .advanced_search_dialog import AdvancedSearchDialog
+from PySide2.QtCore import QThreadPool
+from core.query_engine import CommitQuery
+from .search_worker import SearchWorker
+
+# Regex scans over fewer commits than this finish faster than a thread hand-off
+BACKGROUND_SCAN_THRESHOLD = 5000
 
 class SearchHandler:
     def __init__(self, commit_list, file_manager):
         self.commit_list = commit_list
         self.file_manager = file_manager
+        self.pool = QThreadPool.globalInstance()
+        self.current_worker = None
+        self.workers = set()  # keeps running workers alive until they report back
+        self.showing_results = False  # set while the list holds advanced search results
 
     def filter_commits(self, search_text):
-        search_text = search_text.lower()
-        
-        # Get currently selected commit ID before filtering
-        current_commit_id = None
-        current_item = self.commit_list.currentItem()
-        if current_item:
-            widget = self.commit_list.itemWidget(current_item)
-            if widget:
-                current_commit_id = widget.get_commit_id()
-
-        # Clear and reload commits
-        self.commit_list.clear()
-        history = self.file_manager.get_commit_history()
-        
-        for commit in history:
-            # Search in message and note
-            message = commit['message'].lower()
-            note = commit.get('note', '').lower()
-            
-            if search_text in message or search_text in note:
-                self.commit_list.add_commit(commit)
-
-    def show_advanced_search(self):
-        dialog = AdvancedSearchDialog(self.commit_list.parent())
-        if dialog.exec_():
-            self.apply_advanced_search(dialog)
+        """Filter the full list in place by the words of search_text"""
+        self.cancel_search()
+        # Typing in the search box leaves an advanced search
+        if self.showing_results:
+            self.showing_results = False
+            self.commit_list.load_commits()
+        self.commit_list.filter_commits(search_text)
 
     def apply_advanced_search(self, dialog):
-        search_text = dialog.search_input.text()
-        use_regex = dialog.regex_checkbox.isChecked()
-        date_from = dialog.date_from.date().toPython()
-        date_to = dialog.date_to.date().toPython()
         file_type = dialog.file_type.currentText()
+        query = CommitQuery(
+            dialog.search_input.text(),
+            use_regex=dialog.regex_checkbox.isChecked(),
+            date_from=dialog.date_from.date().toPython(),
+            date_to=dialog.date_to.date().toPython(),
+            file_type=None if file_type == "All Files" else file_type
+        )
+        self.run_query(query)
+
+    def run_query(self, query):
+        """Show the commits matching a compiled query; a newer query cancels an older one"""
+        self.cancel_search()
 
-        # Clear and reload commits
-        self.commit_list.clear()
-        history = self.file_manager.get_commit_history()
-        
-        for commit in history:
-            # Check date range
-            commit_date = datetime.strptime(commit['timestamp'], '%Y-%m-%d %H:%M:%S').date()
-            if not (date_from <= commit_date <= date_to):
-                continue
+        # Dates, file type and plain words are answered from indexes right away
+        candidates = self.file_manager.query_candidates(query)
+        if not query.needs_scan() or len(candidates) < BACKGROUND_SCAN_THRESHOLD:
+            self.show_results(self.file_manager.query_commits(query))
+            return
 
-            # Check file type
-            if file_type != "All Files":
-                file_path = commit['file']
-                if not file_path.lower().endswith(file_type.lower()):
-                    continue
+        # Only the regex pass over the narrowed commits runs in the background
+        worker = SearchWorker(query, self.file_manager.query_records(candidates))
+        worker.signals.finished.connect(self.on_search_finished)
+        self.current_worker = worker
+        self.workers.add(worker)
+        self.pool.start(worker)
 
-            # Check text match
-            message = commit['message']
-            note = commit.get('note', '')
-            
-            if use_regex:
-                try:
-                    pattern = re.compile(search_text, re.IGNORECASE)
-                    if not (pattern.search(message) or pattern.search(note)):
-                        continue
-                except re.error:
-                    continue
-            else:
-                search_text = search_text.lower()
-                if not (search_text in message.lower() or search_text in note.lower()):
-                    continue
+    def cancel_search(self):
+        if self.current_worker:
+            self.current_worker.cancel()
+            self.current_worker = None
 
-            # Add matching commit
-            self.commit_list.add_commit(commit)
+    def on_search_finished(self, worker, matches):
+        self.workers.discard(worker)
+        # Results of a cancelled or superseded search are dropped
+        if matches is None or worker is not self.current_worker:
+            return
+        self.current_worker = None
+        self.show_results(matches)
 
-    # ... rest of search-related methods ... 
\ No newline at end of file
+    def show_results(self, matches):
+        self.showing_results = True
+        self.commit_list.set_commits([self.file_manager.get_commit(commit_id) for commit_id in matches])
@@ -0,0 +1,27 @@
+from PySide2.QtCore import QObject, QRunnable, Signal
+
+
+class SearchWorkerSignals(QObject):
+    finished = Signal(object, object)  # worker, matching ids or None if cancelled
+
+
+class SearchWorker(QRunnable):
+    """Runs the regex stage of an advanced search off the GUI thread"""
+
+    def __init__(self, query, records):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.query = query
+        self.records = records
+        self.cancelled = False
+        self.signals = SearchWorkerSignals()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def is_cancelled(self):
+        return self.cancelled
+
+    def run(self):
+        matches = self.query.scan(self.records, self.is_cancelled)
+        self.signals.finished.emit(self, None if self.cancelled else matches)
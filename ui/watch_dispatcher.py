@@ -0,0 +1,391 @@
+from PySide2.QtCore import QObject, QFileSystemWatcher, QRunnable, QThreadPool, QTimer, Signal
+from core.poll_watcher import PollingWatcher, is_watched_name
+import os
+import threading
+
+
+def snapshot_directory(directory, accept):
+    """(size, mtime_ns) of the files directly inside a directory that accept(path) keeps"""
+    snapshot = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file() and accept(entry.path):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        pass
+    return snapshot
+
+
+class TreeScanSignals(QObject):
+    finished = Signal(str, object, bool)  # top, {directory: snapshot}, whether to report the files
+
+
+class TreeScan(QRunnable):
+    """Walks a directory tree off the GUI thread, snapshotting each new directory"""
+
+    def __init__(self, top, extensions, known_dirs, report):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.top = top
+        self.extensions = extensions
+        self.known_dirs = known_dirs
+        self.report = report
+        self.signals = TreeScanSignals()
+
+    def accept(self, path):
+        return is_watched_name(os.path.basename(path), self.extensions)
+
+    def run(self):
+        found = {}
+        try:
+            for directory, subdirs, _ in os.walk(self.top):
+                subdirs[:] = [name for name in subdirs if not name.startswith(".")]
+                if directory not in self.known_dirs:
+                    found[directory] = snapshot_directory(directory, self.accept)
+        except Exception as e:
+            print(f"Failed to scan {self.top}: {e}")
+        self.signals.finished.emit(self.top, found, self.report)
+
+
+class WatchDispatcher(QObject):
+    """Watches many files and directory trees and reports per-file changes.
+
+    QFileSystemWatcher only says that a file or a directory changed. Each
+    watched directory keeps a snapshot of its interesting files (size and
+    mtime), so a directory event is turned into events for exactly the files
+    that appeared or changed. That covers editors that save to a temp file and
+    rename it over the original, which drops the original from the watcher.
+    New trees are walked on a worker thread, since a large tree takes a while
+    to list; tree_added is emitted once a tree's files are being watched.
+    """
+    file_changed = Signal(str)  # path of a watched file whose content may have changed
+    tree_added = Signal(str)  # root of a tree whose initial walk finished
+
+    def __init__(self, extensions, parent=None):
+        super().__init__(parent)
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.files = set()  # files watched on their own
+        self.trees = set()  # roots of watched directory trees
+        self.tree_dirs = set()  # every directory inside a watched tree
+        self.snapshots = {}  # directory -> {path: (size, mtime_ns)} of its interesting files
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.scans = {}  # top directory -> TreeScan still walking it
+
+    def add_file(self, path):
+        path = os.path.abspath(path)
+        if path in self.files:
+            return
+        self.files.add(path)
+        directory = os.path.dirname(path)
+        self.watch_directories([directory])
+        self.snapshots[directory] = self.scan(directory)
+        self.watch_files([path])
+
+    def add_tree(self, root):
+        """Watch every supported file under root, including files created later"""
+        root = os.path.abspath(root)
+        if root in self.trees:
+            return
+        self.trees.add(root)
+        self.scan_tree(root, report=False)
+
+    def remove_file(self, path):
+        path = os.path.abspath(path)
+        self.files.discard(path)
+        self.sync_watches()
+
+    def remove_tree(self, root):
+        root = os.path.abspath(root)
+        self.trees.discard(root)
+        self.tree_dirs = {directory for directory in self.tree_dirs if self.in_tree(directory)}
+        self.sync_watches()
+
+    def clear(self):
+        self.files.clear()
+        self.trees.clear()
+        self.tree_dirs.clear()
+        self.sync_watches()
+
+    def watched_files(self):
+        """Every file currently being watched, sorted"""
+        found = set(self.files)
+        for directory in self.tree_dirs:
+            found.update(self.snapshots.get(directory, ()))
+        return sorted(found)
+
+    def in_tree(self, directory):
+        return any(directory == root or directory.startswith(root + os.sep) for root in self.trees)
+
+    def is_interesting(self, path):
+        if path in self.files:
+            return True
+        if not is_watched_name(os.path.basename(path), self.extensions):
+            return False
+        return os.path.dirname(path) in self.tree_dirs
+
+    def scan(self, directory):
+        """Stat the interesting files directly inside a directory"""
+        return snapshot_directory(directory, self.is_interesting)
+
+    def scan_tree(self, top, report):
+        """Walk top on the worker thread, then watch it and its subdirectories as part of a tree"""
+        if top in self.scans:
+            return
+        scan = TreeScan(top, self.extensions, frozenset(self.tree_dirs), report)
+        scan.signals.finished.connect(self.on_tree_scanned)
+        self.scans[top] = scan
+        self.pool.start(scan)
+
+    def on_tree_scanned(self, top, found, report):
+        self.scans.pop(top, None)
+        # The tree may have been dropped, or reached by another walk, meanwhile
+        new_dirs = [directory for directory in found if directory not in self.tree_dirs and self.in_tree(directory)]
+        new_files = []
+        for directory in new_dirs:
+            self.tree_dirs.add(directory)
+            self.snapshots[directory] = found[directory]
+            new_files.extend(found[directory])
+        # addPaths takes the whole batch in one call
+        self.watch_directories(new_dirs)
+        self.watch_files(new_files)
+        if report:
+            for path in new_files:
+                self.file_changed.emit(path)
+        elif top in self.trees:
+            self.tree_added.emit(top)
+
+    def watch_files(self, paths):
+        if not paths:
+            return
+        watched = set(self.watcher.files())
+        paths = [path for path in paths if path not in watched and os.path.exists(path)]
+        if paths:
+            self.report_failed(self.watcher.addPaths(paths))
+
+    def watch_directories(self, directories):
+        directories = [directory for directory in directories if os.path.isdir(directory)]
+        if directories:
+            self.report_failed(self.watcher.addPaths(directories))
+
+    @staticmethod
+    def report_failed(failed):
+        if failed:
+            # Usually the OS watch limit; the polling backend has none
+            print(f"Could not watch {len(failed)} paths, e.g. {failed[0]}. "
+                  f"Set \"watch_backend\" to \"polling\" for large trees or network shares.")
+
+    def stat_file(self, path):
+        """Current (size, mtime_ns) of a file, or None if it is missing"""
+        return PollingWatcher._stat(path)
+
+    def sync_watches(self):
+        """Drop watches that no file or tree needs any more"""
+        wanted_dirs = set(self.tree_dirs) | {os.path.dirname(path) for path in self.files}
+        wanted_files = set(self.watched_files())
+        stale = [path for path in self.watcher.files() if path not in wanted_files]
+        stale += [directory for directory in self.watcher.directories() if directory not in wanted_dirs]
+        if stale:
+            self.watcher.removePaths(stale)
+        for directory in list(self.snapshots):
+            if directory not in wanted_dirs:
+                del self.snapshots[directory]
+
+    def on_file_changed(self, path):
+        if not self.is_interesting(path):
+            return
+        directory = os.path.dirname(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # Replaced or deleted; the directory event reports it once it is back
+            self.snapshots.get(directory, {}).pop(path, None)
+            return
+        self.snapshots.setdefault(directory, {})[path] = (stat.st_size, stat.st_mtime_ns)
+        if path not in self.watcher.files():
+            self.watcher.addPath(path)
+        self.file_changed.emit(path)
+
+    def on_directory_changed(self, directory):
+        previous = self.snapshots.get(directory, {})
+        current = self.scan(directory)
+        self.snapshots[directory] = current
+
+        if directory in self.tree_dirs:
+            # Pick up subdirectories created inside a watched tree, and forget
+            # removed ones so they are picked up again if they come back
+            subdirs = {os.path.join(directory, name) for name in self.list_subdirs(directory)}
+            for gone in [d for d in self.tree_dirs if os.path.dirname(d) == directory and d not in subdirs]:
+                self.tree_dirs = {d for d in self.tree_dirs if d != gone and not d.startswith(gone + os.sep)}
+            for subdir in subdirs:
+                if subdir not in self.tree_dirs:
+                    self.scan_tree(subdir, report=True)
+
+        changed = [path for path, stat in current.items() if previous.get(path) != stat]
+        self.watch_files(changed)
+        for path in changed:
+            self.file_changed.emit(path)
+
+    @staticmethod
+    def list_subdirs(directory):
+        try:
+            with os.scandir(directory) as entries:
+                return [entry.name for entry in entries if entry.is_dir() and not entry.name.startswith(".")]
+        except OSError:
+            return []
+
+
+class PollStepSignals(QObject):
+    finished = Signal(object, float)  # changed paths, seconds until the next step
+
+
+class PollStep(QRunnable):
+    """Runs one step of a PollingWatcher off the GUI thread"""
+
+    def __init__(self, poller, lock):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.poller = poller
+        self.lock = lock
+        self.signals = PollStepSignals()
+
+    def run(self):
+        try:
+            with self.lock:
+                changed, delay = self.poller.step()
+        except Exception as e:
+            print(f"Polling for changes failed: {e}")
+            changed, delay = [], self.poller.max_interval
+        self.signals.finished.emit(changed, delay)
+
+
+class PollingWatchDispatcher(QObject):
+    """Same interface as WatchDispatcher, backed by a PollingWatcher.
+
+    For network shares and trees too large for OS watches. A single-shot
+    timer starts one batch at a time on a worker thread, since listing a
+    slow share can block, and waits the interval the watcher asks for
+    between passes. New trees are listed the same way. Changes come back to
+    the GUI thread through a signal.
+    """
+    file_changed = Signal(str)
+    tree_added = Signal(str)
+
+    def __init__(self, extensions, parent=None, min_interval=None, max_interval=None):
+        super().__init__(parent)
+        self.poller = PollingWatcher(extensions)
+        if min_interval is not None:
+            self.poller.min_interval = self.poller.interval = min_interval
+        if max_interval is not None:
+            self.poller.max_interval = max_interval
+        # Held by the worker for a step and by the GUI thread to change what is watched
+        self.lock = threading.Lock()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.step = None  # the step running on the worker thread
+        self.restart_requested = False  # paths were added while a step ran
+        self.new_trees = set()  # roots added but not listed yet
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.poll)
+
+    def add_file(self, path):
+        with self.lock:
+            self.poller.add_file(path)
+        self.restart()
+
+    def add_tree(self, root):
+        # Only registers the tree; it is listed by steps on the worker thread
+        with self.lock:
+            self.poller.add_tree(root)
+        self.new_trees.add(os.path.abspath(root))
+        self.restart()
+        if self.step is None:
+            self.timer.start(0)
+
+    def remove_file(self, path):
+        with self.lock:
+            self.poller.remove_file(path)
+
+    def remove_tree(self, root):
+        with self.lock:
+            self.poller.remove_tree(root)
+        self.new_trees.discard(os.path.abspath(root))
+
+    def clear(self):
+        with self.lock:
+            self.poller.clear()
+        self.new_trees.clear()
+        self.timer.stop()
+
+    def watched_files(self):
+        with self.lock:
+            return self.poller.watched_files()
+
+    def stat_file(self, path):
+        # Called on every scheduler tick, so it never waits for a running step;
+        # the cache is refreshed only when the watcher is free
+        if self.lock.acquire(blocking=False):
+            try:
+                return self.poller.stat(path)
+            finally:
+                self.lock.release()
+        return PollingWatcher._stat(path)
+
+    def restart(self):
+        """Poll soon at the fastest rate, e.g. after new paths were added"""
+        self.poller.interval = self.poller.min_interval
+        if self.step is not None:
+            # The running step starts the timer when it finishes
+            self.restart_requested = True
+            return
+        if not self.timer.isActive() or self.timer.remainingTime() > self.poller.min_interval * 1000:
+            self.timer.start(int(self.poller.min_interval * 1000))
+
+    def poll(self):
+        if self.step is not None:
+            return
+        self.step = PollStep(self.poller, self.lock)
+        self.step.signals.finished.connect(self.on_step_finished)
+        self.pool.start(self.step)
+
+    def on_step_finished(self, changed, delay):
+        self.step = None
+        for path in changed:
+            self.file_changed.emit(path)
+        # No step is running, so the watcher can be read without the lock
+        if self.new_trees and not self.poller.listing():
+            for root in sorted(self.new_trees):
+                self.tree_added.emit(root)
+            self.new_trees.clear()
+        if self.restart_requested:
+            self.restart_requested = False
+            delay = min(delay, self.poller.min_interval)
+        if self.poller.files or self.poller.dirs:
+            self.timer.start(int(delay * 1000))
+
+
+WATCH_BACKENDS = {
+    "native": WatchDispatcher,
+    "polling": PollingWatchDispatcher
+}
+
+
+def create_watch_dispatcher(config, extensions, parent=None):
+    """Build the watcher backend named by the "watch_backend" setting"""
+    backend = config.get("watch_backend", "native")
+    if backend == "polling":
+        return PollingWatchDispatcher(extensions, parent,
+                                      min_interval=config.get("watch_poll_min_interval"),
+                                      max_interval=config.get("watch_poll_max_interval"))
+    if backend not in WATCH_BACKENDS:
+        print(f"Unknown watch backend {backend!r}, using native")
+    return WatchDispatcher(extensions, parent)
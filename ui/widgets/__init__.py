@@ -1,5 +1,7 @@
 from .commit_list import CommitList
-from .commit_list_item import CommitListItem
+from .commit_list_model import CommitListModel
+from .commit_delegate import CommitDelegate
 from .preview import PreviewWidget
+from .preview_cache import PreviewCache
 from .file_selector import FileSelector
 from .note_panel import NotePanel 
\ No newline at end of file
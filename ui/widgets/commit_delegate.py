@@ -0,0 +1,64 @@
+from PySide2.QtWidgets import QStyledItemDelegate
+from PySide2.QtCore import Qt, QSize, QRect
+from PySide2.QtGui import QColor, QPixmap, QPixmapCache
+from .commit_list_model import CommitRole
+
+THUMBNAIL_SIZE = 40
+MARGIN = 5
+SPACING = 6
+
+class CommitDelegate(QStyledItemDelegate):
+    """Paints a commit row: thumbnail, id, timestamp, message, note marker and color tag"""
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), THUMBNAIL_SIZE + 2 * MARGIN)
+
+    def paint(self, painter, option, index):
+        commit = index.data(CommitRole)
+        if commit is None:
+            return
+        painter.save()
+        rect = option.rect
+
+        # Color tag fills the row, selection is drawn over it
+        if commit.get('color'):
+            painter.fillRect(rect, QColor(commit['color']))
+        if self.parent().selectionModel().isSelected(index):
+            painter.fillRect(rect, option.palette.highlight())
+            painter.setPen(option.palette.highlightedText().color())
+        else:
+            painter.setPen(option.palette.text().color())
+
+        # Thumbnail, or a placeholder while it is still rendering
+        thumb_rect = QRect(rect.left() + MARGIN, rect.top() + MARGIN, THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        pixmap = self.thumbnail_pixmap(commit.get('thumbnail'))
+        if pixmap is None:
+            painter.fillRect(thumb_rect, QColor("#eeeeee"))
+        else:
+            x = thumb_rect.left() + (THUMBNAIL_SIZE - pixmap.width()) // 2
+            y = thumb_rect.top() + (THUMBNAIL_SIZE - pixmap.height()) // 2
+            painter.drawPixmap(x, y, pixmap)
+
+        display_text = f"{commit['id']} - {commit['timestamp']} - {commit['message']}"
+        if commit.get('note'):
+            display_text += " 📝"  # Add note indicator
+        text_rect = rect.adjusted(MARGIN + THUMBNAIL_SIZE + SPACING, 0, -MARGIN, 0)
+        metrics = option.fontMetrics
+        elided = metrics.elidedText(display_text, Qt.ElideRight, text_rect.width())
+        baseline = text_rect.top() + (text_rect.height() + metrics.ascent() - metrics.descent()) // 2
+        painter.drawText(text_rect.left(), baseline, elided)
+        painter.restore()
+
+    def thumbnail_pixmap(self, thumbnail_path):
+        """Load a scaled thumbnail once; QPixmapCache keeps the recently painted ones"""
+        if not thumbnail_path:
+            return None
+        key = f"commit_thumb:{thumbnail_path}"
+        pixmap = QPixmapCache.find(key)
+        if pixmap is None or pixmap.isNull():
+            pixmap = QPixmap(thumbnail_path)
+            if pixmap.isNull():
+                return None
+            pixmap = pixmap.scaled(THUMBNAIL_SIZE, THUMBNAIL_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            QPixmapCache.insert(key, pixmap)
+        return pixmap
@@ -1,67 +1,188 @@
-from PySide2.QtWidgets import (QListWidget, QListWidgetItem, QMenu, 
+from PySide2.QtWidgets import (QListView, QListWidget, QListWidgetItem, QAbstractItemView, QMenu,
                               QInputDialog, QColorDialog, QMessageBox,
-                              QFileDialog, QLineEdit, QDialog, QVBoxLayout, QTextEdit,
-                              QDialogButtonBox, QApplication)
-from PySide2.QtCore import Qt
-from .commit_list_item import CommitListItem
+                              QFileDialog, QDialog, QVBoxLayout, QTextEdit,
+                              QDialogButtonBox)
+from PySide2.QtCore import Qt, Signal, QModelIndex, QSize
+from PySide2.QtGui import QIcon
+from core.search_index import tokenize
+from .commit_list_model import CommitListModel, CommitIdRole
+from .commit_delegate import CommitDelegate
 import os
-import shutil
 
-class CommitList(QListWidget):
+class CommitList(QListView):
+    current_commit_changed = Signal(object)  # commit id, or None when nothing is selected
+    compare_requested = Signal(int, int)  # older commit id, newer commit id
+
     def __init__(self, file_manager, parent=None):
         super().__init__(parent)
         self.file_manager = file_manager
-        self.setSelectionMode(QListWidget.SingleSelection)
+        self.commit_model = CommitListModel(self)
+        self.setModel(self.commit_model)
+        self.setItemDelegate(CommitDelegate(self))
+        # Every row has the same height, so the view never measures rows it does not show
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
         self.setSpacing(2)
         self.setContextMenuPolicy(Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self.show_context_menu)
+        self.selectionModel().currentChanged.connect(self.on_current_changed)
+        self.restoring_current = False  # set while show_all_rows puts the selection back
+        # A reset drops the selection without reporting it through currentChanged
+        self.commit_model.modelReset.connect(lambda: self.current_commit_changed.emit(None))
+        # Rows are filtered in place; visible_ids is None while no filter is active
+        self.filter_query = ""
+        self.visible_ids = None
+        self.commit_model.modelReset.connect(self.reapply_filter)
+        self.commit_model.rowsInserted.connect(self.on_rows_inserted)
         self.load_commits()
 
     def load_commits(self):
         """Load all commits into the list"""
         history = self.file_manager.get_commit_history()
-        self.clear()
-        
-        # Sort commits by ID to maintain order
-        history.sort(key=lambda x: x['id'])
-        
-        for commit in history:
-            self.add_commit(commit)
-        
-        # Process events to ensure UI is updated
-        QApplication.processEvents()
+        self.set_commits(history)
+
+    def set_commits(self, commits):
+        """Show exactly these commits, sorted by ID"""
+        self.commit_model.set_commits(sorted(commits, key=lambda x: x['id']))
 
     def add_commit(self, commit):
         """Add a commit to the list if it doesn't already exist"""
-        # Check if commit already exists
-        for i in range(self.count()):
-            item = self.item(i)
-            widget = self.itemWidget(item)
-            if widget and widget.get_commit_id() == commit['id']:
-                return  # Skip if already exists
-            
-        # Add new commit
-        item = QListWidgetItem(self)
-        widget = CommitListItem(
-            commit['id'],
-            commit['timestamp'],
-            commit['message'],
-            commit.get('note', ''),
-            commit.get('color')
-        )
-        item.setSizeHint(widget.sizeHint())
-        self.setItemWidget(item, widget)
+        self.commit_model.add_commit(commit)
 
-    def show_context_menu(self, position):
-        item = self.itemAt(position)
-        if not item:
+    def count(self):
+        return self.commit_model.rowCount()
+
+    def commit_ids(self):
+        """IDs of the listed commits, top to bottom"""
+        return self.commit_model.commit_ids()
+
+    def visible_commit_ids(self):
+        """IDs of the commits the current filter leaves visible, top to bottom"""
+        if self.visible_ids is None:
+            return self.commit_ids()
+        return [commit_id for commit_id in self.commit_ids() if commit_id in self.visible_ids]
+
+    def neighbor_ids(self, commit_id, count):
+        """Up to count visible commit ids on each side of commit_id, nearest
+        first, as (above, below)"""
+        row = self.commit_model.row_for_id(commit_id)
+        if row is None:
+            return [], []
+        sides = []
+        for step in (-1, 1):
+            ids = []
+            other = row + step
+            while 0 <= other < self.count() and len(ids) < count:
+                if not self.isRowHidden(other):
+                    ids.append(self.commit_model.commit_at(other)['id'])
+                other += step
+            sides.append(ids)
+        return sides[0], sides[1]
+
+    def filter_commits(self, query):
+        """Hide the rows that do not match every word of query, without rebuilding the list"""
+        # Punctuation is not indexed, so a query like "#" filters on nothing
+        query = " ".join(tokenize(query))
+        if query == self.filter_query:
             return
+        previous_query = self.filter_query
+        self.filter_query = query
+
+        if not query:
+            if self.visible_ids is not None:
+                self.show_all_rows()
+            self.visible_ids = None
+        elif previous_query and query.startswith(previous_query) and self.visible_ids is not None:
+            # Typing more only narrows a prefix match, so hidden rows stay hidden
+            # and only the visible ones are checked against the new matches
+            matches = set(self.file_manager.search_commits(query, match_all=True))
+            for commit_id in self.visible_ids - matches:
+                self.set_commit_hidden(commit_id, True)
+            self.visible_ids &= matches
+        else:
+            matches = set(self.file_manager.search_commits(query, match_all=True))
+            # Only touch rows whose state changes; each setRowHidden call has a cost.
+            # When most rows come back, unhiding everything and hiding the rest is cheaper.
+            if self.visible_ids is not None and len(matches - self.visible_ids) > self.count() - len(matches):
+                self.show_all_rows()
+                self.visible_ids = None
+            if self.visible_ids is None:
+                for row, commit_id in enumerate(self.commit_ids()):
+                    if commit_id not in matches:
+                        self.setRowHidden(row, True)
+            else:
+                for commit_id in self.visible_ids - matches:
+                    self.set_commit_hidden(commit_id, True)
+                for commit_id in matches - self.visible_ids:
+                    self.set_commit_hidden(commit_id, False)
+            self.visible_ids = matches
+
+        # Keep the selection unless the selected commit was filtered out
+        current_id = self.current_commit_id()
+        if current_id is not None and self.visible_ids is not None and current_id not in self.visible_ids:
+            self.setCurrentIndex(QModelIndex())
 
-        widget = self.itemWidget(item)
-        if not widget:
+    def reapply_filter(self):
+        """Filter freshly loaded rows with the active query"""
+        query, self.filter_query = self.filter_query, ""
+        self.visible_ids = None
+        if query:
+            self.filter_commits(query)
+
+    def on_rows_inserted(self, parent, first, last):
+        if not self.filter_query:
             return
+        for row in range(first, last + 1):
+            commit_id = self.commit_model.commit_at(row)['id']
+            if self.file_manager.commit_matches(commit_id, self.filter_query, match_all=True):
+                self.visible_ids.add(commit_id)
+            else:
+                self.setRowHidden(row, True)
 
-        commit_id = widget.get_commit_id()
+    def show_all_rows(self):
+        """Unhide every row at once; a view reset drops the hidden rows in one go"""
+        current_id = self.current_commit_id()
+        self.reset()
+        if current_id is not None:
+            # The reset drops the selection silently, and putting it back is
+            # no change worth reporting: it would drop the diff and page shown
+            self.restoring_current = True
+            try:
+                self.set_current_commit(current_id)
+            finally:
+                self.restoring_current = False
+
+    def set_commit_hidden(self, commit_id, hidden):
+        row = self.commit_model.row_for_id(commit_id)
+        if row is not None:
+            self.setRowHidden(row, hidden)
+
+    def current_commit_id(self):
+        index = self.currentIndex()
+        return index.data(CommitIdRole) if index.isValid() else None
+
+    def set_current_commit(self, commit_id):
+        """Select a listed commit; returns False if it is not in the list"""
+        row = self.commit_model.row_for_id(commit_id)
+        if row is None:
+            return False
+        self.setCurrentIndex(self.commit_model.index(row))
+        return True
+
+    def set_current_row(self, row):
+        self.setCurrentIndex(self.commit_model.index(row))
+
+    def on_current_changed(self, current, previous):
+        if self.restoring_current:
+            return
+        self.current_commit_changed.emit(current.data(CommitIdRole) if current.isValid() else None)
+
+    def show_context_menu(self, position):
+        index = self.indexAt(position)
+        if not index.isValid():
+            return
+
+        commit_id = index.data(CommitIdRole)
         menu = QMenu()
 
         # Edit message action
@@ -89,6 +210,23 @@ class CommitList(QListWidget):
                 lambda checked=False, cv=color_value: self.set_commit_color(commit_id, cv)
             )
 
+        # Visual similarity
+        similar_action = menu.addAction("Find Similar Versions")
+        similar_action.triggered.connect(lambda: self.find_similar_versions(commit_id))
+
+        # Pixel comparison
+        previous = self.file_manager.previous_version(commit_id)
+        compare_previous = menu.addAction("Compare With Previous Version")
+        compare_previous.setEnabled(previous is not None)
+        if previous is not None:
+            compare_previous.triggered.connect(lambda: self.compare_requested.emit(previous["id"], commit_id))
+        current_id = self.current_commit_id()
+        if current_id is not None and current_id != commit_id:
+            compare_selected = menu.addAction("Compare With Selected Version")
+            compare_selected.triggered.connect(
+                lambda: self.compare_requested.emit(min(commit_id, current_id), max(commit_id, current_id))
+            )
+
         # Export action
         menu.addSeparator()
         export_action = menu.addAction("Export Version")
@@ -99,7 +237,7 @@ class CommitList(QListWidget):
         delete_action = menu.addAction("Delete")
         delete_action.triggered.connect(lambda: self.delete_commit(commit_id))
 
-        menu.exec_(self.mapToGlobal(position))
+        menu.exec_(self.viewport().mapToGlobal(position))
 
     def edit_commit_message(self, commit_id):
         current_message = self.file_manager.get_commit_message(commit_id)
@@ -111,13 +249,7 @@ class CommitList(QListWidget):
         )
         if ok and new_message:
             self.file_manager.update_commit(commit_id, message=new_message)
-            # Update the existing item's message
-            for i in range(self.count()):
-                item = self.item(i)
-                widget = self.itemWidget(item)
-                if widget and widget.get_commit_id() == commit_id:
-                    widget.update_message(new_message)
-                    break
+            self.commit_model.update_commit(commit_id, message=new_message)
 
     def edit_commit_note(self, commit_id):
         current_note = self.file_manager.get_commit_note(commit_id)
@@ -125,13 +257,7 @@ class CommitList(QListWidget):
         if dialog.exec_() == QDialog.Accepted:
             new_note = dialog.get_note()
             self.file_manager.update_commit(commit_id, note=new_note)
-            # Update the existing item's note
-            for i in range(self.count()):
-                item = self.item(i)
-                widget = self.itemWidget(item)
-                if widget and widget.get_commit_id() == commit_id:
-                    widget.update_note(new_note)
-                    break
+            self.commit_model.update_commit(commit_id, note=new_note)
 
     def set_commit_color(self, commit_id, color):
         """Set color for a specific commit"""
@@ -143,20 +269,44 @@ class CommitList(QListWidget):
 
         # Update the commit in the file manager
         self.file_manager.update_commit(commit_id, color=color)
+        self.commit_model.update_commit(commit_id, color=color)
 
-        # Find and update the specific item
-        for i in range(self.count()):
-            item = self.item(i)
-            widget = self.itemWidget(item)
-            if widget and widget.get_commit_id() == commit_id:
-                # Update the existing widget's color
-                widget.set_color(color)
-                break
+    def set_commit_thumbnail(self, commit_id, thumbnail_path):
+        """Show a thumbnail that finished rendering after the commit was listed"""
+        self.commit_model.update_commit(commit_id, thumbnail=thumbnail_path)
+
+    def find_similar_versions(self, commit_id):
+        """List the commits that look most like this one and jump to the chosen one"""
+        matches = self.file_manager.find_similar(commit_id)
+        if not matches:
+            QMessageBox.information(
+                self,
+                "Find Similar Versions",
+                "No similar versions found. Thumbnails may still be rendering."
+            )
+            return
+
+        dialog = SimilarVersionsDialog(
+            [(distance, self.file_manager.get_commit(other_id)) for distance, other_id in matches], self
+        )
+        if dialog.exec_() == QDialog.Accepted:
+            selected_id = dialog.get_selected_commit_id()
+            if selected_id is None:
+                return
+            if self.visible_ids is not None and selected_id not in self.visible_ids:
+                QMessageBox.information(
+                    self,
+                    "Find Similar Versions",
+                    f"Commit {selected_id} is hidden by the current search."
+                )
+                return
+            self.set_current_commit(selected_id)
+            self.scrollTo(self.currentIndex())
 
     def export_commit(self, commit_id):
         """Export a specific version of the file"""
-        file_path = self.file_manager.get_version_path(commit_id)
-        if not file_path or not os.path.exists(file_path):
+        original_name = self.file_manager.get_version_filename(commit_id)
+        if not original_name:
             QMessageBox.warning(
                 self,
                 "Export Error",
@@ -164,8 +314,7 @@ class CommitList(QListWidget):
             )
             return
 
-        # Get original filename and suggest new name with version
-        original_name = os.path.basename(file_path)
+        # Suggest new name with version
         base, ext = os.path.splitext(original_name)
         suggested_name = f"{base}_v{commit_id}{ext}"
 
@@ -179,7 +328,7 @@ class CommitList(QListWidget):
 
         if save_path:
             try:
-                shutil.copy2(file_path, save_path)
+                self.file_manager.export_version(commit_id, save_path)
                 QMessageBox.information(
                     self,
                     "Success",
@@ -205,18 +354,7 @@ class CommitList(QListWidget):
         if reply == QMessageBox.Yes:
             success = self.file_manager.delete_commit(commit_id)
             if success:
-                # Find and remove the item from the list
-                for i in range(self.count()):
-                    item = self.item(i)
-                    widget = self.itemWidget(item)
-                    if widget and widget.get_commit_id() == commit_id:
-                        # Remove the item
-                        item = self.takeItem(i)
-                        if widget:
-                            widget.setParent(None)
-                            widget.deleteLater()
-                        del item
-                        break
+                self.commit_model.remove_commit(commit_id)
                 
                 # If this was the last commit, clear everything
                 if self.count() == 0:
@@ -236,44 +374,8 @@ class CommitList(QListWidget):
                 )
 
     def clear(self):
-        """Override clear to properly clean up widgets"""
-        try:
-            if not self.isValid():  # Check if widget is still valid
-                return
-            
-            # Take and delete items one by one
-            while self.count() > 0:
-                try:
-                    item = self.takeItem(0)
-                    if item:
-                        widget = self.itemWidget(item)
-                        if widget and not widget.isDestroyed():
-                            widget.setParent(None)
-                            widget.deleteLater()
-                        del item
-                except RuntimeError:
-                    break  # Break if objects are already deleted
-                
-            super().clear()
-            QApplication.processEvents()
-        except RuntimeError:
-            pass  # Ignore if widget is already deleted
-
-    def __del__(self):
-        """Cleanup when object is deleted"""
-        try:
-            if self.isValid():  # Check if widget is still valid
-                self.clear()
-                self.setParent(None)
-        except (RuntimeError, AttributeError):
-            pass
-
-    def isValid(self):
-        """Check if the widget is still valid"""
-        try:
-            return not self.isDestroyed() and self.count() >= 0
-        except (RuntimeError, AttributeError):
-            return False
+        """Remove every row from the list"""
+        self.commit_model.clear()
 
 class NoteDialog(QDialog):
     def __init__(self, current_note="", parent=None):
@@ -301,4 +403,41 @@ class NoteDialog(QDialog):
         self.setLayout(layout)
 
     def get_note(self):
-        return self.text_edit.toPlainText() 
\ No newline at end of file
+        return self.text_edit.toPlainText() 
+
+class SimilarVersionsDialog(QDialog):
+    def __init__(self, matches, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Similar Versions")
+        self.init_ui(matches)
+
+    def init_ui(self, matches):
+        layout = QVBoxLayout()
+
+        # Closest first; the distance is the number of differing hash bits out of 64
+        self.results = QListWidget()
+        self.results.setIconSize(QSize(48, 48))
+        for distance, commit in matches:
+            item = QListWidgetItem(f"{commit['id']} - {commit['timestamp']} - {commit['message']} (distance {distance})")
+            item.setData(Qt.UserRole, commit['id'])
+            if commit.get('thumbnail'):
+                item.setIcon(QIcon(commit['thumbnail']))
+            self.results.addItem(item)
+        self.results.setCurrentRow(0)
+        self.results.itemDoubleClicked.connect(self.accept)
+        self.results.setMinimumSize(400, 300)
+        layout.addWidget(self.results)
+
+        # Buttons
+        buttons = QDialogButtonBox(
+            QDialogButtonBox.Ok | QDialogButtonBox.Cancel
+        )
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+        self.setLayout(layout)
+
+    def get_selected_commit_id(self):
+        item = self.results.currentItem()
+        return item.data(Qt.UserRole) if item else None
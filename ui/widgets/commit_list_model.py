@@ -0,0 +1,93 @@
+from PySide2.QtCore import Qt, QAbstractListModel, QModelIndex
+
+CommitRole = Qt.UserRole + 1
+CommitIdRole = Qt.UserRole + 2
+
+class CommitListModel(QAbstractListModel):
+    """Holds the commit records shown in the list, one row per commit"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.commits = []
+        self.rows = {}  # commit id -> row, kept in step with self.commits
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.commits)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.commits):
+            return None
+        commit = self.commits[index.row()]
+        if role == CommitRole:
+            return commit
+        if role == CommitIdRole:
+            return commit['id']
+        if role == Qt.DisplayRole:
+            return f"{commit['id']} - {commit['timestamp']} - {commit['message']}"
+        if role == Qt.ToolTipRole:
+            return commit.get('note') or None
+        return None
+
+    def set_commits(self, commits):
+        """Replace every row at once"""
+        self.beginResetModel()
+        self.commits = []
+        self.rows = {}
+        for commit in commits:
+            if commit['id'] not in self.rows:
+                self.rows[commit['id']] = len(self.commits)
+                self.commits.append(commit)
+        self.endResetModel()
+
+    def add_commit(self, commit):
+        """Insert a commit in ID order unless it is already listed"""
+        if commit['id'] in self.rows:
+            return
+        # Commits finish out of order, but nearly always belong near the end
+        row = len(self.commits)
+        while row > 0 and self.commits[row - 1]['id'] > commit['id']:
+            row -= 1
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.commits.insert(row, commit)
+        self.reindex_from(row)
+        self.endInsertRows()
+
+    def remove_commit(self, commit_id):
+        row = self.row_for_id(commit_id)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.commits[row]
+        del self.rows[commit_id]
+        self.reindex_from(row)
+        self.endRemoveRows()
+
+    def update_commit(self, commit_id, **fields):
+        """Change fields of a listed commit and repaint its row"""
+        row = self.row_for_id(commit_id)
+        if row is None:
+            return
+        self.commits[row].update(fields)
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def commit_at(self, row):
+        if 0 <= row < len(self.commits):
+            return self.commits[row]
+        return None
+
+    def commit_ids(self):
+        return [commit['id'] for commit in self.commits]
+
+    def row_for_id(self, commit_id):
+        return self.rows.get(commit_id)
+
+    def reindex_from(self, row):
+        """Renumber the rows that shifted after an insert or removal at row"""
+        for shifted in range(row, len(self.commits)):
+            self.rows[self.commits[shifted]['id']] = shifted
+
+    def clear(self):
+        self.set_commits([])
@@ -27,6 +27,11 @@ class FileSelector(QWidget):
         select_button.clicked.connect(self.select_file)
         layout.addWidget(select_button)
 
+        # Watch a whole project folder
+        watch_folder_button = QPushButton("Watch Folder")
+        watch_folder_button.clicked.connect(self.select_folder)
+        layout.addWidget(watch_folder_button)
+
         self.setLayout(layout)
 
     def select_file(self):
@@ -42,4 +47,11 @@ class FileSelector(QWidget):
             main_window = self.window()
             if main_window:
                 main_window.watch_file(file_path)
-                main_window.right_panel.update_source_file(file_path) 
\ No newline at end of file
+                main_window.right_panel.update_source_file(file_path) 
+
+    def select_folder(self):
+        dir_path = QFileDialog.getExistingDirectory(self, "Select Folder to Watch")
+        if dir_path:
+            main_window = self.window()
+            if main_window:
+                main_window.watch_directory(dir_path)
@@ -1,10 +1,22 @@
 from PySide2.QtWidgets import QLabel
-from PySide2.QtCore import Qt
-from PySide2.QtGui import QPixmap
+from PySide2.QtCore import Qt, QRectF
+from PySide2.QtGui import QPixmap, QImage, QPainter, QPen, QColor
+from .preview_cache import PreviewCache
+
+# Opacity of a fully changed heatmap cell over the preview
+HEATMAP_OPACITY = 160
+# Pages are rendered at the preview size rounded up to a multiple of this,
+# so small resizes reuse pages already in the page cache
+RENDER_SIZE_STEP = 256
 
 class PreviewWidget(QLabel):
-    def __init__(self, parent=None):
+    """Shows a version's preview scaled to fit; scaled pixmaps of image files
+    are kept in an LRU cache of cache_budget bytes"""
+
+    def __init__(self, parent=None, cache_budget=0):
         super().__init__(parent)
+        self.base_pixmap = None
+        self.cache = PreviewCache(cache_budget)
         self.setMinimumSize(300, 300)
         self.setAlignment(Qt.AlignCenter)
         self.setStyleSheet("border: 1px solid #ccc;")
@@ -13,18 +25,93 @@ class PreviewWidget(QLabel):
         if not image_path:
             self.clear()
             return
-            
-        preview = QPixmap(image_path)
+
+        # Files shown here never change, so a path and size identify the pixmap
+        key = self.cache_key(image_path)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.base_pixmap = cached
+            self.setPixmap(cached)
+            return
+        self.show_pixmap(QPixmap(image_path))
+        if self.base_pixmap is not None:
+            self.cache.put(key, self.base_pixmap)
+
+    def display_size(self):
+        """Size previews are scaled to: inside the border, so showing one does
+        not make the label's size hint, and with it the layout, grow"""
+        return self.contentsRect().size()
+
+    def cache_key(self, image_path):
+        size = self.display_size()
+        return (image_path, size.width(), size.height())
+
+    def preview_side(self):
+        """Device pixels across the longer side of this preview"""
+        return int(max(self.width(), self.height()) * self.devicePixelRatioF())
+
+    def render_size(self):
+        """Square size that pages are rendered at to fill this preview"""
+        side = max(self.width(), self.height(), 1)
+        side = -(-side // RENDER_SIZE_STEP) * RENDER_SIZE_STEP
+        return (side, side)
+
+    def set_preview_data(self, data):
+        """Show a preview decoded from in-memory file content"""
+        preview = QPixmap()
+        preview.loadFromData(data)
+        self.show_pixmap(preview)
+
+    def show_pixmap(self, preview):
         if not preview.isNull():
             scaled_preview = preview.scaled(
-                self.size(),
+                self.display_size(),
                 Qt.KeepAspectRatio,
                 Qt.SmoothTransformation
             )
+            self.base_pixmap = scaled_preview
             self.setPixmap(scaled_preview)
         else:
+            self.base_pixmap = None
             self.setText("Preview not available")
 
+    def show_diff(self, result):
+        """Paint a diff's heatmap and changed-region boxes over the current preview,
+        which shows the newer of the two compared versions"""
+        if self.base_pixmap is None:
+            return
+        import math
+        import numpy as np
+        overlay = self.base_pixmap.copy()
+        # The canvas can be larger than the newer version; only the part it covers is drawn
+        width, height = result.sizes[1]
+        scale_x = overlay.width() / width
+        scale_y = overlay.height() / height
+
+        # Red cells whose opacity follows the share of changed pixels
+        cell = result.cell_size
+        cells = result.heatmap[:math.ceil(height / cell), :math.ceil(width / cell)]
+        pixels = np.zeros(cells.shape + (4,), dtype=np.uint8)
+        pixels[..., 2] = 255
+        pixels[..., 3] = (cells.astype(np.uint16) * HEATMAP_OPACITY // 255).astype(np.uint8)
+        # Format_ARGB32 is laid out as B, G, R, A in memory
+        heatmap = QImage(pixels.data, cells.shape[1], cells.shape[0], cells.shape[1] * 4,
+                         QImage.Format_ARGB32).copy()
+
+        painter = QPainter(overlay)
+        # Edge cells reach past the image, so the heatmap is stretched over whole cells
+        painter.drawImage(QRectF(0, 0, cells.shape[1] * cell * scale_x, cells.shape[0] * cell * scale_y), heatmap)
+        painter.setPen(QPen(QColor("#c62828"), 2))
+        for left, top, right, bottom in result.boxes:
+            right, bottom = min(right, width), min(bottom, height)
+            if left >= right or top >= bottom:
+                continue
+            painter.drawRect(int(left * scale_x), int(top * scale_y),
+                             max(1, int((right - left) * scale_x)), max(1, int((bottom - top) * scale_y)))
+        painter.end()
+        self.setPixmap(overlay)
+
     def clear(self):
+        self.base_pixmap = None
         super().clear()
         self.setText("No preview available") 
\ No newline at end of file
@@ -0,0 +1,47 @@
+from collections import OrderedDict
+
+
+class PreviewCache:
+    """Recently shown preview pixmaps, least recently used evicted first.
+
+    Pixmaps are charged at their uncompressed size and the total is kept
+    within budget bytes. Only used from the GUI thread.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.used = 0
+        self.pixmaps = OrderedDict()
+
+    @staticmethod
+    def cost(pixmap):
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def get(self, key):
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(key)
+        return pixmap
+
+    def __contains__(self, key):
+        return key in self.pixmaps
+
+    def put(self, key, pixmap):
+        cost = self.cost(pixmap)
+        if cost > self.budget:
+            return
+        self.discard(key)
+        self.pixmaps[key] = pixmap
+        self.used += cost
+        while self.used > self.budget:
+            _, evicted = self.pixmaps.popitem(last=False)
+            self.used -= self.cost(evicted)
+
+    def discard(self, key):
+        pixmap = self.pixmaps.pop(key, None)
+        if pixmap is not None:
+            self.used -= self.cost(pixmap)
+
+    def clear(self):
+        self.pixmaps.clear()
+        self.used = 0